@@ -1 +0,0 @@
-from app.api.auth.models import User,Role
\ No newline at end of file
@@ -0,0 +1,94 @@
+import time
+from datetime import date
+
+from fastapi import HTTPException
+from sqlalchemy import case, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.api.archive.columnar import GROUP_LEVELS, summarize_archive
+from app.api.attendance.models import (Attendance, Batch, Department, Section,
+                                       Student, Year)
+from app.core.cache import cache
+from app.core.executor import cpu_executor
+from app.core.settings import settings
+
+'''
+=====================================================
+# Description:
+    - Multi-year attendance aggregates straight from the Parquet archive:
+      files are memory-mapped, pruned by month and filtered in Arrow, in the
+      CPU pool (app/api/archive/columnar.py)
+    - Sections are joined to a cached department/batch/year/section snapshot
+      through the dictionary of section ids only; counting is np.bincount
+    - `sql_attendance_summary` is the equivalent query on the live table with
+      the archive's semantics: deleted attendance rows are left out, rows of
+      since-deleted students and sections are kept
+      (used by benchmarks/archive_analytics.py)
+=====================================================
+'''
+
+async def get_hierarchy_snapshot(db: AsyncSession):
+    """
+    section_id -> department/batch/year/section names, including deleted rows
+    (archived attendance can reference sections that no longer exist).
+    """
+    async def load():
+        query = (
+            select(Section.id, Section.name.label("section"), Year.name.label("year"),
+                   Batch.name.label("batch"), Department.name.label("department"))
+            .join(Year, Section.year_id == Year.id)
+            .join(Batch, Year.batch_id == Batch.id)
+            .join(Department, Batch.department_id == Department.id)
+            .execution_options(include_deleted=True)
+        )
+        return {str(row.id): [row.department, row.batch, row.year, row.section]
+                for row in (await db.execute(query)).all()}
+
+    return await cache.get_or_load("hierarchy:snapshot", load, tags=["hierarchy"], ttl=3600)
+
+
+async def archive_attendance_summary(db: AsyncSession, start_date: date, end_date: date, group_by: str):
+    if group_by not in GROUP_LEVELS:
+        raise HTTPException(status_code=400, detail=f"Invalid group_by. Allowed: {GROUP_LEVELS}")
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date.")
+
+    started = time.perf_counter()
+    hierarchy = await get_hierarchy_snapshot(db)
+    rows, groups = await cpu_executor.run(
+        summarize_archive, settings.attendance_archive_dir, start_date, end_date, hierarchy, group_by)
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "group_by": group_by,
+        "rows": rows,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        "groups": groups,
+    }
+
+
+async def sql_attendance_summary(db: AsyncSession, start_date: date, end_date: date, group_by: str):
+    """
+    The same aggregate computed by Postgres over the live attendance table.
+    """
+    levels = [Department.name, Batch.name, Year.name, Section.name][:GROUP_LEVELS.index(group_by) + 1]
+    is_present = func.lower(Attendance.status) == "present"
+    query = (
+        select(*levels, func.sum(case((is_present, 1), else_=0)), func.count(Attendance.id))
+        .join(Student, Attendance.student_id == Student.id)
+        .join(Section, Student.section_id == Section.id)
+        .join(Year, Section.year_id == Year.id)
+        .join(Batch, Year.batch_id == Batch.id)
+        .join(Department, Batch.department_id == Department.id)
+        .where(Attendance.date.between(start_date, end_date), Attendance.deleted_at.is_(None))
+        .group_by(*levels)
+        .order_by(*levels)
+        # Like the archive: history of since-deleted students and sections still counts
+        .execution_options(include_deleted=True)
+    )
+    return [
+        {**dict(zip(GROUP_LEVELS, row[:len(levels)])), "present": int(row[-2] or 0), "total": int(row[-1]),
+         "percent": round(100 * (row[-2] or 0) / row[-1], 2) if row[-1] else None}
+        for row in (await db.execute(query)).all()
+    ]
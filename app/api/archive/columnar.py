@@ -0,0 +1,100 @@
+import os
+from datetime import date
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+'''
+=====================================================
+# Description:
+    - Columnar work on the Parquet archive, run in the process pool
+      (app/core/executor.py: cpu_executor.run) so file IO and aggregation
+      never block the event loop
+    - Keep this module light (pyarrow and numpy only): the pool's processes
+      import it. The archive directory is passed in, not read from settings
+=====================================================
+'''
+
+GROUP_LEVELS = ("department", "batch", "year", "section")
+
+
+def add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def month_file(directory, month_start: date) -> str:
+    return os.path.join(directory, "attendance", f"attendance_{month_start:%Y_%m}.parquet")
+
+
+def archived_files(directory, start_date: date, end_date: date):
+    month = date(start_date.year, start_date.month, 1)
+    while month <= end_date:
+        path = month_file(directory, month)
+        if os.path.exists(path):
+            yield path
+        month = add_months(month, 1)
+
+
+def load_archive(directory, start_date: date, end_date: date) -> pa.Table:
+    tables = [
+        pq.read_table(path, columns=["section_id", "date", "status", "deleted"], memory_map=True)
+        for path in archived_files(directory, start_date, end_date)
+    ]
+    if not tables:
+        return None
+    table = pa.concat_tables(tables)
+    mask = pc.and_(
+        pc.and_(pc.greater_equal(table["date"], pa.scalar(start_date)),
+                pc.less_equal(table["date"], pa.scalar(end_date))),
+        pc.invert(table["deleted"]),
+    )
+    return table.filter(mask)
+
+
+def summarize(table: pa.Table, hierarchy: dict, group_by: str):
+    """
+    Attendance percentage per group, fully vectorized over the rows.
+    """
+    depth = GROUP_LEVELS.index(group_by) + 1
+    if table is None or table.num_rows == 0:
+        return []
+
+    present = pc.equal(table["status"], "present").to_numpy(zero_copy_only=False)
+    sections = pc.dictionary_encode(table["section_id"]).combine_chunks()
+    section_index = sections.indices.to_numpy(zero_copy_only=False)
+
+    # 🔹 Only the (small) dictionary of distinct sections is touched in Python
+    unknown = ["Unknown"] * len(GROUP_LEVELS)
+    group_ids = {}
+    group_of_section = np.array(
+        [group_ids.setdefault(tuple(hierarchy.get(section_id, unknown)[:depth]), len(group_ids))
+         for section_id in sections.dictionary.to_pylist()],
+        dtype=np.int64,
+    )
+    groups = list(group_ids)
+    row_group = group_of_section[section_index]
+
+    totals = np.bincount(row_group, minlength=len(groups))
+    presents = np.bincount(row_group, weights=present, minlength=len(groups))
+
+    return [
+        {
+            **dict(zip(GROUP_LEVELS[:depth], group)),
+            "present": int(presents[i]),
+            "total": int(totals[i]),
+            "percent": round(float(100 * presents[i] / totals[i]), 2) if totals[i] else None,
+        }
+        for i, group in sorted(enumerate(groups), key=lambda item: item[1])
+    ]
+
+
+def summarize_archive(directory, start_date: date, end_date: date, hierarchy: dict, group_by: str):
+    """
+    Load and aggregate in one pool task (only the small result crosses back);
+    returns (rows read, groups).
+    """
+    table = load_archive(directory, start_date, end_date)
+    return (table.num_rows if table is not None else 0), summarize(table, hierarchy, group_by)
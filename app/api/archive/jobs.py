@@ -0,0 +1,32 @@
+import asyncio
+
+from app.api.archive.services import ArchiveService, ensure_partitions
+from app.api.reports.jobs import _seconds_until
+from app.core.database import async_master_session
+from app.core.settings import settings
+from app.core.sharding import shards
+from logs.logging import logger
+
+
+async def run_partition_maintenance():
+    """
+    Create upcoming monthly partitions (on every shard), then archive and
+    detach closed months.
+    """
+    for engine in shards.engines.values():
+        async with engine.begin() as conn:
+            await ensure_partitions(conn)
+    async with async_master_session() as db:
+        return await ArchiveService(db).archive_closed_months()
+
+
+async def partition_scheduler():
+    """
+    Run partition maintenance once a night, alongside the at-risk job.
+    """
+    while True:
+        await asyncio.sleep(_seconds_until(settings.at_risk_job_hour))
+        try:
+            await run_partition_maintenance()
+        except Exception as e:
+            logger.exception(f"Attendance partition maintenance failed: {e}")
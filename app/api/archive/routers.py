@@ -0,0 +1,44 @@
+from datetime import date
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.api.archive.analytics import archive_attendance_summary
+from app.api.archive.services import ArchiveService
+from app.api.jobs.schemas import JobCreated
+from app.api.jobs.services import JobService
+from app.core.database import get_session
+from app.utils.security import get_current_user
+
+router = APIRouter(tags=["Archive"], prefix="/archive")
+
+
+def _ensure_admin(user):
+    if not user or user.role.name != "admin":
+        raise HTTPException(status_code=403, detail="Access Denied: Only admins can manage the attendance archive.")
+
+
+@router.get("/attendance")
+async def list_attendance_archives(db = Depends(get_session), user = Depends(get_current_user)):
+    _ensure_admin(user)
+    return ArchiveService(db).list_archives()
+
+
+@router.post("/attendance/run", response_model=JobCreated, status_code=202)
+async def run_attendance_archive(db = Depends(get_session), user = Depends(get_current_user)):
+    _ensure_admin(user)
+    # 🔹 Exports can take minutes: run as a background job, poll GET /jobs/{job_id}
+    return await JobService(db).enqueue("archive_attendance", {}, user)
+
+
+@router.get("/analytics/attendance")
+async def archived_attendance_analytics(
+    start_date: date,
+    end_date: date,
+    group_by: Literal["department", "batch", "year", "section"] = "department",
+    db = Depends(get_session),
+    user = Depends(get_current_user),
+):
+    _ensure_admin(user)
+    # Reads the Parquet archive only; Postgres is used for the cached hierarchy snapshot at most
+    return await archive_attendance_summary(db, start_date, end_date, group_by)
@@ -0,0 +1,196 @@
+import os
+import tempfile
+from datetime import date
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.future import select
+
+from app.api.archive.columnar import add_months, month_file
+from app.api.attendance.models import Attendance, Student
+from app.core.settings import settings
+from logs.logging import logger
+
+'''
+=====================================================
+# Description:
+    - `attendance` is range-partitioned by month (attendance_pYYYYMM) with a
+      default partition catching anything outside the managed range
+    - Months older than `attendance_archive_after_months` are exported to
+      zstd-compressed Parquet under `attendance_archive_dir`, then detached
+      (and dropped) so live queries only touch recent partitions
+    - Every uvicorn worker runs the nightly job: partition creation and each
+      month's export -> detach -> drop hold a Postgres advisory lock, so only
+      one process does a given piece of work and the others skip it
+=====================================================
+'''
+
+ARCHIVE_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("student_id", pa.string()),
+    ("section_id", pa.string()),
+    ("date", pa.date32()),
+    ("status", pa.string()),
+    ("deleted", pa.bool_()),
+])
+EXPORT_BATCH_SIZE = 50_000
+# Advisory lock namespace (pg_advisory_xact_lock(namespace, key)); keys are 0 or the month as YYYYMM
+PARTITION_LOCK = 7_340_034
+
+
+def partition_name(month_start: date) -> str:
+    return f"attendance_p{month_start:%Y%m}"
+
+
+def archive_dir() -> str:
+    return os.path.join(settings.attendance_archive_dir, "attendance")
+
+
+def archive_path(month_start: date) -> str:
+    return month_file(settings.attendance_archive_dir, month_start)
+
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    result = await conn.execute(text("SELECT relkind FROM pg_class WHERE relname = 'attendance'"))
+    return result.scalar() == "p"
+
+
+async def list_partitions(conn: AsyncConnection):
+    """
+    Monthly partitions currently attached to attendance, oldest first.
+    """
+    result = await conn.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = 'attendance' AND child.relname LIKE 'attendance\\_p%' "
+        "ORDER BY child.relname"
+    ))
+    return [date(int(name[-6:-2]), int(name[-2:]), 1) for name in result.scalars().all()]
+
+
+async def ensure_partitions(conn: AsyncConnection, today: date = None):
+    """
+    Create the monthly partitions from the current month up to
+    `attendance_partition_months_ahead` months ahead, plus the default partition.
+    """
+    if not await is_partitioned(conn):
+        logger.warning("attendance is not a partitioned table; skipping partition maintenance")
+        return []
+
+    today = today or date.today()
+    # 🔹 Workers starting together would race on CREATE TABLE; the lock ends with the transaction
+    await conn.execute(text(f"SELECT pg_advisory_xact_lock({PARTITION_LOCK}, 0)"))
+    await conn.execute(text("CREATE TABLE IF NOT EXISTS attendance_default PARTITION OF attendance DEFAULT"))
+
+    existing = set(await list_partitions(conn))
+    created = []
+    for offset in range(settings.attendance_partition_months_ahead + 1):
+        start = add_months(today, offset)
+        if start in existing:
+            continue
+        await conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(start)} PARTITION OF attendance "
+            f"FOR VALUES FROM ('{start}') TO ('{add_months(start, 1)}')"
+        ))
+        created.append(start)
+    if created:
+        logger.info(f"[*] Created attendance partitions: {', '.join(partition_name(m) for m in created)}")
+    return created
+
+
+class ArchiveService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def export_month(self, month_start: date) -> int:
+        """
+        Stream one month of attendance into a Parquet file; returns the row count.
+        """
+        os.makedirs(archive_dir(), exist_ok=True)
+        path = archive_path(month_start)
+        descriptor, tmp_path = tempfile.mkstemp(dir=archive_dir(), prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+        os.close(descriptor)
+
+        query = (
+            select(Attendance.id, Attendance.student_id, Student.section_id, Attendance.date,
+                   Attendance.status, Attendance.deleted_at)
+            .join(Student, Attendance.student_id == Student.id)
+            .where(Attendance.date >= month_start, Attendance.date < add_months(month_start, 1))
+            .execution_options(include_deleted=True, yield_per=EXPORT_BATCH_SIZE)
+        )
+
+        rows = 0
+        try:
+            with pq.ParquetWriter(tmp_path, ARCHIVE_SCHEMA, compression="zstd") as writer:
+                result = await self.db.stream(query)
+                async for batch in result.partitions(EXPORT_BATCH_SIZE):
+                    writer.write_table(pa.table({
+                        "id": [str(row.id) for row in batch],
+                        "student_id": [str(row.student_id) for row in batch],
+                        "section_id": [str(row.section_id) for row in batch],
+                        "date": [row.date for row in batch],
+                        "status": [(row.status or "").lower() for row in batch],
+                        "deleted": [row.deleted_at is not None for row in batch],
+                    }, schema=ARCHIVE_SCHEMA))
+                    rows += len(batch)
+            if pq.ParquetFile(tmp_path).metadata.num_rows != rows:
+                raise RuntimeError(f"Archive of {partition_name(month_start)} is incomplete; partition kept")
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+        # 🔹 Publish atomically so readers never see a half-written file
+        os.replace(tmp_path, path)
+        return rows
+
+    async def archive_closed_months(self, today: date = None):
+        """
+        Export and detach every monthly partition older than the archive cut-off.
+        """
+        conn = await self.db.connection()
+        if not await is_partitioned(conn):
+            return []
+
+        cutoff = add_months(today or date.today(), -settings.attendance_archive_after_months)
+        months = [month_start for month_start in await list_partitions(conn) if month_start < cutoff]
+        await self.db.commit()
+        archived = []
+        for month_start in months:
+            # 🔹 One process per month: the lock is held until this month's commit (or rollback)
+            locked = (await self.db.execute(
+                text(f"SELECT pg_try_advisory_xact_lock({PARTITION_LOCK}, {month_start:%Y%m})")
+            )).scalar()
+            if not locked or month_start not in await list_partitions(await self.db.connection()):
+                # Another worker is archiving this month, or already has
+                await self.db.rollback()
+                continue
+            rows = await self.export_month(month_start)
+
+            name = partition_name(month_start)
+            await self.db.execute(text(f"ALTER TABLE attendance DETACH PARTITION {name}"))
+            if settings.attendance_archive_drop_detached:
+                await self.db.execute(text(f"DROP TABLE {name}"))
+            await self.db.commit()
+            archived.append({"partition": name, "rows": rows, "file": archive_path(month_start)})
+            logger.info(f"[*] Archived {name}: {rows} rows -> {archive_path(month_start)}")
+        return archived
+
+    def list_archives(self):
+        if not os.path.isdir(archive_dir()):
+            return []
+        archives = []
+        for name in sorted(os.listdir(archive_dir())):
+            if not name.endswith(".parquet"):
+                continue
+            path = os.path.join(archive_dir(), name)
+            archives.append({
+                "file": name,
+                "rows": pq.ParquetFile(path).metadata.num_rows,
+                "bytes": os.path.getsize(path),
+            })
+        return archives
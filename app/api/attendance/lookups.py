@@ -0,0 +1,86 @@
+import hashlib
+from functools import lru_cache
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.api.attendance.models import Batch, Section, Year
+from app.core.cache import cache
+from app.core.prepared import SECTION_ROSTER
+
+'''
+=====================================================
+# Description:
+    - Cached lookups shared by every worker through the tiered cache
+    - Cache tags:
+        * roster:<id>      students of a section (and its rendered sheet fragment)
+        * section:<id>     reports derived from a section's attendance
+        * batch:<id>       reports scoped to a batch
+        * department:<id>  reports scoped to a department
+        * hierarchy        section -> year -> batch -> department mapping
+=====================================================
+'''
+
+
+async def get_section_hierarchy(db: AsyncSession, section_id):
+    """
+    Resolve a section's year, batch and department ids (cached).
+    """
+    if not section_id:
+        return None
+
+    async def load():
+        query = (
+            select(Section.id, Section.name, Section.year_id, Year.batch_id, Batch.department_id)
+            .join(Year, Section.year_id == Year.id)
+            .join(Batch, Year.batch_id == Batch.id)
+            .where(Section.id == section_id)
+        )
+        row = (await db.execute(query)).first()
+        return dict(row._mapping) if row else None
+
+    return await cache.get_or_load(f"hierarchy:section:{section_id}", load, tags=["hierarchy"])
+
+
+async def get_section_roster(db: AsyncSession, section_id):
+    """
+    Students of a section as plain dicts (cached until the section changes).
+    """
+    async def load():
+        return [dict(row._mapping) for row in (await db.execute(SECTION_ROSTER, {"section_id": section_id})).all()]
+
+    return await cache.get_or_load(f"roster:{section_id}", load, tags=[f"roster:{section_id}"])
+
+
+@lru_cache
+def _template_digest(filename):
+    with open(filename, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()[:12]
+
+
+async def get_roster_fragment(db: AsyncSession, section_id, template):
+    """
+    A section's roster rendered with `template` (cached HTML, dropped with the
+    roster; the template's digest is part of the key so a changed template
+    never serves old markup).
+    """
+    digest = _template_digest(template.filename)
+
+    async def load():
+        return template.render(students=await get_section_roster(db, section_id))
+
+    return await cache.get_or_load(f"fragment:roster:{section_id}:{digest}", load, tags=[f"roster:{section_id}"])
+
+
+async def invalidate_section(db: AsyncSession, section_id, roster_changed: bool = False):
+    """
+    Invalidate every report whose scope contains the section, and its roster
+    when students were added, renamed or removed.
+    """
+    tags = [f"section:{section_id}"]
+    if roster_changed:
+        tags.append(f"roster:{section_id}")
+    hierarchy = await get_section_hierarchy(db, section_id)
+    if hierarchy:
+        tags += [f"batch:{hierarchy['batch_id']}", f"department:{hierarchy['department_id']}"]
+    await cache.invalidate(*tags)
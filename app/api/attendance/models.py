@@ -1,14 +1,18 @@
 from datetime import datetime
 import uuid
+from typing import Optional
 from sqlalchemy import Column, Date, DateTime, String, ForeignKey, UUID
 from sqlalchemy.orm import relationship, Mapped, mapped_column
-from app.core.database import Base
+from app.core.database import Base, live_index, trigram_index
 
 # Department Model
 class Department(Base):
     __tablename__ = 'departments'
+    __table_args__ = (
+        live_index('uq_departments_name', 'name', unique=True),
+    )
 
-    name: Mapped[str] = mapped_column(String, unique=True, nullable=False, index=True)
+    name: Mapped[str] = mapped_column(String, nullable=False)
 
     batches = relationship("Batch", back_populates="department")
 
@@ -16,8 +20,12 @@ class Department(Base):
 # Batch Model
 class Batch(Base):
     __tablename__ = 'batches'
-    
-    name: Mapped[str] = mapped_column(String, unique=True, nullable=False, index=True)
+    __table_args__ = (
+        live_index('uq_batches_name', 'name', unique=True),
+        live_index('ix_batches_department_id', 'department_id'),
+    )
+
+    name: Mapped[str] = mapped_column(String, nullable=False)
     department_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey('departments.id'), nullable=False)
 
     department = relationship("Department", back_populates="batches")
@@ -27,7 +35,10 @@ class Batch(Base):
 # Year Model
 class Year(Base):
     __tablename__ = 'years'
-    
+    __table_args__ = (
+        live_index('ix_years_batch_id', 'batch_id'),
+    )
+
     name: Mapped[str] = mapped_column(String, nullable=False)
     batch_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey('batches.id'), nullable=False)
 
@@ -38,7 +49,10 @@ class Year(Base):
 # Section Model
 class Section(Base):
     __tablename__ = 'sections'
-    
+    __table_args__ = (
+        live_index('ix_sections_year_id', 'year_id'),
+    )
+
     name: Mapped[str] = mapped_column(String, nullable=False)
     year_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey('years.id'), nullable=False)
 
@@ -50,8 +64,18 @@ class Section(Base):
 # Student Model
 class Student(Base):
     __tablename__ = 'students'
-    
-    name: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    __table_args__ = (
+        # Roster lookups
+        live_index('ix_students_section_id', 'section_id'),
+        live_index('uq_students_register_number', 'register_number', unique=True),
+        # Fuzzy search (prefix, substring and typo-tolerant matching)
+        trigram_index('ix_students_name_trgm', 'name'),
+        trigram_index('ix_students_register_number_trgm', 'register_number'),
+    )
+
+    name: Mapped[str] = mapped_column(String, nullable=False)
+    register_number: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    guardian_email: Mapped[Optional[str]] = mapped_column(String, nullable=True)  # Absence notifications
     section_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey('sections.id'), nullable=False)
 
     section = relationship("Section", back_populates="students")
@@ -61,9 +85,18 @@ class Student(Base):
 # Attendance Model
 class Attendance(Base):
     __tablename__ = 'attendance'
-    
+    __table_args__ = (
+        # One live record per student per day; also the conflict target for batched upserts.
+        # Covers `status` too, so a student's history is an index-only scan
+        live_index('uq_attendance_student_date', 'student_id', 'date', unique=True, postgresql_include=['status']),
+        live_index('ix_attendance_date', 'date'),
+        # Monthly range partitions, created and archived by app/api/archive/services.py
+        {'postgresql_partition_by': 'RANGE (date)'},
+    )
+
     student_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey('students.id'), nullable=False)
-    date: Mapped[Date] = mapped_column(Date, default=datetime.utcnow().date, index=True)
+    # Part of the primary key: a partitioned table's keys must include the partition column
+    date: Mapped[Date] = mapped_column(Date, primary_key=True, default=lambda: datetime.utcnow().date())
     status: Mapped[str] = mapped_column(String, default="Absent")  # "Present" or "Absent"
 
     student = relationship("Student", back_populates="attendances")
@@ -1,21 +1,28 @@
 import io
-from datetime import datetime
-from typing import List
+from datetime import date, datetime
+from typing import List, Optional
 from uuid import UUID
 
-import pandas as pd
-from fastapi import (APIRouter, Depends, File, Form, HTTPException, 
-                     UploadFile)
+from fastapi import (APIRouter, Depends, File, Form, HTTPException, Query,
+                     Request, UploadFile)
+from fastapi.responses import HTMLResponse, RedirectResponse
+from markupsafe import Markup
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from app.api.attendance.schemas import ( BatchCreate,
+from app.api.attendance.schemas import ( AttendanceCorrection, AttendanceSync, BatchCreate,
                                         DepartmentCreate, SectionCreate,
-                                        StudentCreate, StudentResponse, StudentUUIDs,
+                                        StudentAttendanceHistory, StudentCreate,
+                                        StudentResponse, StudentSearchResult,
+                                        StudentUUIDs,
                                          YearCreate)
-from app.api.attendance.services import AttendanceService
+from app.api.attendance.lookups import get_roster_fragment, get_section_hierarchy
+from app.api.attendance.services import AttendanceService, load_students
 from app.core.database import get_session
-from app.utils.security import get_current_user
+from app.core.settings import settings
+from app.core.sharding import DEFAULT_SHARD, get_shard_session, shards
+from app.utils.streaming import csv_response
+from app.utils.security import get_current_user, get_page_user
 from main import templates
 
 router = APIRouter()
@@ -24,7 +31,7 @@ router = APIRouter()
 @router.post("/upload_students/")
 async def upload_students(
     file: UploadFile = File(...),
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_shard_session),
     user = Depends(get_current_user),  # Get user from JWT token
 ):
     print("User: ", user.role.name)
@@ -43,25 +50,85 @@ async def upload_students(
 
 @router.get("/students", response_model=List[StudentResponse])
 async def fetch_students(
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_shard_session),
     user = Depends(get_current_user),
 ):
     students = await AttendanceService(db).get_students_by_section(user)
     return students
 
+@router.get("/students/search", response_model=List[StudentSearchResult])
+async def search_students(
+    q: str,
+    section_id: Optional[UUID] = None,
+    department_id: Optional[UUID] = None,
+    limit: int = Query(20, ge=1, le=50),
+    user = Depends(get_current_user),
+):
+    if not user or user.role.name not in ("faculty", "admin"):
+        raise HTTPException(status_code=403, detail="Access Denied: Only faculty and admins can search students.")
+
+    # 🔹 Search on the shard that holds the scope; unscoped admin searches fan out
+    if user.role.name != "admin":
+        shard = await shards.for_section(user.section_id)
+    elif section_id:
+        shard = await shards.for_section(section_id)
+    elif department_id:
+        shard = shards.for_department(department_id)
+    else:
+        results = await shards.fan_out(
+            lambda shard, db: AttendanceService(db).search_students(q, user, section_id, department_id, limit))
+        merged = sorted((row for rows in results.values() for row in rows), key=lambda row: (-row["score"], row["name"]))
+        return merged[:limit]
+
+    async with shards.session(shard) as db:
+        return await AttendanceService(db).search_students(q, user, section_id, department_id, limit)
+
 @router.get("/students/{student_id}",response_model=StudentResponse)
 async def fetch_student(
     student_id: UUID,
-    db: AsyncSession = Depends(get_session),
     user = Depends(get_current_user),
 ):
-    student = await AttendanceService(db).get_student(student_id)
+    # 🔹 Concurrent lookups on the same shard are coalesced into one IN query
+    student, = await load_students([student_id], user)
+    if not student:
+        raise HTTPException(status_code=404, detail="Student not found.")
     return student
 
+@router.post("/students/batch", response_model=List[StudentResponse])
+async def fetch_students_by_ids(
+    student_uuids: StudentUUIDs,
+    user = Depends(get_current_user),
+):
+    if len(student_uuids.student_uuids) > settings.loader_max_batch:
+        raise HTTPException(status_code=400, detail=f"At most {settings.loader_max_batch} students per request.")
+
+    # 🔹 Found students in request order; unknown ids are skipped
+    students = await load_students(student_uuids.student_uuids, user)
+    return [student for student in students if student]
+
+@router.get("/students/{student_id}/attendance", response_model=StudentAttendanceHistory)
+async def fetch_student_attendance(
+    student_id: UUID,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    cursor: Optional[date] = None,  # `next_cursor` from the previous page
+    limit: int = Query(100, ge=1, le=500),
+    user = Depends(get_current_user),
+):
+    if not user or user.role.name not in ("faculty", "admin"):
+        raise HTTPException(status_code=403, detail="Access Denied: Only faculty and admins can view attendance history.")
+
+    # 🔹 Read on the student's own shard (an admin's may differ from their default)
+    student, = await load_students([student_id], user)
+    if not student:
+        raise HTTPException(status_code=404, detail="Student not found.")
+    async with shards.section_session(student.section_id) as db:
+        return await AttendanceService(db).student_attendance_history(student_id, user, start, end, cursor, limit)
+
 @router.post("/students/")
 async def create_student(
     student_data: StudentCreate,
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_shard_session),
     user = Depends(get_current_user),
 ):
     
@@ -78,7 +145,7 @@ async def create_student(
 async def update_student(
     student_id: UUID,
     student_data: StudentCreate,
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_shard_session),
     user = Depends(get_current_user),
 ):
     if not user or user.role.name != "faculty" :
@@ -93,7 +160,7 @@ async def update_student(
 @router.delete("/students/{student_id}")
 async def delete_student(
     student_id: UUID,
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_shard_session),
     user = Depends(get_current_user),
 ):
     if not user or user.role.name != "faculty" :
@@ -103,13 +170,13 @@ async def delete_student(
     if not user.section_id:
         raise HTTPException(status_code=400, detail="Error: You are not assigned to any section.")
 
-    return await AttendanceService(db).delete_student(student_id)
+    return await AttendanceService(db).delete_student(student_id, user.id)
 
 
 @router.post("/mark_attendance/")
 async def mark_attendance(
     student_uuids: StudentUUIDs,  # List of student UUIDs to mark attendance for
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_shard_session),
     user = Depends(get_current_user),  # Get the current logged-in user
 ):
     # Ensure the user has the correct role (faculty)
@@ -123,9 +190,110 @@ async def mark_attendance(
     # Call the service to mark attendance for the specified students
     return await AttendanceService(db).mark_attendance(student_uuids, user.section_id)
 
+async def render_attendance_sheet(request: Request, db: AsyncSession, user, marked=None, error=None, status_code=200):
+    """
+    The marking page: the cached roster fragment inside a page rendered per request.
+    """
+    hierarchy = await get_section_hierarchy(db, user.section_id)
+    async with shards.section_session(user.section_id) as shard_db:
+        roster = await get_roster_fragment(shard_db, user.section_id, templates.get_template("attendance_roster.html"))
+    return templates.TemplateResponse(request, "attendance.html", {
+        "section": hierarchy["name"] if hierarchy else "", "today": datetime.utcnow().date(),
+        "roster": Markup(roster), "action": request.url_for("submit_attendance_sheet"),
+        "marked": marked, "error": error,
+    }, status_code=status_code, headers={"Cache-Control": "no-store"})
+
+@router.get("/attendance/sheet", response_class=HTMLResponse)
+async def attendance_sheet(
+    request: Request,
+    marked: Optional[int] = None,
+    db: AsyncSession = Depends(get_session),
+    user = Depends(get_page_user),
+):
+    if not user or user.role.name != "faculty":
+        raise HTTPException(status_code=403, detail="Access Denied: Only faculty can mark attendance.")
+
+    if not user.section_id:
+        raise HTTPException(status_code=400, detail="Error: You are not assigned to any section.")
+
+    return await render_attendance_sheet(request, db, user, marked=marked)
+
+@router.post("/attendance/sheet", response_class=HTMLResponse)
+async def submit_attendance_sheet(
+    request: Request,
+    present: List[UUID] = Form([]),  # Ticked students; everyone else in the section is absent
+    db: AsyncSession = Depends(get_session),
+    user = Depends(get_page_user),
+):
+    if not user or user.role.name != "faculty":
+        raise HTTPException(status_code=403, detail="Access Denied: Only faculty can mark attendance.")
+
+    if not user.section_id:
+        raise HTTPException(status_code=400, detail="Error: You are not assigned to any section.")
+
+    try:
+        async with shards.section_session(user.section_id) as shard_db:
+            result = await AttendanceService(shard_db).mark_attendance(present, user.section_id)
+    except HTTPException as e:
+        # 🔹 Show the reason on the page (e.g. already marked today) instead of a JSON error
+        return await render_attendance_sheet(request, db, user, error=e.detail, status_code=e.status_code)
+
+    # 🔹 Post/Redirect/Get: a refresh shows the confirmation instead of resubmitting
+    return RedirectResponse(f"{request.url_for('attendance_sheet')}?marked={result['total']}", status_code=303)
+
+@router.post("/sync_attendance/")
+async def sync_attendance(
+    sync_data: AttendanceSync,
+    user = Depends(get_current_user),
+):
+    # Ensure the user has the correct role (faculty or admin)
+    if not user or user.role.name not in ("faculty", "admin"):
+        raise HTTPException(status_code=403, detail="Access Denied: Only faculty can sync attendance.")
+
+    # 🔹 Entry positions per shard (sections from several departments may span shards)
+    entries = sync_data.entries
+    indexes = {}
+    for i, entry in enumerate(entries):
+        indexes.setdefault(await shards.for_section(entry.section_id), []).append(i)
+
+    # Apply every offline entry in one round trip per shard
+    if len(indexes) <= 1:
+        async with shards.session(next(iter(indexes), DEFAULT_SHARD)) as db:
+            return await AttendanceService(db).sync_attendance(entries, user)
+
+    results = await shards.fan_out(
+        lambda shard, db: AttendanceService(db).sync_attendance([entries[i] for i in indexes[shard]], user),
+        shards=indexes,
+    )
+    outcomes = []
+    for shard, result in results.items():
+        for outcome in result["entries"]:
+            outcomes.append({**outcome, "index": indexes[shard][outcome["index"]]})
+    outcomes.sort(key=lambda outcome: outcome["index"])
+    counts = {status: sum(result[status] for result in results.values())
+              for status in ("applied", "rejected", "superseded")}
+    return {"message": "Attendance synced", **counts, "entries": outcomes}
+
+@router.patch("/correct_attendance/")
+async def correct_attendance(
+    correction: AttendanceCorrection,
+    user = Depends(get_current_user),
+):
+    # Ensure the user has the correct role (faculty or admin)
+    if not user or user.role.name not in ("faculty", "admin"):
+        raise HTTPException(status_code=403, detail="Access Denied: Only faculty can correct attendance.")
+
+    # Faculty correct their own section; admins name the section
+    section_id = correction.section_id if user.role.name == "admin" and correction.section_id else user.section_id
+    if not section_id:
+        raise HTTPException(status_code=400, detail="Error: You are not assigned to any section.")
+
+    async with shards.section_session(section_id) as db:
+        return await AttendanceService(db).correct_attendance(section_id, correction.date, correction.changes, user)
+
 @router.get("/download_attendance/")
 async def download_attendance(
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_shard_session),
     user = Depends(get_current_user),
 ):
     # Ensure the user has the correct role (faculty)
@@ -139,12 +307,9 @@ async def download_attendance(
     # Call the service to download attendance data
     attendance_data = await AttendanceService(db).download_attendance(user.section_id)
 
-    # Convert the data to a CSV file
-    df = pd.DataFrame(attendance_data)
-    csv = df.to_csv(index=False)
-
-    # Return the CSV file as a downloadable file
-    return csv
+    # Stream the records as a CSV download
+    rows = ((record.student_id, record.date, record.status) for record in attendance_data)
+    return csv_response(f"attendance_{datetime.utcnow().date()}.csv", ["student_id", "date", "status"], rows)
 '''
 =======================================================
 Batch , Year, Section, Student, Attendance
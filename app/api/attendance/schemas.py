@@ -1,8 +1,8 @@
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Literal, Optional
 from uuid import UUID
 from fastapi import File, UploadFile
-from pydantic import BaseModel
+from pydantic import BaseModel, EmailStr, Field
 
 
 class UploadFileSchema(BaseModel):
@@ -56,6 +56,8 @@ class SectionCreate(BaseModel):
 
 class StudentCreate(BaseModel):
     name: str
+    register_number: Optional[str] = None
+    guardian_email: Optional[EmailStr] = None
 
     class Config:
         from_attributes = True
@@ -64,11 +66,67 @@ class StudentCreate(BaseModel):
 class StudentResponse(BaseModel):
     id: UUID
     name: str
+    register_number: Optional[str] = None
     section_id: UUID
 
 
+class StudentSearchResult(StudentResponse):
+    score: float
+
+
+class AttendanceRecord(BaseModel):
+    date: date
+    status: str
+
+
+class MonthlyAttendance(BaseModel):
+    month: str  # "YYYY-MM"
+    present: int
+    absent: int
+    total: int
+    percentage: float
+
+
+class StudentAttendanceHistory(BaseModel):
+    student_id: UUID
+    name: str
+    records: List[AttendanceRecord]
+    next_cursor: Optional[date] = None  # Pass back as `cursor` for the next (older) page
+    summary: List[MonthlyAttendance]  # The whole date range, not just this page
+
+
 class StudentUUIDs(BaseModel):
     student_uuids: list[UUID]
 
     class Config:
         from_attributes = True
+
+
+class AttendanceSyncEntry(BaseModel):
+    section_id: UUID
+    date: date
+    present: list[UUID] = []
+
+    class Config:
+        from_attributes = True
+
+
+class AttendanceSync(BaseModel):
+    entries: list[AttendanceSyncEntry] = Field(..., min_length=1, max_length=500)
+
+    class Config:
+        from_attributes = True
+
+
+class AttendanceCorrectionChange(BaseModel):
+    student_id: UUID
+    status: Literal["present", "absent"]
+
+
+class AttendanceCorrection(BaseModel):
+    section_id: Optional[UUID] = None  # Admins only; faculty always correct their own section
+    date: date
+    changes: list[AttendanceCorrectionChange] = Field(..., min_length=1, max_length=500)  # Only the students that change
+
+    class Config:
+        from_attributes = True
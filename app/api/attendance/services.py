@@ -1,16 +1,71 @@
-from datetime import datetime
-import io
+import asyncio
+from datetime import date, datetime
+from difflib import SequenceMatcher
 from typing import List
-from uuid import UUID
+from uuid import UUID, uuid4
 from fastapi import HTTPException
-import pandas as pd
+from sqlalchemy import case, extract, func, insert, or_, text, update
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.attendance.schemas import StudentUUIDs
 from app.api.auth.models import User
-from main import templates
 
 from app.api.attendance.models import Attendance, Department, Student, Section, Year, Batch
+from app.api.attendance.lookups import get_section_hierarchy, get_section_roster, invalidate_section
+from app.api.attendance.spreadsheets import REQUIRED_STUDENT_COLUMNS, build_attendance_sheet, read_student_sheet
+from app.api.dashboard.services import dashboard_hub
+from app.api.exports.services import bump_export_versions
+from app.api.audit.services import record_change
+from app.api.notifications.services import cancel_absence_notifications, enqueue_absence_notifications
+from app.core.cache import cache
+from app.core.database import current_actor, inserted_flag, ist_now, soft_delete, upsert
+from app.core.executor import cpu_executor
+from app.core.loader import BatchLoader
+from app.core.prepared import SECTION_MARKED_ON, insert_attendance
+from app.core.settings import settings
+from app.core.sharding import shards
+
+IMPORT_CHUNK_SIZE = 500
+SYNC_CHUNK_SIZE = 2000
+
+
+def _fetch_students(shard):
+    async def fetch(student_ids):
+        async with shards.session(shard) as db:
+            students = (await db.execute(select(Student).where(Student.id.in_(student_ids)))).scalars().all()
+        return {student.id: student for student in students}
+    return fetch
+
+
+# 🔹 One coalescing loader per shard (student rows live on their department's shard)
+student_loaders = {}
+
+
+def student_loader(shard) -> BatchLoader:
+    if shard not in student_loaders:
+        student_loaders[shard] = BatchLoader(_fetch_students(shard))
+    return student_loaders[shard]
+
+
+async def load_students(student_ids, user) -> list:
+    """
+    Students by id, in request order (None for unknown ids). Admins are looked
+    up on every shard; faculty only see their own section (403 otherwise).
+    """
+    if user.role.name == "admin":
+        candidate_shards = shards.names
+    elif user.section_id:
+        candidate_shards = [await shards.for_section(user.section_id)]
+    else:
+        raise HTTPException(status_code=403, detail="Access Denied: No section assigned.")
+
+    # 🔹 A student lives on exactly one shard: take whichever shard found it
+    found = await asyncio.gather(*(student_loader(shard).load_many(student_ids) for shard in candidate_shards))
+    students = [next((student for student in candidates if student), None) for candidates in zip(*found)]
+
+    if user.role.name != "admin" and any(student and student.section_id != user.section_id for student in students):
+        raise HTTPException(status_code=403, detail="Access Denied: Student is not in your section.")
+    return students
 
 
 class AttendanceService:
@@ -20,12 +75,18 @@ class AttendanceService:
     async def upload_file(self, file, section_id):
         # Read the Excel file
         contents = await file.read()
-        excel_data = io.BytesIO(contents)  # ✅ Wrap in BytesIO
-        df = pd.read_excel(excel_data, engine="openpyxl")  # ✅ Corrected
+        return await self.import_students(contents, section_id)
+
+    async def import_students(self, contents, section_id, progress=None):
+        """
+        Import students from Excel bytes into a section, in chunks.
+        `progress` is an optional async callback (percent, message) used by background jobs.
+        """
+        # 🔹 Parse the workbook in the CPU pool (column lists come back), keeping the event loop free
+        columns = await cpu_executor.run(read_student_sheet, contents)
         # 🔹 Ensure required columns exist
-        required_columns = {"name", "register_number"}
-        if not required_columns.issubset(df.columns):
-            raise HTTPException(status_code=400, detail=f"Invalid file format. Required columns: {required_columns}")
+        if columns is None:
+            raise HTTPException(status_code=400, detail=f"Invalid file format. Required columns: {REQUIRED_STUDENT_COLUMNS}")
         # 🔹 Validate if section exists
         query = select(Section).where(Section.id == section_id)
         result = await self.db.execute(query)
@@ -33,17 +94,22 @@ class AttendanceService:
         if not section:
             raise HTTPException(status_code=404, detail="Section not found.")
         # 🔹 Insert students into the database
-        students = []
-        for _, row in df.iterrows():
-            student = Student(
-                name=row["name"],
-                section_id=section_id
-            )
-            self.db.add(student)
-            students.append(student)
+        rows = [{"id": uuid4(), "name": name, "register_number": register_number,
+                 "guardian_email": guardian_email, "section_id": section_id}
+                for name, register_number, guardian_email in zip(
+                    columns["name"], columns["register_number"], columns["guardian_email"])]
+        for start in range(0, len(rows), IMPORT_CHUNK_SIZE):
+            await self.db.execute(insert(Student), rows[start:start + IMPORT_CHUNK_SIZE])
+            for row in rows[start:start + IMPORT_CHUNK_SIZE]:
+                record_change(self.db, "students", row["id"], "insert",
+                              {key: (None, value) for key, value in row.items() if key != "id"})
+            if progress:
+                done = min(start + IMPORT_CHUNK_SIZE, len(rows))
+                await progress(int(done * 100 / len(rows)), f"Imported {done} of {len(rows)} students")
 
         await self.db.commit()
-        return {"message": "Students uploaded successfully", "total": len(students)}
+        await invalidate_section(self.db, section_id, roster_changed=True)
+        return {"message": "Students uploaded successfully", "total": len(rows)}
 
     async def get_students_by_section(self, user):
         """
@@ -54,13 +120,8 @@ class AttendanceService:
         if not user.section_id:
             raise HTTPException(status_code=403, detail="Access Denied: No section assigned.")
             
-            # 🔹 Fetch students in the faculty's section
-        query = select(Student).where(Student.section_id == user.section_id)
-
-        result = await self.db.execute(query)
-        students = result.scalars().all()
-
-        return students
+            # 🔹 Fetch students in the faculty's section (cached per section)
+        return await get_section_roster(self.db, user.section_id)
     
     async def get_student(self, student_id):
         """
@@ -73,10 +134,61 @@ class AttendanceService:
             raise HTTPException(status_code=404, detail="Student not found.")
         return student
     
+    async def student_attendance_history(self, student_id, user, start: date = None, end: date = None,
+                                         cursor: date = None, limit: int = 100):
+        """
+        One student's attendance, newest first, keyset-paginated on (student_id, date),
+        with a per-month summary of the whole range.
+        """
+        student = await self.get_student(student_id)
+        if user.role.name != "admin" and student.section_id != user.section_id:
+            raise HTTPException(status_code=403, detail="Access Denied: Student is not in your section.")
+
+        in_range = [Attendance.student_id == student_id]
+        if start:
+            in_range.append(Attendance.date >= start)
+        if end:
+            in_range.append(Attendance.date <= end)
+
+        # 🔹 Only indexed columns are read, so Postgres answers from the covering index alone
+        page = [Attendance.date < cursor] if cursor else []
+        rows = (await self.db.execute(
+            select(Attendance.date, Attendance.status)
+            .where(*in_range, *page)
+            .order_by(Attendance.date.desc())
+            .limit(limit + 1)
+        )).all()
+        next_cursor = rows[limit - 1].date if len(rows) > limit else None
+
+        # 🔹 Monthly counts for the whole range in the same call (same index)
+        year, month = extract("year", Attendance.date), extract("month", Attendance.date)
+        counts = (await self.db.execute(
+            select(year, month, Attendance.status, func.count())
+            .where(*in_range)
+            .group_by(year, month, Attendance.status)
+        )).all()
+        months = {}
+        for year_value, month_value, status, count in counts:
+            totals = months.setdefault(f"{int(year_value):04d}-{int(month_value):02d}", {"present": 0, "absent": 0})
+            totals["present" if status.lower() == "present" else "absent"] += count
+        summary = [
+            {"month": key, **totals, "total": totals["present"] + totals["absent"],
+             "percentage": round(totals["present"] * 100 / (totals["present"] + totals["absent"]), 2)}
+            for key, totals in sorted(months.items(), reverse=True)
+        ]
+
+        return {
+            "student_id": student.id, "name": student.name,
+            "records": [{"date": row.date, "status": row.status} for row in rows[:limit]],
+            "next_cursor": next_cursor, "summary": summary,
+        }
+
     async def create_student(self, student_data,section_id):
-        new_student = Student(name=student_data.name, section_id=section_id)
+        new_student = Student(name=student_data.name, register_number=student_data.register_number,
+                              guardian_email=student_data.guardian_email, section_id=section_id)
         self.db.add(new_student)
         await self.db.commit()
+        await invalidate_section(self.db, section_id, roster_changed=True)
         return new_student
 
     async def update_student(self, student_data, student_id):
@@ -94,13 +206,20 @@ class AttendanceService:
 
         if student_data.name is not None:
             update_fields["name"] = student_data.name
+        if student_data.register_number is not None:
+            update_fields["register_number"] = student_data.register_number
+        if student_data.guardian_email is not None:
+            update_fields["guardian_email"] = student_data.guardian_email
 
         # Only proceed if there are fields to update
         if update_fields:
             await self.db.execute(
                 Student.__table__.update().where(Student.id == student_id).values(update_fields)
             )
+            record_change(self.db, "students", student_id, "update",
+                          {key: (getattr(student, key), value) for key, value in update_fields.items()})
             await self.db.commit()
+            await invalidate_section(self.db, student.section_id, roster_changed=True)
             return {"message": "Student record updated successfully"}
 
         raise HTTPException(
@@ -108,7 +227,96 @@ class AttendanceService:
             status_code=400
         )
 
-    async def delete_student(self, student_id):
+    async def search_students(self, q, user, section_id=None, department_id=None, limit=None):
+        """
+        Ranked fuzzy search on name and register number.
+        Exact/prefix register number matches rank first, then name prefix, then
+        substring, then typo-tolerant (trigram) matches by similarity.
+        """
+        q = q.strip()
+        if len(q) < 2:
+            raise HTTPException(status_code=400, detail="Search text must be at least 2 characters.")
+
+        # 🔹 Faculty only search their own section; admins pick a section or department
+        if user.role.name != "admin":
+            if not user.section_id:
+                raise HTTPException(status_code=403, detail="Access Denied: No section assigned.")
+            section_id, department_id = user.section_id, None
+
+        scope = select(Student.id, Student.name, Student.register_number, Student.section_id)
+        if section_id:
+            scope = scope.where(Student.section_id == section_id)
+        elif department_id:
+            scope = (
+                scope.join(Section, Student.section_id == Section.id)
+                .join(Year, Section.year_id == Year.id)
+                .join(Batch, Year.batch_id == Batch.id)
+                .where(Batch.department_id == department_id)
+            )
+        limit = min(limit or settings.student_search_limit, 50)
+        if self.db.bind.dialect.name != "postgresql":
+            return await self._search_students_in_memory(q, scope, limit)
+
+        pattern = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        similarity = func.greatest(
+            func.word_similarity(q, Student.name),
+            func.coalesce(func.similarity(Student.register_number, q), 0),
+        )
+        rank = case(
+            (func.lower(Student.register_number) == q.lower(), 0),
+            (Student.register_number.ilike(f"{pattern}%"), 1),
+            (Student.name.ilike(f"{pattern}%"), 2),
+            (Student.name.ilike(f"%{pattern}%"), 3),
+            else_=4,
+        )
+        query = (
+            scope.add_columns(similarity.label("score"))
+            .where(or_(
+                Student.name.ilike(f"%{pattern}%"),
+                Student.register_number.ilike(f"{pattern}%"),
+                Student.name.op("%>")(q),
+                Student.register_number.op("%")(q),
+            ))
+            .order_by(rank, similarity.desc(), Student.name)
+            .limit(limit)
+        )
+
+        # 🔹 Loosen pg_trgm's word-similarity cut-off for this transaction only
+        await self.db.execute(
+            text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+            {"threshold": str(settings.student_search_threshold)},
+        )
+        return [
+            {**row._mapping, "score": round(float(row.score or 0), 3)}
+            for row in (await self.db.execute(query)).all()
+        ]
+
+    async def _search_students_in_memory(self, q, scope, limit):
+        """
+        Same ranking for the embedded SQLite mode (no pg_trgm): the scope is
+        small on a single campus, so typo tolerance is computed with difflib.
+        """
+        needle = q.lower()
+        matches = []
+        for row in (await self.db.execute(scope)).all():
+            name, register_number = row.name.lower(), (row.register_number or "").lower()
+            if register_number and register_number == needle:
+                rank = 0
+            elif register_number.startswith(needle):
+                rank = 1
+            elif name.startswith(needle):
+                rank = 2
+            elif needle in name:
+                rank = 3
+            else:
+                rank = 4
+            score = max(SequenceMatcher(None, needle, word).ratio()
+                        for word in name.split() + [register_number, name])
+            if rank < 4 or score >= settings.student_search_fuzzy_ratio:
+                matches.append((rank, -score, row.name, {**row._mapping, "score": round(score, 3)}))
+        return [match[-1] for match in sorted(matches, key=lambda match: match[:3])[:limit]]
+
+    async def delete_student(self, student_id, deleted_by=None):
         result = await self.db.execute(select(Student).where(Student.id == student_id))
         student = result.scalars().first()
         if not student:
@@ -116,8 +324,10 @@ class AttendanceService:
                 detail="Student Not Found",
                 status_code=404
             )
-        await self.db.delete(student)
+        # 🔹 Soft delete keeps the student's attendance history intact
+        soft_delete(student, deleted_by)
         await self.db.commit()
+        await invalidate_section(self.db, student.section_id, roster_changed=True)
         return {"message": "Student record deleted successfully"}
     
     async def mark_attendance(self, student_uuids, section_id):
@@ -135,57 +345,224 @@ class AttendanceService:
             student_uuids = student_uuids.student_uuids  # Access the list attribute directly
 
         # 🔹 Check if student_uuids are already UUID objects, if not, convert them
-        if isinstance(student_uuids[0], str):  # Check if the list contains strings
+        if student_uuids and isinstance(student_uuids[0], str):  # Check if the list contains strings (an empty list means everyone is absent)
             student_uuids = [UUID(uuid) for uuid in student_uuids]
         
-        # 🔹 Fetch students in the faculty's section and filter by section_id
-        query = select(Student).where(Student.section_id == section_id)
-        result = await self.db.execute(query)
-        students = result.scalars().all()
+        # 🔹 Fetch students in the faculty's section (cached per section)
+        roster = await get_section_roster(self.db, section_id)
+        student_ids = [UUID(student["id"]) for student in roster]
 
-        if not students:
+        if not student_ids:
             raise HTTPException(status_code=404, detail="No students found in the section.")
 
         # 🔹 Get today's date (in UTC) to check against existing attendance
         today_date = datetime.utcnow().date()
-        print(today_date)
-
-        # 🔹 Check if attendance has already been marked for any student in the section today
-        attendance_check_query = select(Attendance).where(
-            Attendance.date == today_date,
-            Attendance.student_id.in_([student.id for student in students])
-        )
-        attendance_check_result = await self.db.execute(attendance_check_query)
-        existing_attendance_records = attendance_check_result.scalars().all()
 
-        if existing_attendance_records:
-            raise HTTPException(status_code=400, detail="Attendance has already been marked for today.")
+        # 🔹 Check if attendance has already been marked for the section today (one indexed probe)
+        already_marked = await self.db.execute(SECTION_MARKED_ON, {"section_id": section_id, "day": today_date})
+        if already_marked.first():
+            raise HTTPException(status_code=400, detail="Attendance has already been marked for today; use PATCH /correct_attendance/ to change individual students.")
 
-        # 🔹 Create attendance records
-        attendance_records = []
-        # Set of student UUIDs passed by the frontend
+        # 🔹 If student UUID is in the list, mark as present, else absent
         student_uuid_set = set(student_uuids)
+        statuses = {student_id: "present" if student_id in student_uuid_set else "absent" for student_id in student_ids}
+
+        # 🔹 One prepared insert for the whole section (marking time is kept in created_at)
+        inserted = await insert_attendance(self.db, today_date, statuses)
+        for row_id, student_id in inserted.items():
+            record_change(self.db, "attendance", row_id, "insert",
+                          {"student_id": (None, student_id), "date": (None, today_date), "status": (None, statuses[student_id])})
+
+        # 🔹 Absence notifications go to the outbox in the same transaction (sent later)
+        absent = [student_id for student_id, status in statuses.items() if status == "absent"]
+        await enqueue_absence_notifications(self.db, section_id, today_date, absent)
+        await bump_export_versions(self.db, [(section_id, today_date)])
+        await self.db.commit()
+        await invalidate_section(self.db, section_id)
 
-        for student in students:
-            # 🔹 If student UUID is in the list, mark as present, else absent
-            status = "present" if student.id in student_uuid_set else "absent"
-            
-            # 🔹 Create a new attendance record
-            attendance = Attendance(
-                student_id=student.id,
-                date=datetime.utcnow(),  # Store the exact time of marking
-                status=status
+        # 🔹 Push the section's counts to live dashboards
+        department_id, section_name = await dashboard_hub.section_department(self.db, section_id)
+        dashboard_hub.publish(section_id, department_id, section_name, len(statuses) - len(absent), len(absent))
+
+        # 🔹 Return a response indicating how many attendance records were added
+        return {"message": "Attendance marked successfully", "total": len(statuses)}
+
+
+    async def sync_attendance(self, entries, user):
+        """
+        Apply many offline (section, date, present-set) entries in one round trip.
+        Rosters are validated with one set-based query and all accepted entries are
+        written as one bulk upsert. Returns an outcome per entry.
+        """
+        today = datetime.utcnow().date()
+        outcomes = [{"index": i, "section_id": entry.section_id, "date": entry.date} for i, entry in enumerate(entries)]
+
+        # 🔹 Latest entry wins when the same section/day is sent twice
+        latest = {}
+        for i, entry in enumerate(entries):
+            if user.role.name != "admin" and entry.section_id != user.section_id:
+                outcomes[i].update(status="rejected", detail="Access Denied: Not your section.")
+            elif entry.date > today:
+                outcomes[i].update(status="rejected", detail="Cannot mark attendance for a future date.")
+            else:
+                previous = latest.get((entry.section_id, entry.date))
+                if previous is not None:
+                    outcomes[previous].update(status="superseded", detail="A later entry for the same day replaced this one.")
+                latest[(entry.section_id, entry.date)] = i
+
+        # 🔹 One roster query for every section in the payload
+        section_ids = {section_id for section_id, _ in latest}
+        rosters = {section_id: set() for section_id in section_ids}
+        if section_ids:
+            result = await self.db.execute(
+                select(Student.id, Student.section_id).where(Student.section_id.in_(section_ids))
             )
-            self.db.add(attendance)
-            attendance_records.append(attendance)
+            for student_id, section_id in result.all():
+                rosters[section_id].add(student_id)
+
+        rows = []
+        for (section_id, day), i in latest.items():
+            roster = rosters[section_id]
+            present = set(entries[i].present)
+            unknown = present - roster
+            if not roster:
+                outcomes[i].update(status="rejected", detail="No students found in the section.")
+            elif unknown:
+                outcomes[i].update(status="rejected", detail="Students not in this section.",
+                                   unknown_students=sorted(str(student_id) for student_id in unknown))
+            else:
+                outcomes[i].update(status="applied", present=len(present), absent=len(roster - present),
+                                   created=0, updated=0, unchanged=len(roster))
+                rows += [{"student_id": student_id, "date": day,
+                          "status": "present" if student_id in present else "absent"}
+                         for student_id in roster]
+
+        # 🔹 Bulk upsert; rows whose status did not change are left untouched
+        student_sections = {student_id: section_id for section_id, roster in rosters.items() for student_id in roster}
+        flipped = {}   # (section_id, day, new status) -> students whose row was written
+        for start in range(0, len(rows), SYNC_CHUNK_SIZE):
+            chunk = rows[start:start + SYNC_CHUNK_SIZE]
+            # 🔹 Current statuses first (locked until commit), so the audit log has the old values
+            previous = dict(((student_id, day), status) for student_id, day, status in (await self.db.execute(
+                select(Attendance.student_id, Attendance.date, Attendance.status)
+                .where(Attendance.student_id.in_({row["student_id"] for row in chunk}),
+                       Attendance.date.in_({row["date"] for row in chunk}))
+                .with_for_update()
+            )).all())
+            statement = upsert(Attendance, self.db).values(chunk)
+            statement = statement.on_conflict_do_update(
+                index_elements=[Attendance.student_id, Attendance.date],
+                index_where=Attendance.deleted_at.is_(None),
+                set_={"status": statement.excluded.status,
+                      "updated_at": ist_now(),
+                      "updated_by": current_actor.get()},
+                where=Attendance.status != statement.excluded.status,
+            ).returning(Attendance.id, Attendance.student_id, Attendance.date, Attendance.status,
+                        inserted_flag(Attendance, self.db))
+            for row_id, student_id, day, status, inserted in (await self.db.execute(statement)).all():
+                outcome = outcomes[latest[(student_sections[student_id], day)]]
+                outcome["created" if inserted else "updated"] += 1
+                outcome["unchanged"] -= 1
+                if inserted:
+                    record_change(self.db, "attendance", row_id, "insert",
+                                  {"student_id": (None, student_id), "date": (None, day), "status": (None, status)})
+                else:
+                    record_change(self.db, "attendance", row_id, "update",
+                                  {"status": (previous.get((student_id, day)), status)})
+                # Only rows the upsert wrote: unchanged students keep their notifications
+                flipped.setdefault((student_sections[student_id], day, status), []).append(student_id)
+
+        # 🔹 Outbox, as for marking and corrections: cancel notices of students now present,
+        #    notify today's new absences (same transaction as the attendance)
+        for (section_id, day, status), student_ids in flipped.items():
+            if status == "present":
+                await cancel_absence_notifications(self.db, day, student_ids)
+            elif day == today:
+                await enqueue_absence_notifications(self.db, section_id, day, student_ids)
+        # 🔹 Past days edited offline invalidate cached exports of their months
+        await bump_export_versions(self.db, [key for key, i in latest.items() if outcomes[i]["status"] == "applied"])
+        await self.db.commit()
 
-        # 🔹 Commit attendance records only if they were added
-        if attendance_records:
-            await self.db.commit()
+        for section_id in {section_id for (section_id, _), i in latest.items() if outcomes[i]["status"] == "applied"}:
+            await invalidate_section(self.db, section_id)
+            today_entry = latest.get((section_id, today))
+            if today_entry is not None and outcomes[today_entry]["status"] == "applied":
+                department_id, section_name = await dashboard_hub.section_department(self.db, section_id)
+                dashboard_hub.publish(section_id, department_id, section_name,
+                                      outcomes[today_entry]["present"], outcomes[today_entry]["absent"])
 
-        # 🔹 Return a response indicating how many attendance records were added
-        return {"message": "Attendance marked successfully", "total": len(attendance_records)}
+        counts = {status: sum(1 for outcome in outcomes if outcome["status"] == status)
+                  for status in ("applied", "rejected", "superseded")}
+        return {"message": "Attendance synced", **counts, "entries": outcomes}
+
+    async def correct_attendance(self, section_id, day, changes, user):
+        """
+        Apply corrections to an already marked day: only the listed students, one
+        set-based UPDATE, and each derived view adjusted by the delta.
+        """
+        today = datetime.utcnow().date()
+        if user.role.name != "admin" and section_id != user.section_id:
+            raise HTTPException(status_code=403, detail="Access Denied: Not your section.")
+        if day > today:
+            raise HTTPException(status_code=400, detail="Cannot mark attendance for a future date.")
+
+        # 🔹 Last change per student wins; every student must be in the section
+        wanted = {change.student_id: change.status for change in changes}
+        roster = {UUID(student["id"]) for student in await get_section_roster(self.db, section_id)}
+        strangers = [str(student_id) for student_id in wanted if student_id not in roster]
+        if strangers:
+            raise HTTPException(status_code=400, detail=f"Students not in this section: {', '.join(strangers)}")
+
+        # 🔹 Rows locked until commit: a concurrent correction waits, so the old values stay true
+        current = (await self.db.execute(
+            select(Attendance.id, Attendance.student_id, Attendance.status)
+            .where(Attendance.student_id.in_(list(wanted)), Attendance.date == day)
+            .with_for_update()
+        )).all()
+        if len(current) < len(wanted):
+            await self.db.rollback()
+            raise HTTPException(status_code=404, detail=f"Attendance for {day} has not been marked for every listed student.")
+
+        # 🔹 Only rows whose status actually changes are written
+        changed = {row.id: (row.student_id, (row.status or "").lower(), wanted[row.student_id])
+                   for row in current if (row.status or "").lower() != wanted[row.student_id]}
+        if changed:
+            new_status = case({row_id: new for row_id, (_, _, new) in changed.items()}, value=Attendance.id)
+            updated = (await self.db.execute(
+                update(Attendance)
+                .where(Attendance.id.in_(list(changed)), Attendance.date == day,
+                       func.coalesce(func.lower(Attendance.status), "") != new_status)
+                .values(status=new_status)
+                .returning(Attendance.id)
+                .execution_options(synchronize_session=False)
+            )).scalars().all()
+            # Audit, outbox and dashboard delta follow the rows the UPDATE actually changed
+            changed = {row_id: changed[row_id] for row_id in updated}
+        if not changed:
+            await self.db.rollback()
+            return {"message": "Nothing to correct", "changed": 0, "unchanged": len(wanted)}
+
+        for row_id, (student_id, old, new) in changed.items():
+            record_change(self.db, "attendance", row_id, "update", {"status": (old, new)})
+
+        # 🔹 Outbox: cancel pending notices for students now present, notify today's new absences
+        now_present = [student_id for student_id, _, new in changed.values() if new == "present"]
+        now_absent = [student_id for student_id, _, new in changed.values() if new == "absent"]
+        await cancel_absence_notifications(self.db, day, now_present)
+        if day == today:
+            await enqueue_absence_notifications(self.db, section_id, day, now_absent)
+        # 🔹 Only this month's cached exports of the section go stale
+        await bump_export_versions(self.db, [(section_id, day)])
+        await self.db.commit()
+        await invalidate_section(self.db, section_id)
+
+        # 🔹 Live dashboard counts shift by the delta instead of being recounted
+        if day == today:
+            department_id, section_name = await dashboard_hub.section_department(self.db, section_id)
+            dashboard_hub.apply_delta(section_id, department_id, section_name, len(now_present) - len(now_absent))
 
+        return {"message": "Attendance corrected", "changed": len(changed), "unchanged": len(wanted) - len(changed),
+                "present": len(now_present), "absent": len(now_absent)}
 
     async def download_attendance(self, section_id):
         """
@@ -195,12 +572,10 @@ class AttendanceService:
         if not section_id:
             raise HTTPException(status_code=403, detail="Access Denied: No section assigned.")
         
-        # 🔹 Fetch students in the faculty's section
-        query = select(Student).where(Student.section_id == section_id)
-        result = await self.db.execute(query)
-        students = result.scalars().all()
+        # 🔹 Fetch students in the faculty's section (cached per section)
+        roster = await get_section_roster(self.db, section_id)
 
-        if not students:
+        if not roster:
             raise HTTPException(status_code=404, detail="No students found in the section.")
 
         # 🔹 Get today's date (in UTC) to check against existing attendance
@@ -209,18 +584,49 @@ class AttendanceService:
         # 🔹 Fetch attendance records for the students in the section
         attendance_query = select(Attendance).where(
             Attendance.date == today_date,
-            Attendance.student_id.in_([student.id for student in students])
+            Attendance.student_id.in_([UUID(student["id"]) for student in roster])
         )
         attendance_result = await self.db.execute(attendance_query)
         attendance_records = attendance_result.scalars().all()
 
         return attendance_records
 
+    async def export_attendance(self, section_id, start_date, end_date, progress=None):
+        """
+        Build a student x day attendance sheet (CSV bytes) for a date range.
+        """
+        if not section_id:
+            raise HTTPException(status_code=403, detail="Access Denied: No section assigned.")
+        if start_date > end_date:
+            raise HTTPException(status_code=400, detail="start_date must be on or before end_date.")
+
+        roster = await get_section_roster(self.db, section_id)
+        if not roster:
+            raise HTTPException(status_code=404, detail="No students found in the section.")
+        names = {UUID(student["id"]): student["name"] for student in roster}
+
+        attendance_query = select(Attendance.student_id, Attendance.date, Attendance.status).where(
+            Attendance.student_id.in_(list(names)),
+            Attendance.date.between(start_date, end_date),
+        )
+        records = (await self.db.execute(attendance_query)).all()
+        if progress:
+            await progress(50, f"Fetched {len(records)} attendance records")
+
+        # 🔹 One row per student, one column per day, plus totals: pivoted in the CPU pool from plain columns
+        return await cpu_executor.run(
+            build_attendance_sheet,
+            [str(student_id) for student_id in names], list(names.values()),
+            [str(record.student_id) for record in records], [record.date for record in records],
+            [record.status for record in records],
+        )
+
     async def create_department(self, department_data):
 
         new_department = Department(name=department_data.name)
         self.db.add(new_department)
         await self.db.commit()
+        await cache.invalidate("hierarchy")
         return new_department
 
 
@@ -236,6 +642,8 @@ class AttendanceService:
                         department_id=batch_data.department_id)
         self.db.add(new_batch)
         await self.db.commit()
+        await cache.invalidate("hierarchy")
+        await shards.sync_department(new_batch.department_id)
         return new_batch
 
 
@@ -245,6 +653,12 @@ class AttendanceService:
         new_year = Year(name=year_data.name, batch_id=year_data.batch_id)
         self.db.add(new_year)
         await self.db.commit()
+        await cache.invalidate("hierarchy")
+        if shards.enabled:
+            department_id = (await self.db.execute(
+                select(Batch.department_id).where(Batch.id == new_year.batch_id)
+            )).scalar()
+            await shards.sync_department(department_id)
         return new_year
 
 
@@ -254,4 +668,8 @@ class AttendanceService:
         new_section = Section(name=section_data.name, year_id=section_data.year_id)
         self.db.add(new_section)
         await self.db.commit()
+        await cache.invalidate("hierarchy")
+        if shards.enabled:
+            hierarchy = await get_section_hierarchy(self.db, new_section.id)
+            await shards.sync_department(hierarchy["department_id"])
         return new_section
@@ -0,0 +1,52 @@
+import io
+
+import pandas as pd
+
+'''
+=====================================================
+# Description:
+    - CPU-bound spreadsheet work, run in the process pool
+      (app/core/executor.py: cpu_executor.run)
+    - Keep this module light: the pool's processes import it, so it must not
+      pull in the app (database, models, cache). `app/__init__.py` is empty,
+      so a pool process loads only this module, app.core.executor and settings
+    - Inputs and outputs are plain column lists and bytes
+=====================================================
+'''
+
+REQUIRED_STUDENT_COLUMNS = {"name", "register_number"}
+
+
+def read_student_sheet(contents: bytes):
+    """
+    Parse an uploaded student workbook into column lists
+    (None when a required column is missing).
+    """
+    # Text columns read as text: a numeric register number stays "2022101", not "2022101.0"
+    df = pd.read_excel(io.BytesIO(contents), engine="openpyxl",
+                       dtype={"register_number": str, "guardian_email": str})
+    if not REQUIRED_STUDENT_COLUMNS.issubset(df.columns):
+        return None
+    guardian_emails = df["guardian_email"].fillna("").tolist() if "guardian_email" in df.columns else [""] * len(df)
+    return {
+        "name": df["name"].tolist(),
+        "register_number": [str(value).strip() or None for value in df["register_number"].fillna("").tolist()],
+        "guardian_email": [str(value).strip() or None for value in guardian_emails],
+    }
+
+
+def build_attendance_sheet(roster_ids, roster_names, student_ids, dates, statuses) -> bytes:
+    """
+    Student x day sheet with totals as CSV bytes. `roster_*` are the section's
+    students, the other three are the attendance records as parallel columns.
+    """
+    names = dict(zip(roster_ids, roster_names))
+    df = pd.DataFrame({"student_id": student_ids, "date": dates, "status": statuses})
+    df["present"] = df["status"].str.lower().eq("present")
+    sheet = df.pivot(index="student_id", columns="date", values="status").reindex(roster_ids)
+    totals = df.groupby("student_id")["present"].agg(["sum", "count"]).reindex(roster_ids).fillna(0)
+    sheet.insert(0, "name", [names[student_id] for student_id in sheet.index])
+    sheet["present_days"] = totals["sum"].astype(int)
+    sheet["marked_days"] = totals["count"].astype(int)
+    sheet["attendance_percent"] = (100 * totals["sum"] / totals["count"].where(totals["count"] > 0)).round(2)
+    return sheet.sort_values("name").to_csv(index=False).encode()
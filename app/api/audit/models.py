@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import JSON, DateTime, Index, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+# Audit Log Model (`created_by` is the user who made the change)
+class AuditLog(Base):
+    __tablename__ = 'audit_log'
+    __table_args__ = (
+        # History of one record
+        Index('ix_audit_log_table_row', 'table_name', 'row_id'),
+        Index('ix_audit_log_occurred_at', 'occurred_at'),
+    )
+
+    table_name: Mapped[str] = mapped_column(String, nullable=False)
+    row_id: Mapped[str] = mapped_column(String, nullable=False)
+    action: Mapped[str] = mapped_column(String, nullable=False)  # insert, update, delete, upsert
+    changes: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)  # column -> [old, new]
+    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
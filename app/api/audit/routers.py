@@ -0,0 +1,35 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.api.audit.models import AuditLog
+from app.core.database import get_session
+from app.utils.security import get_current_user
+
+router = APIRouter(tags=["Audit"], prefix="/audit")
+
+
+@router.get("/")
+async def audit_trail(
+    table_name: Optional[str] = None,
+    row_id: Optional[str] = None,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_session),
+    user = Depends(get_current_user),
+):
+    if not user or user.role.name != "admin":
+        raise HTTPException(status_code=403, detail="Access Denied: Only admins can view the audit trail.")
+
+    query = select(AuditLog).order_by(AuditLog.occurred_at.desc()).limit(min(limit, 1000))
+    if table_name:
+        query = query.where(AuditLog.table_name == table_name)
+    if row_id:
+        query = query.where(AuditLog.row_id == row_id)
+    events = (await db.execute(query)).scalars().all()
+    return [
+        {"table_name": e.table_name, "row_id": e.row_id, "action": e.action, "changes": e.changes,
+         "actor_id": e.created_by, "occurred_at": e.occurred_at}
+        for e in events
+    ]
@@ -0,0 +1,190 @@
+import asyncio
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.api.audit.models import AuditLog
+from app.core.database import async_master_session, current_actor, ist_clock, ist_now
+from app.core.settings import settings
+from logs.logging import logger
+
+'''
+=====================================================
+# Description:
+    - Change events (old and new values) for audited tables
+        * ORM writes are captured automatically from the flush
+        * Core bulk statements call `record_change` explicitly
+    - Events are held on the session and handed to `audit_writer` only after
+      commit (rolled back changes are never logged); the writer flushes them
+      with multi-row inserts in the background, off the request path
+=====================================================
+'''
+
+AUDITED_TABLES = {"departments", "batches", "years", "sections", "students", "attendance", "users", "roles"}
+IGNORED_COLUMNS = {"id", "created_at", "updated_at", "created_by", "updated_by"}
+SENSITIVE_COLUMNS = {"password"}
+INSERT_CHUNK_SIZE = 1000
+
+
+def _json_safe(value):
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, ist_now):
+        # Evaluated by the database at flush (soft_delete); logged on the same IST-shifted clock
+        return ist_clock().isoformat()
+    return value
+
+
+def _event(table_name, row_id, action, changes):
+    return {
+        "id": uuid.uuid4(),
+        "table_name": table_name,
+        "row_id": str(row_id),
+        "action": action,
+        "changes": {column: [_json_safe(old), _json_safe(new)] for column, (old, new) in changes.items()} or None,
+        "created_by": current_actor.get(),
+        "occurred_at": datetime.now(timezone.utc),
+    }
+
+
+def _pending(session: Session) -> list:
+    return session.info.setdefault("audit_events", [])
+
+
+def record_change(db: AsyncSession, table_name, row_id, action, changes: dict):
+    """
+    Log a change made with a Core statement; `changes` is column -> (old, new).
+    Written with the session's next commit.
+    """
+    _pending(db.sync_session).append(_event(table_name, row_id, action, changes))
+
+
+def _diff(instance, insert=False):
+    state = inspect(instance)
+    changes = {}
+    for attr in state.mapper.column_attrs:
+        if attr.key in IGNORED_COLUMNS:
+            continue
+        history = state.attrs[attr.key].history
+        if insert:
+            value = getattr(instance, attr.key)
+            if value is not None:
+                changes[attr.key] = (None, value)
+        elif history.has_changes():
+            changes[attr.key] = (history.deleted[0] if history.deleted else None,
+                                 history.added[0] if history.added else None)
+    for column in SENSITIVE_COLUMNS & changes.keys():
+        changes[column] = ("***", "***")
+    return changes
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_updates(session, flush_context, instances):
+    # Before the flush: columns set to SQL expressions (soft_delete's ist_now) are expired by it
+    events = _pending(session)
+    for instance in session.dirty:
+        if instance.__tablename__ in AUDITED_TABLES and session.is_modified(instance, include_collections=False):
+            changes = _diff(instance)
+            action = "delete" if changes.get("deleted_at", (None, None))[1] is not None else "update"
+            if changes:
+                events.append(_event(instance.__tablename__, instance.id, action, changes))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    events = _pending(session)
+    for instance in session.new:
+        if instance.__tablename__ in AUDITED_TABLES:
+            events.append(_event(instance.__tablename__, instance.id, "insert", _diff(instance, insert=True)))
+    for instance in session.deleted:
+        if instance.__tablename__ in AUDITED_TABLES:
+            events.append(_event(instance.__tablename__, instance.id, "hard_delete", {}))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_changes(session):
+    events = session.info.pop("audit_events", None)
+    if events:
+        audit_writer.enqueue(events)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop("audit_events", None)
+
+
+class AuditWriter:
+    def __init__(self, flush_interval: float, max_pending: int):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: list = []
+        self._flush_lock = asyncio.Lock()
+        self._stopping = asyncio.Event()
+        self._task = None
+
+    def enqueue(self, events: list):
+        self._pending.extend(events)
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            logger.error(f"Audit queue full, dropped {overflow} oldest events")
+
+    async def flush(self):
+        """
+        Write every queued event with multi-row inserts.
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, []
+            try:
+                async with async_master_session() as db:
+                    for start in range(0, len(pending), INSERT_CHUNK_SIZE):
+                        await db.execute(insert(AuditLog), pending[start:start + INSERT_CHUNK_SIZE])
+                    await db.commit()
+            except BaseException as e:
+                # Put the batch back so the next tick retries it (cancellation included:
+                # events taken from the queue are never dropped)
+                requeued, self._pending = pending + self._pending, []
+                self.enqueue(requeued)
+                if not isinstance(e, Exception):
+                    raise
+                logger.exception(f"Audit flush failed, {len(pending)} events re-queued: {e}")
+                return 0
+            return len(pending)
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    def start(self):
+        self._stopping.clear()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Stop the flush loop and write whatever is still queued.
+        """
+        if self._task is not None:
+            # 🔹 Not cancelled: a flush in progress finishes (or re-queues) before the loop exits
+            self._stopping.set()
+            await self._task
+            self._task = None
+        flushed = await self.flush()
+        if self._pending:
+            logger.error(f"Shutting down with {len(self._pending)} unwritten audit events")
+        return flushed
+
+
+audit_writer = AuditWriter(settings.audit_flush_interval_ms / 1000, settings.audit_max_pending)
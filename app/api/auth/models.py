@@ -3,7 +3,7 @@ import uuid
 from sqlalchemy import UUID, ForeignKey, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.core.database import Base
+from app.core.database import Base, live_index
 from sqlalchemy import event
 from sqlalchemy.orm import Session
 
@@ -13,9 +13,14 @@ from sqlalchemy.orm import validates
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Usernames of deleted users can be reused
+        live_index("uq_users_username", "username", unique=True),
+    )
 
-    username: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    username: Mapped[str] = mapped_column(String, nullable=False)
     name: Mapped[str] = mapped_column(String, nullable=False)
+    email: Mapped[str | None] = mapped_column(String, nullable=True)  # Absence digests for the section's advisor
     password: Mapped[str] = mapped_column(String, nullable=False)
     role_id: Mapped[uuid.UUID | None] = mapped_column(
         UUID(as_uuid=True), ForeignKey("roles.id"), nullable=False)
@@ -1,11 +1,13 @@
 from typing import List
-from fastapi import APIRouter, Depends
+from uuid import UUID
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.auth.schemas import LoginSchema, RoleResponse, UserCreate, UserResponse, UserUpdate
+from app.api.auth.schemas import LoginSchema, RoleResponse, UserCreate, UserResponse, UserUpdate, UserUUIDs
 from app.api.auth.services import RoleService, UserService
 from app.core.database import get_session
-from app.utils.security import get_current_user
+from app.core.settings import settings
+from app.utils.security import ACCESS_TOKEN_COOKIE, get_current_user
 
 
 router = APIRouter(tags=["Auth"], prefix="/auth")
@@ -29,10 +31,15 @@ async def get_users(db: AsyncSession = Depends(get_session)):
 
 
 @router.get("/users/{user_id}", response_model=UserResponse)
-async def get_user_by_id(user_id: str, db: AsyncSession = Depends(get_session)):
+async def get_user_by_id(user_id: UUID, db: AsyncSession = Depends(get_session)):
     return await UserService(db).get_user(user_id)
 
 
+@router.post("/users/batch", response_model=List[UserResponse])
+async def get_users_by_ids(user_ids: UserUUIDs, db: AsyncSession = Depends(get_session)):
+    return await UserService(db).get_users_by_ids(user_ids.user_uuids)
+
+
 @router.put("/users/{user_id}")
 async def update_user(user_id: str, user_data: UserUpdate, db: AsyncSession = Depends(get_session)):
     return await UserService(db).update_user(user_id, user_data)
@@ -43,5 +50,10 @@ async def delete_user(user_id: str, db: AsyncSession = Depends(get_session)):
 
 
 @router.post("/login")
-async def login(user_data: LoginSchema, db: AsyncSession = Depends(get_session)):
-    return await UserService(db).login_user(user_data)
+async def login(user_data: LoginSchema, response: Response, db: AsyncSession = Depends(get_session)):
+    token = await UserService(db).login_user(user_data)
+    # 🔹 Same token as a cookie, so the server-rendered attendance sheet works without JavaScript
+    response.set_cookie(ACCESS_TOKEN_COOKIE, token["access_token"],
+                        max_age=settings.access_token_expire_minutes * 60, httponly=True, samesite="lax",
+                        secure=settings.environment != "development")
+    return token
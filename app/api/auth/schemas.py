@@ -1,8 +1,8 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, EmailStr, Field
 
 
 class UserCreate(BaseModel):
@@ -11,6 +11,7 @@ class UserCreate(BaseModel):
     password: str
     role_id: UUID
     section_id: UUID
+    email: Optional[EmailStr] = None
 
 
 class UserUpdate(BaseModel):
@@ -19,6 +20,7 @@ class UserUpdate(BaseModel):
     password: Optional[str] = None
     role_id : Optional[UUID] = None
     section_id: Optional[UUID] = None
+    email: Optional[EmailStr] = None
 
 
 class RoleforUser(BaseModel):
@@ -31,8 +33,12 @@ class UserResponse(BaseModel):
     username: str
     role : RoleforUser
     section_id: Optional[UUID] = None
+    email: Optional[str] = None
 
 
+class UserUUIDs(BaseModel):
+    user_uuids: List[UUID] = Field(..., max_length=500)
+
 
 class RoleCreate(BaseModel):
     name: str
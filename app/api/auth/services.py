@@ -5,10 +5,22 @@ from fastapi import HTTPException
 from sqlalchemy import select
 
 from app.api.auth.models import Role, User
+from app.core.database import async_master_session, soft_delete
+from app.core.loader import BatchLoader
 from app.utils.password_utils import get_password_hash,verify_password
 from app.utils.security import create_access_token
 
 
+async def _fetch_users(user_ids):
+    async with async_master_session() as db:
+        users = (await db.execute(select(User).where(User.id.in_(user_ids)))).scalars().all()
+    return {user.id: user for user in users}
+
+
+# 🔹 Concurrent GET /auth/users/{id} calls share one IN query
+user_loader = BatchLoader(_fetch_users)
+
+
 class RoleService:
     def __init__(self, db):
         self.db = db
@@ -35,7 +47,8 @@ class UserService:
                         name=user_data.name,
                         password=get_password_hash(user_data.password),
                         role_id=user_data.role_id,
-                        section_id=user_data.section_id)
+                        section_id=user_data.section_id,
+                        email=user_data.email)
         self.db.add(new_user)
         await self.db.commit()
         await self.db.refresh(new_user)
@@ -47,10 +60,20 @@ class UserService:
         return users
 
     async def get_user(self, user_id):
-        result = await self.db.execute(select(User).where(User.id == user_id))
-        user = result.scalars().first()
+        user = await user_loader.load(user_id)
+        if not user:
+            raise HTTPException(
+                detail={"message": "User Not Found"},
+                status_code=404
+            )
         return user
 
+    async def get_users_by_ids(self, user_ids):
+        """
+        Users for an id list, in request order; unknown ids are skipped.
+        """
+        return [user for user in await user_loader.load_many(user_ids) if user]
+
     async def update_user(self, user_id, user_data):
 
         # Fetch the user from the database
@@ -76,6 +99,8 @@ class UserService:
 
         if user_data.section_id is not None:
             update_fields["section_id"] = user_data.section_id
+        if user_data.email is not None:
+            update_fields["email"] = user_data.email
 
         # Only proceed if there are fields to update
         if update_fields:
@@ -98,14 +123,14 @@ class UserService:
                 detail={"message": "User Not Found"},
                 status_code=404
             )
-        await self.db.delete(user)
+        soft_delete(user)
         await self.db.commit()
         return {"message": "User Deleted Successfully"}
 
     async def login_user(self, user_data):
         result = await self.db.execute(select(User).where(User.username == user_data.username))
         user = result.scalars().first()
-        if not verify_password(user_data.password, user.password):
+        if not user or not verify_password(user_data.password, user.password):
             raise HTTPException(
                 detail="Invalid username or password",
                 status_code=401
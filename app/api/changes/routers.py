@@ -0,0 +1,22 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.changes.schemas import ChangesResponse
+from app.api.changes.services import ChangeFeedService
+from app.core.database import get_session
+from app.utils.security import get_current_user
+
+router = APIRouter(tags=["Changes"])
+
+
+@router.get("/changes", response_model=ChangesResponse)
+async def get_changes(
+    since: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=5000),
+    db: AsyncSession = Depends(get_session),
+    user = Depends(get_current_user),
+):
+    # Omit `since` for the initial full sync, then pass back the returned cursor
+    return await ChangeFeedService(db).changes(user, since, limit)
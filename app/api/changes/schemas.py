@@ -0,0 +1,35 @@
+from datetime import date, datetime
+from typing import List
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class ChangedRow(BaseModel):
+    id: UUID
+    updated_at: datetime
+    deleted: bool
+
+
+class StudentChange(ChangedRow):
+    name: str
+    section_id: UUID
+
+
+class SectionChange(ChangedRow):
+    name: str
+    year_id: UUID
+
+
+class AttendanceChange(ChangedRow):
+    student_id: UUID
+    date: date
+    status: str
+
+
+class ChangesResponse(BaseModel):
+    cursor: str
+    has_more: bool
+    students: List[StudentChange]
+    sections: List[SectionChange]
+    attendance: List[AttendanceChange]
@@ -0,0 +1,154 @@
+import base64
+import json
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.api.attendance.models import Attendance, Section, Student
+from app.core.database import ist_clock
+from app.core.settings import settings
+from app.core.sharding import DEFAULT_SHARD, shards
+
+'''
+=====================================================
+# Description:
+    - Delta feed for client-side replicas of students, sections and attendance
+    - The cursor is an opaque token holding the last (updated_at, id) seen per
+      resource; each call returns rows created, updated or tombstoned after it
+    - `updated_at` is the writing transaction's start time, so a long
+      transaction (a chunked import, a large sync) commits rows that are
+      older than rows other clients have already read. The feed therefore
+      only returns rows older than the start of the oldest transaction still
+      in flight on the database (pg_stat_activity): nothing can later
+      commit behind a cursor
+    - Sections are read from the directory; students and attendance from
+      the shard that holds them (faculty: their section's shard, admins:
+      every shard). Each shard has its own horizon and its own cursor
+      positions ("students@north")
+=====================================================
+'''
+
+# 🔹 Start of the oldest open transaction (or ours), on the same IST-shifted clock as updated_at.
+#    Needs the app's own database role (other roles' xact_start reads as NULL)
+IN_FLIGHT_HORIZON = text(
+    "SELECT timezone('Asia/Kolkata', least(now(), min(xact_start)))::timestamptz FROM pg_stat_activity"
+    " WHERE datname = current_database() AND pid <> pg_backend_pid()"
+    " AND backend_type = 'client backend' AND xact_start IS NOT NULL"
+)
+
+RESOURCES = {
+    "students": (Student, (Student.name, Student.section_id)),
+    "sections": (Section, (Section.name, Section.year_id)),
+    "attendance": (Attendance, (Attendance.student_id, Attendance.date, Attendance.status)),
+}
+DIRECTORY_RESOURCES = ["sections"]
+SHARDED_RESOURCES = ["students", "attendance"]
+
+
+def position_key(shard, name):
+    return name if shard == DEFAULT_SHARD else f"{name}@{shard}"
+
+
+def encode_cursor(positions: dict) -> str:
+    raw = json.dumps(positions, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        positions = json.loads(raw)
+        return {key: (datetime.fromisoformat(ts), UUID(row_id)) for key, (ts, row_id) in positions.items()
+                if key.split("@")[0] in RESOURCES}
+    except (ValueError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid change cursor.")
+
+
+class ChangeFeedService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _horizon(self, db: AsyncSession):
+        """
+        Rows updated before this can no longer be joined by a commit behind them.
+        """
+        if db.bind.dialect.name == "postgresql":
+            # Own statement, before the reads: a transaction missing from pg_stat_activity
+            # has already committed, so the later (read committed) snapshots include it
+            return (await db.execute(IN_FLIGHT_HORIZON)).scalar()
+        # Embedded SQLite: one writer at a time, so commit order is timestamp order;
+        # a short lag covers timestamp ties. Computed here: SQLite cannot subtract an interval
+        return ist_clock() - timedelta(seconds=settings.changes_safety_lag_seconds)
+
+    def _scope(self, query, model, user):
+        # Faculty replicate their own section; admins replicate everything
+        if user.role.name == "admin":
+            return query
+        if model is Section:
+            return query.where(Section.id == user.section_id)
+        if model is Student:
+            return query.where(Student.section_id == user.section_id)
+        return query.join(Student, Attendance.student_id == Student.id).where(Student.section_id == user.section_id)
+
+    async def _read(self, db: AsyncSession, shard, names, positions, user, limit):
+        """
+        The next rows of each resource on one database, up to `limit` + 1 each.
+        """
+        horizon = await self._horizon(db)
+        results = {}
+        for name in names:
+            model, columns = RESOURCES[name]
+            query = select(model.id, model.updated_at, model.deleted_at, *columns).where(model.updated_at < horizon)
+            position = positions.get(position_key(shard, name))
+            if position:
+                query = query.where(tuple_(model.updated_at, model.id) > tuple_(*position))
+            query = (
+                self._scope(query, model, user)
+                .order_by(model.updated_at, model.id)
+                .limit(limit + 1)
+                .execution_options(include_deleted=True)  # tombstones are part of the feed
+            )
+            results[name] = (await db.execute(query)).all()
+        return results
+
+    async def changes(self, user, since=None, limit=None):
+        if user.role.name != "admin" and not user.section_id:
+            raise HTTPException(status_code=403, detail="Access Denied: No section assigned.")
+
+        limit = limit or settings.changes_page_size
+        positions = decode_cursor(since) if since else {}
+        data_shards = shards.names if user.role.name == "admin" else [await shards.for_section(user.section_id)]
+
+        # 🔹 The directory (self.db) serves sections, and students/attendance when it is also a data shard
+        results = {DEFAULT_SHARD: await self._read(
+            self.db, DEFAULT_SHARD,
+            DIRECTORY_RESOURCES + (SHARDED_RESOURCES if DEFAULT_SHARD in data_shards else []),
+            positions, user, limit,
+        )}
+        other_shards = [shard for shard in data_shards if shard != DEFAULT_SHARD]
+        if other_shards:
+            results.update(await shards.fan_out(
+                lambda shard, db: self._read(db, shard, SHARDED_RESOURCES, positions, user, limit), other_shards))
+
+        response = {"has_more": False, **{name: [] for name in RESOURCES}}
+        next_positions = {key: [ts.isoformat(), str(row_id)] for key, (ts, row_id) in positions.items()}
+        for shard, shard_rows in results.items():
+            for name, rows in shard_rows.items():
+                if len(rows) > limit:
+                    rows = rows[:limit]
+                    response["has_more"] = True
+                if rows:
+                    next_positions[position_key(shard, name)] = [rows[-1].updated_at.isoformat(), str(rows[-1].id)]
+
+                response[name] += [
+                    {**{key: value for key, value in row._mapping.items() if key != "deleted_at"},
+                     "deleted": row.deleted_at is not None}
+                    for row in rows
+                ]
+
+        response["cursor"] = encode_cursor(next_positions)
+        return response
@@ -0,0 +1,64 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.attendance.lookups import get_section_roster
+from app.api.checkin.schemas import CheckInCode, CheckInRequest, StudentCheckInKey
+from app.api.checkin.services import (checkin_buffer, current_code,
+                                      render_qr, student_key)
+from app.core.sharding import get_shard_session, shards
+from app.utils.security import get_current_user
+
+router = APIRouter(tags=["Check-in"], prefix="/checkin")
+
+
+def _ensure_faculty(user):
+    if not user or user.role.name != "faculty":
+        raise HTTPException(status_code=403, detail="Access Denied: Only faculty can run check-in.")
+
+    if not user.section_id:
+        raise HTTPException(status_code=400, detail="Error: You are not assigned to any section.")
+
+
+@router.get("/code", response_model=CheckInCode)
+async def checkin_code(user = Depends(get_current_user)):
+    _ensure_faculty(user)
+    return current_code(user.section_id)
+
+
+@router.get("/qr")
+async def checkin_qr(user = Depends(get_current_user)):
+    _ensure_faculty(user)
+    return Response(content=render_qr(user.section_id), media_type="image/png",
+                    headers={"Cache-Control": "no-store"})
+
+
+@router.get("/keys", response_model=List[StudentCheckInKey])
+async def checkin_keys(
+    db: AsyncSession = Depends(get_shard_session),
+    user = Depends(get_current_user),
+):
+    _ensure_faculty(user)
+    # 🔹 Handed to each student once (e.g. saved on their phone); only the section code rotates
+    return [{"student_id": student["id"], "name": student["name"], "register_number": student["register_number"],
+             "key": student_key(student["id"])}
+            for student in await get_section_roster(db, user.section_id)]
+
+
+@router.post("/")
+async def check_in(checkin_data: CheckInRequest):
+    # Students have no accounts: the rotating section code proves presence, the personal key identity
+    async with shards.section_session(checkin_data.section_id) as db:
+        return await checkin_buffer.check_in(db, checkin_data.section_id, checkin_data.student_id,
+                                             checkin_data.code, checkin_data.key)
+
+
+@router.post("/close")
+async def close_checkin(
+    db: AsyncSession = Depends(get_shard_session),
+    user = Depends(get_current_user),
+):
+    _ensure_faculty(user)
+    return await checkin_buffer.close_section(db, user.section_id)
@@ -0,0 +1,27 @@
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class CheckInRequest(BaseModel):
+    section_id: UUID
+    student_id: UUID
+    code: str
+    key: str  # The student's personal check-in key (GET /checkin/keys)
+
+    class Config:
+        from_attributes = True
+
+
+class CheckInCode(BaseModel):
+    section_id: UUID
+    code: str
+    expires_in: int
+
+
+class StudentCheckInKey(BaseModel):
+    student_id: UUID
+    name: str
+    register_number: Optional[str] = None
+    key: str
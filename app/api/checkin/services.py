@@ -0,0 +1,248 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import io
+import time
+from datetime import datetime
+from uuid import UUID
+
+import pyotp
+import qrcode
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.api.attendance.lookups import get_section_roster, invalidate_section
+from app.api.exports.services import bump_export_versions
+from app.api.attendance.models import Attendance, Student
+from app.api.audit.services import record_change
+from app.api.dashboard.services import dashboard_hub
+from app.core.cache import cache
+from app.core.database import upsert
+from app.core.settings import settings
+from app.core.sharding import shards
+from logs.logging import logger
+
+'''
+=====================================================
+# Description:
+    - Every section gets its own rotating TOTP, derived from the app secret
+    - Every student has a personal check-in key (also derived from the app
+      secret, handed out by faculty from GET /checkin/keys), so the section
+      code alone cannot check in someone else
+    - Check-ins are validated in memory (code + key + cached roster) and
+      coalesced in a write-behind buffer that is flushed as one batched insert
+    - Closing a section marks everyone else absent and sets a closed flag in
+      the shared cache tier (seen by every worker); later scans are rejected
+      and the flush never overwrites a row that already exists
+=====================================================
+'''
+
+UPSERT_CHUNK_SIZE = 1000
+
+
+def section_totp(section_id) -> pyotp.TOTP:
+    digest = hmac.new(settings.secret_key.encode(), str(section_id).encode(), hashlib.sha256).digest()
+    secret = base64.b32encode(digest).decode()
+    return pyotp.TOTP(secret, interval=settings.checkin_code_interval_seconds)
+
+
+def student_key(student_id) -> str:
+    """
+    A student's personal check-in key (stable; rotate by changing the app secret).
+    """
+    digest = hmac.new(settings.secret_key.encode(), f"checkin:{student_id}".encode(), hashlib.sha256).digest()
+    return base64.b32encode(digest).decode()[:16]
+
+
+def _closed_key(section_id, day):
+    return f"checkin:closed:{section_id}:{day}"
+
+
+def current_code(section_id):
+    totp = section_totp(section_id)
+    expires_in = totp.interval - int(time.time()) % totp.interval
+    return {"section_id": section_id, "code": totp.now(), "expires_in": expires_in}
+
+
+def render_qr(section_id) -> bytes:
+    code = current_code(section_id)["code"]
+    payload = f"{settings.app_url}/checkin/?section_id={section_id}&code={code}"
+    image = qrcode.make(payload)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+async def insert_missing(db: AsyncSession, rows):
+    """
+    Insert attendance rows that do not exist yet (existing rows are left alone)
+    and log an audit insert for each row actually written.
+    """
+    statement = upsert(Attendance, db).values(rows).on_conflict_do_nothing(
+        index_elements=[Attendance.student_id, Attendance.date],
+        index_where=Attendance.deleted_at.is_(None),
+    ).returning(Attendance.id, Attendance.student_id, Attendance.date, Attendance.status)
+    for row_id, student_id, day, status in (await db.execute(statement)).all():
+        record_change(db, "attendance", row_id, "insert",
+                      {"student_id": (None, student_id), "date": (None, day), "status": (None, status)})
+
+
+class CheckInBuffer:
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self._pending: dict = {}        # (student_id, date) -> section_id
+        self._checked_in: dict = {}     # (section_id, date) -> set of student ids
+        self._flush_lock = asyncio.Lock()
+        self._stopping = asyncio.Event()
+        self._task = None
+
+    async def _roster(self, db: AsyncSession, section_id):
+        # 🔹 Shared roster cache: one query per section, however many students scan at once
+        return {student["id"] for student in await get_section_roster(db, section_id)}
+
+    def _roll_day(self, today):
+        for key in [key for key in self._checked_in if key[1] != today]:
+            del self._checked_in[key]
+
+    async def is_closed(self, section_id, day) -> bool:
+        return bool(await cache.get(_closed_key(section_id, day)))
+
+    async def check_in(self, db: AsyncSession, section_id, student_id, code, key):
+        if not section_totp(section_id).verify(code, valid_window=settings.checkin_valid_window):
+            raise HTTPException(status_code=400, detail="Invalid or expired check-in code.")
+        if not hmac.compare_digest(key.upper(), student_key(student_id)):
+            raise HTTPException(status_code=403, detail="Invalid student check-in key.")
+
+        roster = await self._roster(db, section_id)
+        if str(student_id) not in roster:
+            raise HTTPException(status_code=404, detail="Student not found in this section.")
+
+        today = datetime.utcnow().date()
+        if await self.is_closed(section_id, today):
+            raise HTTPException(status_code=409, detail="Check-in for this section is closed for today.")
+
+        self._roll_day(today)
+        checked_in = self._checked_in.setdefault((section_id, today), set())
+        if student_id in checked_in:
+            return {"message": "Already checked in", "status": "duplicate"}
+
+        checked_in.add(student_id)
+        self._pending[(student_id, today)] = section_id
+        return {"message": "Checked in successfully", "status": "accepted"}
+
+    async def flush(self):
+        """
+        Write every pending check-in as one batched insert into attendance.
+        Rows that already exist (closed sections, marked or corrected days) are left alone.
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, {}
+
+            try:
+                # 🔹 One batched upsert per shard
+                by_shard = {}
+                for (student_id, day), section_id in pending.items():
+                    by_shard.setdefault(await shards.for_section(section_id), {})[(student_id, day)] = section_id
+
+                for shard, shard_pending in by_shard.items():
+                    rows = [{"student_id": student_id, "date": day, "status": "present"}
+                            for (student_id, day) in shard_pending]
+                    async with shards.session(shard) as db:
+                        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+                            await insert_missing(db, rows[start:start + UPSERT_CHUNK_SIZE])
+                        await bump_export_versions(db, {(section_id, day) for (_, day), section_id in shard_pending.items()})
+                        await db.commit()
+
+                        today = datetime.utcnow().date()
+                        for section_id, day in {(section_id, day) for (_, day), section_id in shard_pending.items()}:
+                            await invalidate_section(db, section_id)
+                            if day != today:
+                                continue
+                            # 🔹 Counts from the table: other workers' scans and marked days are there too
+                            present, absent = await self._section_counts(db, section_id, day)
+                            department_id, section_name = await dashboard_hub.section_department(db, section_id)
+                            dashboard_hub.publish(section_id, department_id, section_name, present, absent)
+            except BaseException as e:
+                # Put the batch back so the next tick retries it (the insert is idempotent,
+                # so shards that already committed are simply written again); this includes
+                # cancellation, so a batch taken from the buffer is never lost
+                for key, section_id in pending.items():
+                    self._pending.setdefault(key, section_id)
+                if not isinstance(e, Exception):
+                    raise
+                logger.exception(f"Check-in flush failed, {len(pending)} rows re-queued: {e}")
+                return 0
+            return len(pending)
+
+    async def _section_counts(self, db: AsyncSession, section_id, day):
+        is_present = func.lower(Attendance.status) == "present"
+        counts = dict((await db.execute(
+            select(is_present, func.count())
+            .join(Student, Attendance.student_id == Student.id)
+            .where(Student.section_id == section_id, Attendance.date == day)
+            .group_by(is_present)
+        )).all())
+        return counts.get(True, 0), counts.get(False, 0)
+
+    async def close_section(self, db: AsyncSession, section_id):
+        """
+        Close today's check-in: later scans are rejected, outstanding check-ins
+        are flushed and everyone else in the section is marked absent.
+        """
+        today = datetime.utcnow().date()
+        # 🔹 Closed first, in every worker; then give other workers' buffers one flush
+        #    to land, so check-ins they accepted just before are not marked absent
+        await cache.set(_closed_key(section_id, today), True, ttl=2 * 86400)
+        await asyncio.sleep(2 * self.flush_interval)
+        await self.flush()
+
+        # 🔹 Students without a row are absent; rows already written are never touched
+        roster = await self._roster(db, section_id)
+        absent_rows = [{"student_id": UUID(student_id), "date": today, "status": "absent"} for student_id in roster]
+        for start in range(0, len(absent_rows), UPSERT_CHUNK_SIZE):
+            await insert_missing(db, absent_rows[start:start + UPSERT_CHUNK_SIZE])
+        await bump_export_versions(db, [(section_id, today)])
+        await db.commit()
+
+        # 🔹 Counts from the table: other workers' check-ins are there too
+        present, absent = await self._section_counts(db, section_id, today)
+
+        await invalidate_section(db, section_id)
+        department_id, section_name = await dashboard_hub.section_department(db, section_id)
+        dashboard_hub.publish(section_id, department_id, section_name, present, absent)
+        return {"message": "Check-in closed", "present": present, "absent": absent}
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    def start(self):
+        self._stopping.clear()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Stop the flush loop and write whatever is still buffered.
+        """
+        if self._task is not None:
+            # 🔹 Not cancelled: a flush in progress finishes (or re-queues) before the loop exits
+            self._stopping.set()
+            await self._task
+            self._task = None
+        flushed = await self.flush()
+        if self._pending:
+            logger.error(f"Shutting down with {len(self._pending)} unflushed check-ins")
+        return flushed
+
+
+checkin_buffer = CheckInBuffer(flush_interval=settings.checkin_flush_interval_ms / 1000)
@@ -0,0 +1,117 @@
+import asyncio
+from typing import Optional
+from uuid import UUID
+
+from fastapi import (APIRouter, Depends, HTTPException, Request, WebSocket,
+                     WebSocketDisconnect, status)
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.dashboard.services import dashboard_hub
+from app.core.database import async_master_session, get_session
+from app.core.sharding import shards
+from app.utils.security import get_current_user, get_user_from_token
+
+router = APIRouter(tags=["Dashboard"], prefix="/dashboard")
+
+HEARTBEAT_SECONDS = 15
+
+
+async def _resolve_department(db: AsyncSession, user, department_id: Optional[UUID]):
+    """
+    Admins may watch any department (or all of them); faculty only their own.
+    """
+    if user.role.name == "admin":
+        return department_id
+    if user.role.name == "faculty" and user.section_id:
+        own_department, _ = await dashboard_hub.section_department(db, user.section_id)
+        if department_id in (None, own_department):
+            return own_department
+    raise HTTPException(status_code=403, detail="Access Denied: You cannot view this department.")
+
+
+async def _warm(department_id: Optional[UUID]):
+    """
+    Load today's counts from the department's shard; the all-departments view fans out.
+    """
+    if department_id:
+        async with shards.session(shards.for_department(department_id)) as db:
+            await dashboard_hub.warm(db, department_id)
+    else:
+        await shards.fan_out(lambda shard, db: dashboard_hub.warm(db))
+
+
+@router.get("/today")
+async def dashboard_today(
+    department_id: Optional[UUID] = None,
+    db: AsyncSession = Depends(get_session),
+    user = Depends(get_current_user),
+):
+    department_id = await _resolve_department(db, user, department_id)
+    await _warm(department_id)
+    return dashboard_hub.snapshot(department_id)
+
+
+@router.get("/stream")
+async def dashboard_stream(
+    request: Request,
+    department_id: Optional[UUID] = None,
+    db: AsyncSession = Depends(get_session),
+    user = Depends(get_current_user),
+):
+    department_id = await _resolve_department(db, user, department_id)
+    await _warm(department_id)
+    # 🔹 Release the connection; the stream itself never touches the database
+    await db.close()
+
+    async def event_stream():
+        queue = dashboard_hub.subscribe(department_id)
+        try:
+            yield f"data: {dashboard_hub.encode(dashboard_hub.snapshot(department_id))}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {message}\n\n"
+        finally:
+            dashboard_hub.unsubscribe(queue, department_id)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+async def _drain(websocket: WebSocket):
+    # Dashboards never send anything; reading only detects disconnects
+    while True:
+        await websocket.receive_text()
+
+
+@router.websocket("/ws")
+async def dashboard_ws(websocket: WebSocket, token: str, department_id: Optional[UUID] = None):
+    try:
+        async with async_master_session() as db:
+            user = await get_user_from_token(token, db)
+            department_id = await _resolve_department(db, user, department_id)
+        await _warm(department_id)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    queue = dashboard_hub.subscribe(department_id)
+    reader = asyncio.create_task(_drain(websocket))
+    try:
+        await websocket.send_text(dashboard_hub.encode(dashboard_hub.snapshot(department_id)))
+        while not reader.done():
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                continue
+            await websocket.send_text(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        reader.cancel()
+        dashboard_hub.unsubscribe(queue, department_id)
@@ -0,0 +1,222 @@
+import asyncio
+import json
+from collections import defaultdict
+from datetime import datetime
+from uuid import UUID, uuid4
+
+from sqlalchemy import case, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.api.attendance.lookups import get_section_hierarchy
+from app.api.attendance.models import Attendance, Batch, Section, Student, Year
+from app.core.cache import cache
+from logs.logging import logger
+
+'''
+=====================================================
+# Description:
+    - In-process fan-out hub for the live attendance dashboard
+    - mark_attendance publishes one small event per section; the hub keeps
+      today's per-section counts in memory and pushes the serialized update
+      to every subscribed dashboard, so clients never hit the database
+    - Every publish is also broadcast over the cache's pub/sub channel, so
+      the other uvicorn workers' hubs (and their dashboards) see marks,
+      corrections and syncs handled elsewhere
+=====================================================
+'''
+
+ALL_DEPARTMENTS = "*"
+DASHBOARD_CHANNEL = "dashboard:section"
+
+
+class DashboardHub:
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._day = None
+        self._sections: dict = {}               # section_id -> today's counts
+        self._warmed: set = set()               # departments loaded from the db today
+        self._subscribers: dict = defaultdict(set)
+        self._origin = uuid4().hex               # tells this worker's broadcasts apart
+        self._forwarding: set = set()            # in-flight broadcast tasks
+
+    def _roll_day(self):
+        today = datetime.utcnow().date()
+        if self._day != today:
+            self._day = today
+            self._sections.clear()
+            self._warmed.clear()
+
+    async def section_department(self, db: AsyncSession, section_id):
+        """
+        Resolve (department_id, section name) for a section from the cached hierarchy.
+        """
+        hierarchy = await get_section_hierarchy(db, section_id)
+        if not hierarchy:
+            return None, None
+        return UUID(hierarchy["department_id"]), hierarchy["name"]
+
+    async def warm(self, db: AsyncSession, department_id=None):
+        """
+        Load today's per-section counts for a department with one aggregate query,
+        at most once per department per day.
+        """
+        self._roll_day()
+        key = department_id or ALL_DEPARTMENTS
+        if key in self._warmed or ALL_DEPARTMENTS in self._warmed:
+            return
+
+        is_present = func.lower(Attendance.status) == "present"
+        query = (
+            select(
+                Section.id, Section.name, Batch.department_id,
+                func.sum(case((is_present, 1), else_=0)).label("present"),
+                func.count(Attendance.id).label("total"),
+                func.max(Attendance.created_at).label("marked_at"),
+            )
+            .join(Student, Student.section_id == Section.id)
+            .join(Attendance, Attendance.student_id == Student.id)
+            .join(Year, Section.year_id == Year.id)
+            .join(Batch, Year.batch_id == Batch.id)
+            .where(Attendance.date == self._day)
+            .group_by(Section.id, Section.name, Batch.department_id)
+        )
+        if department_id:
+            query = query.where(Batch.department_id == department_id)
+
+        for row in (await db.execute(query)).all():
+            self._sections.setdefault(row.id, {
+                "section_id": row.id,
+                "section": row.name,
+                "department_id": row.department_id,
+                "present": int(row.present or 0),
+                "absent": int(row.total - (row.present or 0)),
+                "total": int(row.total),
+                "marked_at": row.marked_at,
+            })
+        self._warmed.add(key)
+
+    def _totals(self, department_id):
+        sections = [s for s in self._sections.values()
+                    if department_id in (None, ALL_DEPARTMENTS) or s["department_id"] == department_id]
+        return {
+            "sections_marked": len(sections),
+            "present": sum(s["present"] for s in sections),
+            "absent": sum(s["absent"] for s in sections),
+            "total": sum(s["total"] for s in sections),
+        }
+
+    def snapshot(self, department_id=None):
+        self._roll_day()
+        sections = [s for s in self._sections.values()
+                    if department_id is None or s["department_id"] == department_id]
+        return {
+            "type": "snapshot",
+            "date": self._day,
+            "department_id": department_id,
+            "sections": sections,
+            "totals": self._totals(department_id),
+        }
+
+    def publish(self, section_id, department_id, section_name, present, absent):
+        """
+        Record a section's marking for today and fan it out to its dashboards.
+        """
+        self._roll_day()
+        if department_id is None:
+            return
+        section = {
+            "section_id": section_id,
+            "section": section_name,
+            "department_id": department_id,
+            "present": present,
+            "absent": absent,
+            "total": present + absent,
+            "marked_at": datetime.utcnow(),
+        }
+        self._apply(section)
+
+        # 🔹 Other workers: fire and forget, the request never waits on the broadcast
+        task = asyncio.get_running_loop().create_task(self._forward(section))
+        self._forwarding.add(task)
+        task.add_done_callback(self._forwarding.discard)
+
+    async def _forward(self, section):
+        try:
+            await cache.broadcast(DASHBOARD_CHANNEL, {"origin": self._origin, "date": self._day, "section": section})
+        except Exception as e:
+            logger.warning(f"Dashboard broadcast failed: {e}")
+
+    def receive(self, message):
+        """
+        A section published by another worker (cache pub/sub handler).
+        """
+        self._roll_day()
+        if message["origin"] == self._origin or message["date"] != self._day.isoformat():
+            return
+        section = message["section"]
+        self._apply({
+            **section,
+            "section_id": UUID(section["section_id"]),
+            "department_id": UUID(section["department_id"]),
+            "marked_at": datetime.fromisoformat(section["marked_at"]),
+        })
+
+    def _apply(self, section):
+        department_id = section["department_id"]
+        self._sections[section["section_id"]] = section
+
+        # 🔹 Serialize once per audience, not once per client
+        for key in (department_id, ALL_DEPARTMENTS):
+            subscribers = self._subscribers.get(key)
+            if not subscribers:
+                continue
+            message = self.encode({
+                "type": "section",
+                "date": self._day,
+                "section": section,
+                "totals": self._totals(key),
+            })
+            for queue in subscribers:
+                self._offer(queue, message)
+
+    def apply_delta(self, section_id, department_id, section_name, present_delta):
+        """
+        Shift a section's counts for today after a correction (absent -> present is +1).
+        Sections this worker has not loaded are skipped: `warm` reads the corrected rows.
+        """
+        self._roll_day()
+        section = self._sections.get(section_id)
+        if section is None or not present_delta:
+            return
+        self.publish(section_id, department_id, section_name,
+                     section["present"] + present_delta, section["absent"] - present_delta)
+
+    def _offer(self, queue: asyncio.Queue, message):
+        # Slow clients lose their oldest update instead of blocking the publisher
+        if queue.full():
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(message)
+
+    def subscribe(self, department_id=None) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[department_id or ALL_DEPARTMENTS].add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue, department_id=None):
+        key = department_id or ALL_DEPARTMENTS
+        self._subscribers[key].discard(queue)
+        if not self._subscribers[key]:
+            self._subscribers.pop(key, None)
+
+    @staticmethod
+    def encode(message):
+        return json.dumps(message, default=str)
+
+
+dashboard_hub = DashboardHub()
+
+cache.subscribe(DASHBOARD_CHANNEL, dashboard_hub.receive)
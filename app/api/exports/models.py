@@ -0,0 +1,20 @@
+import uuid
+from datetime import date
+
+from sqlalchemy import UUID, Date, ForeignKey, Index, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+# Data version of a section's attendance for one month; bumped by every attendance write
+class ExportVersion(Base):
+    __tablename__ = 'export_versions'
+    __table_args__ = (
+        # Conflict target for the bump upsert (rows are never soft-deleted)
+        Index('uq_export_versions_section_month', 'section_id', 'month', unique=True),
+    )
+
+    section_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey('sections.id'), nullable=False)
+    month: Mapped[date] = mapped_column(Date, nullable=False)  # First day of the month
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
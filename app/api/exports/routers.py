@@ -0,0 +1,40 @@
+from datetime import date
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from app.api.attendance.services import AttendanceService
+from app.api.exports.services import ExportService, cached_file_response
+from app.core.sharding import shards
+from app.utils.security import get_current_user
+from app.utils.streaming import bytes_response
+
+router = APIRouter(tags=["Exports"], prefix="/exports")
+
+
+@router.get("/attendance")
+async def export_attendance(
+    request: Request,
+    start_date: date,
+    end_date: date,
+    section_id: Optional[UUID] = None,  # Admins only; faculty always get their own section
+    user = Depends(get_current_user),
+):
+    if not user or user.role.name not in ("faculty", "admin"):
+        raise HTTPException(status_code=403, detail="Access Denied: Only faculty and admins can export attendance.")
+    if user.role.name != "admin" or not section_id:
+        section_id = user.section_id
+    if not section_id:
+        raise HTTPException(status_code=400, detail="Error: You are not assigned to any section.")
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date.")
+
+    filename = f"attendance_{start_date}_{end_date}.csv"
+    async with shards.section_session(section_id) as db:
+        build = lambda: AttendanceService(db).export_attendance(section_id, start_date, end_date)
+        # 🔹 Closed ranges come from the disk cache (built once per data version)
+        path = await ExportService(db).cached_attendance_export(section_id, start_date, end_date, build)
+        if path is None:
+            return bytes_response(await build(), filename, "text/csv")
+    return cached_file_response(request, path, filename, "text/csv")
@@ -0,0 +1,114 @@
+import asyncio
+import gzip
+import hashlib
+from datetime import date, datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable
+
+import orjson
+from fastapi import Request
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.api.attendance.lookups import get_section_roster
+from app.api.exports.models import ExportVersion
+from app.core.database import upsert
+from app.core.disk_cache import DiskCache
+from app.core.settings import settings
+from app.core.static import accepted_encodings
+
+'''
+=====================================================
+# Description:
+    - Disk cache for attendance exports of closed date ranges (ending
+      before today), which only change when past attendance is edited
+    - `export_versions` holds a counter per (section, month); every
+      attendance write bumps the months it touches in the same transaction
+      (`bump_export_versions`), on the shard that holds the rows
+    - The file key hashes the scope, the range, the versions of the months
+      in range and the section roster (names are in the sheet). A repeat
+      download costs one small version read, not an attendance scan
+    - Files are stored plain and gzipped and sent with FileResponse
+      (sendfile where the server supports it); the gzip copy goes out
+      as-is, so CompressionMiddleware leaves it alone
+=====================================================
+'''
+
+export_cache = DiskCache(settings.export_cache_dir, settings.export_cache_max_bytes)
+
+
+def _month(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _months(start_date: date, end_date: date) -> list:
+    months, month = [], _month(start_date)
+    while month <= end_date:
+        months.append(month)
+        month = month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+    return months
+
+
+def _store(key, data: bytes):
+    export_cache.put(key, {".csv": data, ".csv.gz": gzip.compress(data, compresslevel=9, mtime=0)})
+
+
+async def bump_export_versions(db: AsyncSession, changes: Iterable):
+    """
+    Bump the export data version of every (section_id, date) month touched;
+    call inside the transaction that writes the attendance rows.
+    """
+    for section_id, month in sorted({(section_id, _month(day)) for section_id, day in changes}):
+        statement = upsert(ExportVersion, db).values(section_id=section_id, month=month, version=1)
+        await db.execute(statement.on_conflict_do_update(
+            index_elements=[ExportVersion.section_id, ExportVersion.month],
+            set_={"version": ExportVersion.version + 1},
+        ))
+
+
+class ExportService:
+    def __init__(self, db: AsyncSession):
+        self.db = db  # Session on the section's shard
+
+    async def _key(self, section_id, start_date, end_date):
+        months = _months(start_date, end_date)
+        versions = (await self.db.execute(
+            select(ExportVersion.month, ExportVersion.version)
+            .where(ExportVersion.section_id == section_id, ExportVersion.month.in_(months))
+        )).all()
+        roster = await get_section_roster(self.db, section_id)
+        identity = {
+            "export": "attendance", "section_id": str(section_id),
+            "start_date": start_date.isoformat(), "end_date": end_date.isoformat(),
+            "versions": sorted((month.isoformat(), version) for month, version in versions),
+            "roster": sorted((student["id"], student["name"]) for student in roster),
+        }
+        return hashlib.sha256(orjson.dumps(identity)).hexdigest()
+
+    async def cached_attendance_export(self, section_id, start_date, end_date,
+                                       build: Callable[[], Awaitable[bytes]]):
+        """
+        Path of the cached CSV for a closed range, building it with `build()` on
+        a miss; None when the range is still open (callers build it fresh).
+        """
+        if end_date >= datetime.utcnow().date():
+            return None
+        key = await self._key(section_id, start_date, end_date)
+        path = export_cache.get(key, ".csv")
+        if path is None:
+            data = await build()
+            await asyncio.to_thread(_store, key, data)
+            path = export_cache.path(key, ".csv")
+        return path
+
+
+def cached_file_response(request: Request, path: Path, filename, media_type) -> FileResponse:
+    """
+    Send a cached export, as its gzip copy when the client accepts gzip.
+    """
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"', "Vary": "Accept-Encoding"}
+    compressed = path.with_name(path.name + ".gz")
+    if "gzip" in accepted_encodings(request.headers.get("accept-encoding", "")) and compressed.is_file():
+        return FileResponse(compressed, media_type=media_type, headers={**headers, "Content-Encoding": "gzip"})
+    return FileResponse(path, media_type=media_type, headers=headers)
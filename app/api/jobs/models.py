@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import JSON, DateTime, Index, Integer, LargeBinary, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+# Background Job Model
+class Job(Base):
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        # Claim query: oldest runnable queued job
+        Index('ix_jobs_status_run_after', 'status', 'run_after'),
+    )
+
+    kind: Mapped[str] = mapped_column(String, nullable=False)
+    status: Mapped[str] = mapped_column(String, nullable=False, default="queued")  # queued, running, succeeded, failed
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    input_data: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+
+    progress: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    message: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=3)
+    run_after: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    result: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    result_data: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+    result_filename: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    result_media_type: Mapped[Optional[str]] = mapped_column(String, nullable=True)
@@ -0,0 +1,78 @@
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.jobs.schemas import (ExportAttendanceJobCreate, JobCreated,
+                                  JobResponse)
+from app.api.jobs.services import JobService
+from app.core.database import get_session
+from app.utils.security import get_current_user
+from app.utils.streaming import bytes_response
+
+router = APIRouter(tags=["Jobs"], prefix="/jobs")
+
+
+def _ensure_faculty(user):
+    if not user or user.role.name != "faculty":
+        raise HTTPException(status_code=403, detail="Access Denied: Only faculty can start this job.")
+
+    if not user.section_id:
+        raise HTTPException(status_code=400, detail="Error: You are not assigned to any section.")
+
+
+@router.post("/upload_students/", response_model=JobCreated, status_code=202)
+async def upload_students_job(
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_session),
+    user = Depends(get_current_user),
+):
+    _ensure_faculty(user)
+    contents = await file.read()
+    return await JobService(db).enqueue("import_students", {"section_id": str(user.section_id)}, user, contents)
+
+
+@router.post("/export_attendance/", response_model=JobCreated, status_code=202)
+async def export_attendance_job(
+    export_data: ExportAttendanceJobCreate,
+    db: AsyncSession = Depends(get_session),
+    user = Depends(get_current_user),
+):
+    _ensure_faculty(user)
+    if export_data.start_date > export_data.end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date.")
+
+    payload = {
+        "section_id": str(user.section_id),
+        "start_date": export_data.start_date.isoformat(),
+        "end_date": export_data.end_date.isoformat(),
+    }
+    return await JobService(db).enqueue("export_attendance", payload, user)
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_session),
+    user = Depends(get_current_user),
+):
+    job = await JobService(db).get_job(job_id, user)
+    response = JobResponse.model_validate(job)
+    response.has_download = job.result_filename is not None
+    return response
+
+
+@router.get("/{job_id}/result")
+async def download_job_result(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_session),
+    user = Depends(get_current_user),
+):
+    job = await JobService(db).get_job(job_id, user, with_result=True)
+    if job.status != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}; no result to download yet.")
+    if job.result_data is None:
+        raise HTTPException(status_code=404, detail="This job has no downloadable result.")
+
+    return bytes_response(job.result_data, job.result_filename or str(job_id),
+                          job.result_media_type or "application/octet-stream")
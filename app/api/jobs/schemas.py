@@ -0,0 +1,36 @@
+from datetime import date, datetime
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class ExportAttendanceJobCreate(BaseModel):
+    start_date: date
+    end_date: date
+
+    class Config:
+        from_attributes = True
+
+
+class JobCreated(BaseModel):
+    job_id: UUID
+    status: str
+
+
+class JobResponse(BaseModel):
+    id: UUID
+    kind: str
+    status: str
+    progress: int
+    message: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    result: Optional[dict] = None
+    has_download: bool = False
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
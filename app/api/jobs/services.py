@@ -0,0 +1,87 @@
+import asyncio
+from datetime import date
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import defer
+
+from app.api.archive.jobs import run_partition_maintenance
+from app.api.attendance.services import AttendanceService
+from app.api.exports.services import ExportService
+from app.api.jobs.models import Job
+from app.core.settings import settings
+from app.core.sharding import shards
+
+'''
+=====================================================
+# Description:
+    - Jobs are rows in the `jobs` table; a worker pool claims them with
+      SELECT ... FOR UPDATE SKIP LOCKED (see app/api/jobs/worker.py)
+    - Handlers take (db, job, progress) and return
+      (result, data, filename, media_type)
+=====================================================
+'''
+
+
+async def import_students_job(db: AsyncSession, job: Job, progress):
+    section_id = UUID(job.payload["section_id"])
+    # 🔹 `db` is the directory (jobs table); students live on the section's shard
+    async with shards.section_session(section_id) as shard_db:
+        result = await AttendanceService(shard_db).import_students(job.input_data, section_id, progress)
+    return result, None, None, None
+
+
+async def export_attendance_job(db: AsyncSession, job: Job, progress):
+    section_id = UUID(job.payload["section_id"])
+    start_date = date.fromisoformat(job.payload["start_date"])
+    end_date = date.fromisoformat(job.payload["end_date"])
+    async with shards.section_session(section_id) as shard_db:
+        build = lambda: AttendanceService(shard_db).export_attendance(section_id, start_date, end_date, progress)
+        # 🔹 Closed ranges are served from (and saved to) the export disk cache
+        path = await ExportService(shard_db).cached_attendance_export(section_id, start_date, end_date, build)
+        data = await asyncio.to_thread(path.read_bytes) if path else await build()
+    filename = f"attendance_{start_date}_{end_date}.csv"
+    return {"message": "Attendance exported successfully", "bytes": len(data)}, data, filename, "text/csv"
+
+
+async def archive_attendance_job(db: AsyncSession, job: Job, progress):
+    archived = await run_partition_maintenance()
+    return {"message": "Partition maintenance completed", "archived": archived}, None, None, None
+
+
+JOB_HANDLERS = {
+    "import_students": import_students_job,
+    "export_attendance": export_attendance_job,
+    "archive_attendance": archive_attendance_job,
+}
+
+
+class JobService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def enqueue(self, kind, payload, user, input_data=None):
+        if kind not in JOB_HANDLERS:
+            raise HTTPException(status_code=400, detail=f"Unknown job kind: {kind}")
+
+        job = Job(kind=kind, payload=payload, input_data=input_data,
+                  max_attempts=settings.job_max_attempts, created_by=user.id)
+        self.db.add(job)
+        await self.db.commit()
+        return {"job_id": job.id, "status": job.status}
+
+    async def get_job(self, job_id, user, with_result=False):
+        """
+        Fetch a job; faculty only see their own jobs, admins see all.
+        Blobs are only loaded when the result is being downloaded.
+        """
+        query = select(Job).where(Job.id == job_id).options(defer(Job.input_data))
+        if not with_result:
+            query = query.options(defer(Job.result_data))
+        result = await self.db.execute(query)
+        job = result.scalars().first()
+        if not job or (user.role.name != "admin" and job.created_by != user.id):
+            raise HTTPException(status_code=404, detail="Job not found.")
+        return job
@@ -0,0 +1,196 @@
+import argparse
+import asyncio
+import signal
+import traceback
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException
+from sqlalchemy import or_, update
+from sqlalchemy.future import select
+
+import app.api.attendance.models  # noqa: F401  (register mappers)
+from app.api.audit.services import audit_writer
+from app.api.jobs.models import Job
+from app.api.jobs.services import JOB_HANDLERS
+from app.core.database import async_master_session, current_actor
+from app.core.executor import cpu_executor
+from app.core.settings import settings
+from app.core.sqlite import write_queue
+from logs.logging import logger
+
+'''
+=====================================================
+# Description:
+    - Worker pool for the `jobs` table
+        * in-process: started from the lifespan hook in main.py
+        * standalone: python -m app.api.jobs.worker --concurrency 4
+    - Running jobs heartbeat; the reaper requeues jobs whose heartbeat is
+      older than the lease and fails them once attempts are used up
+=====================================================
+'''
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+class JobWorker:
+    def __init__(self, concurrency=None, poll_interval=None, lease_seconds=None):
+        self.concurrency = concurrency or settings.job_workers_in_process
+        self.poll_interval = poll_interval or settings.job_poll_interval_seconds
+        self.lease_seconds = lease_seconds or settings.job_lease_seconds
+        self._stopping = asyncio.Event()
+        self._tasks: list = []
+
+    async def _claim(self):
+        async with async_master_session() as db:
+            query = (
+                select(Job)
+                .where(Job.status == "queued", or_(Job.run_after.is_(None), Job.run_after <= _now()))
+                .order_by(Job.created_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            job = (await db.execute(query)).scalars().first()
+            if job is None:
+                return None
+            job.status = "running"
+            job.attempts += 1
+            job.heartbeat_at = _now()
+            job.error = None
+            await db.commit()
+            return job
+
+    async def _update(self, job_id, **values):
+        async with async_master_session() as db:
+            await db.execute(update(Job).where(Job.id == job_id).values(**values))
+            await db.commit()
+
+    async def _heartbeat(self, job_id):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self._update(job_id, heartbeat_at=_now())
+            except Exception as e:
+                # One missed beat is fine (the lease is 3 beats); a dead loop would get the job reaped
+                logger.warning(f"Job {job_id} heartbeat failed, retrying next beat: {e}")
+
+    async def _execute(self, job: Job):
+        async def progress(percent, message=None):
+            if write_queue.owned():
+                # SQLite mode: the handler's own transaction holds the single writer; skip this update
+                return
+            await self._update(job.id, progress=percent, message=message, heartbeat_at=_now())
+
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        actor = current_actor.set(job.created_by)
+        try:
+            async with async_master_session() as db:
+                result, data, filename, media_type = await JOB_HANDLERS[job.kind](db, job, progress)
+            await self._update(job.id, status="succeeded", progress=100, result=result, result_data=data,
+                               result_filename=filename, result_media_type=media_type,
+                               input_data=None, message="Completed", finished_at=_now())
+            logger.info(f"[*] Job {job.id} ({job.kind}) succeeded")
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back without burning an attempt
+            await self._update(job.id, status="queued", attempts=job.attempts - 1, message="Released on shutdown")
+            raise
+        except HTTPException as e:
+            # Bad input will not get better on retry
+            await self._update(job.id, status="failed", error=str(e.detail), finished_at=_now())
+            logger.warning(f"Job {job.id} ({job.kind}) rejected: {e.detail}")
+        except Exception as e:
+            if job.attempts < job.max_attempts:
+                retry_in = settings.job_retry_backoff_seconds * 2 ** (job.attempts - 1)
+                await self._update(job.id, status="queued", error=str(e),
+                                   run_after=_now() + timedelta(seconds=retry_in),
+                                   message=f"Retrying in {retry_in}s")
+                logger.warning(f"Job {job.id} ({job.kind}) failed, retrying in {retry_in}s: {e}")
+            else:
+                await self._update(job.id, status="failed", error=traceback.format_exc(limit=5),
+                                   finished_at=_now())
+                logger.error(f"Job {job.id} ({job.kind}) failed permanently: {e}")
+        finally:
+            current_actor.reset(actor)
+            if heartbeat.done() and not heartbeat.cancelled() and heartbeat.exception() is not None:
+                logger.error(f"Job {job.id} ({job.kind}) ran without a heartbeat: {heartbeat.exception()!r}")
+            heartbeat.cancel()
+
+    async def reap(self):
+        """
+        Requeue (or fail) running jobs whose worker stopped heartbeating.
+        """
+        stale = _now() - timedelta(seconds=self.lease_seconds)
+        async with async_master_session() as db:
+            stuck = (Job.status == "running", Job.heartbeat_at < stale)
+            requeued = await db.execute(
+                update(Job).where(*stuck, Job.attempts < Job.max_attempts)
+                .values(status="queued", run_after=None, message="Requeued after worker timeout")
+            )
+            failed = await db.execute(
+                update(Job).where(*stuck, Job.attempts >= Job.max_attempts)
+                .values(status="failed", error="Worker timed out", finished_at=_now())
+            )
+            await db.commit()
+        if requeued.rowcount or failed.rowcount:
+            logger.warning(f"Reaper requeued {requeued.rowcount} and failed {failed.rowcount} stuck jobs")
+
+    async def _wait(self, seconds):
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _slot(self):
+        while not self._stopping.is_set():
+            try:
+                job = await self._claim()
+            except Exception as e:
+                logger.exception(f"Job claim failed: {e}")
+                job = None
+            if job is None:
+                await self._wait(self.poll_interval)
+                continue
+            await self._execute(job)
+
+    async def _reaper(self):
+        while not self._stopping.is_set():
+            try:
+                await self.reap()
+            except Exception as e:
+                logger.exception(f"Job reaper failed: {e}")
+            await self._wait(self.lease_seconds / 2)
+
+    def start(self):
+        self._stopping.clear()
+        self._tasks = [asyncio.create_task(self._slot()) for _ in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._reaper()))
+        logger.info(f"[*] Job worker started with {self.concurrency} slots")
+
+    async def stop(self):
+        self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+async def main(concurrency):
+    worker = JobWorker(concurrency=concurrency)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    audit_writer.start()
+    worker.start()
+    await stop.wait()
+    await worker.stop()
+    await audit_writer.stop()
+    cpu_executor.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the background job worker pool.")
+    parser.add_argument("--concurrency", type=int, default=max(settings.job_workers_in_process, 1))
+    asyncio.run(main(parser.parse_args().concurrency))
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.core.admission import admission
+from app.core.executor import cpu_executor
+from app.utils.security import get_current_user
+
+router = APIRouter(tags=["Metrics"], prefix="/metrics")
+
+
+@router.get("/")
+async def runtime_metrics(user = Depends(get_current_user)):
+    if not user or user.role.name != "admin":
+        raise HTTPException(status_code=403, detail="Access Denied: Only admins can view metrics.")
+
+    # 🔹 This worker process only: each uvicorn worker has its own pool and admission slots
+    return {"cpu_executor": cpu_executor.stats(), "admission": admission.stats()}
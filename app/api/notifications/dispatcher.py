@@ -0,0 +1,227 @@
+import argparse
+import asyncio
+import signal
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+import aiosmtplib
+from sqlalchemy import and_, func, or_, tuple_, update
+from sqlalchemy.future import select
+
+import app.api.attendance.models  # noqa: F401  (register mappers)
+from app.api.notifications.models import Notification
+from app.api.notifications.services import build_message
+from app.core.settings import settings
+from app.core.sharding import shards
+from logs.logging import logger
+
+'''
+=====================================================
+# Description:
+    - Background dispatcher for the notification outbox
+        * in-process: started from the lifespan hook in main.py
+        * standalone: python -m app.api.notifications.dispatcher
+    - Outbox rows are written next to the attendance, so every shard has
+      its own outbox; each poll claims from all of them concurrently
+    - Due rows are claimed with SKIP LOCKED per (recipient, day) group, sent
+      as one digest per group over a small pool of SMTP connections, and
+      retried with exponential backoff
+    - Development: point SMTP_HOST/SMTP_PORT at a local stand-in, e.g.
+      `python -m aiosmtpd -n -l localhost:1025` or MailHog
+=====================================================
+'''
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+class SMTPPool:
+    def __init__(self, size: int):
+        self.size = size
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(size)
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.smtp_host,
+            port=settings.smtp_port,
+            username=settings.smtp_username or None,
+            password=settings.smtp_password or None,
+            use_tls=settings.smtp_use_tls,
+            start_tls=settings.smtp_start_tls,
+            timeout=settings.smtp_timeout_seconds,
+        )
+        await smtp.connect()
+        return smtp
+
+    async def _discard(self, smtp: aiosmtplib.SMTP):
+        try:
+            await smtp.quit()
+        except Exception:
+            smtp.close()
+
+    @asynccontextmanager
+    async def connection(self):
+        async with self._slots:
+            smtp = None
+            while not self._idle.empty():
+                candidate = self._idle.get_nowait()
+                if candidate.is_connected:
+                    smtp = candidate
+                    break
+                await self._discard(candidate)
+            if smtp is None:
+                smtp = await self._connect()
+            try:
+                yield smtp
+            except (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError, ConnectionError):
+                await self._discard(smtp)
+                raise
+            except Exception:
+                # The server rejected this message; the connection itself is still usable
+                self._idle.put_nowait(smtp)
+                raise
+            else:
+                self._idle.put_nowait(smtp)
+
+    async def close(self):
+        while not self._idle.empty():
+            await self._discard(self._idle.get_nowait())
+
+
+class NotificationDispatcher:
+    def __init__(self, poll_interval=None, batch_size=None):
+        self.poll_interval = poll_interval or settings.notification_poll_interval_seconds
+        self.batch_size = batch_size or settings.notification_batch_size
+        self.pool = SMTPPool(settings.smtp_pool_size)
+        self._stopping = asyncio.Event()
+        self._task = None
+
+    async def _claim(self, shard, db):
+        """
+        Claim every due row of up to `batch_size` (recipient, day) groups on one shard.
+        """
+        now = _now()
+        due = or_(
+            and_(Notification.status == "pending", Notification.run_after <= now),
+            # Claimed by a dispatcher that died before finishing
+            and_(Notification.status == "sending",
+                 Notification.claimed_at < now - timedelta(seconds=settings.notification_lease_seconds)),
+        )
+        groups = (await db.execute(
+            select(Notification.recipient, Notification.day).where(due)
+            .group_by(Notification.recipient, Notification.day)
+            .order_by(func.min(Notification.run_after))
+            .limit(self.batch_size)
+        )).all()
+        if not groups:
+            return {}
+
+        rows = (await db.execute(
+            select(Notification)
+            .where(due, tuple_(Notification.recipient, Notification.day).in_([tuple(g) for g in groups]))
+            .with_for_update(skip_locked=True)
+        )).scalars().all()
+        for row in rows:
+            row.status = "sending"
+            row.claimed_at = now
+        await db.commit()
+
+        claimed = defaultdict(list)
+        for row in rows:
+            claimed[(shard, row.recipient, row.recipient_kind, row.day)].append(row)
+        return claimed
+
+    async def _finish(self, shard, rows, error=None):
+        ids = [row.id for row in rows]
+        attempts = max(row.attempts for row in rows) + 1
+        if error is None:
+            values = {"status": "sent", "sent_at": _now(), "error": None}
+        elif attempts >= settings.notification_max_attempts:
+            values = {"status": "failed", "error": error}
+        else:
+            retry_in = settings.notification_retry_backoff_seconds * 2 ** (attempts - 1)
+            values = {"status": "pending", "error": error, "run_after": _now() + timedelta(seconds=retry_in)}
+        async with shards.session(shard) as db:
+            await db.execute(update(Notification).where(Notification.id.in_(ids))
+                             .values(attempts=attempts, claimed_at=None, **values))
+            await db.commit()
+
+    async def _send_group(self, key, rows):
+        shard, recipient, recipient_kind, day = key
+        message = build_message(recipient, recipient_kind, day, [row.student_name for row in rows])
+        try:
+            async with self.pool.connection() as smtp:
+                await smtp.send_message(message)
+        except Exception as e:
+            logger.warning(f"Notification to {recipient} for {day} failed: {e}")
+            await self._finish(shard, rows, error=str(e) or e.__class__.__name__)
+            return False
+        await self._finish(shard, rows)
+        return True
+
+    async def dispatch_once(self):
+        """
+        Send one batch of digests; returns the number of emails sent.
+        """
+        claimed = {}
+        for shard_claimed in (await shards.fan_out(self._claim)).values():
+            claimed.update(shard_claimed)
+        if not claimed:
+            return 0
+        results = await asyncio.gather(*(self._send_group(key, rows) for key, rows in claimed.items()))
+        sent = sum(results)
+        logger.info(f"[*] Notification dispatcher sent {sent} of {len(claimed)} digests")
+        return sent
+
+    async def _wait(self, seconds):
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                sent = await self.dispatch_once()
+            except Exception as e:
+                logger.exception(f"Notification dispatch failed: {e}")
+                sent = 0
+            if not sent:
+                await self._wait(self.poll_interval)
+
+    def start(self):
+        self._stopping.clear()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("[*] Notification dispatcher started")
+
+    async def stop(self):
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.pool.close()
+
+
+async def main():
+    dispatcher = NotificationDispatcher()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    dispatcher.start()
+    await stop.wait()
+    await dispatcher.stop()
+
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description="Run the absence notification dispatcher.").parse_args()
+    asyncio.run(main())
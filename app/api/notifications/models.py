@@ -0,0 +1,33 @@
+import uuid
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import UUID, Date, DateTime, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+# Notification Outbox Model
+class Notification(Base):
+    __tablename__ = 'notification_outbox'
+    __table_args__ = (
+        # Dispatcher: due pending messages, grouped per recipient per day
+        Index('ix_notification_outbox_status_run_after', 'status', 'run_after'),
+        Index('ix_notification_outbox_recipient_day', 'recipient', 'day'),
+    )
+
+    kind: Mapped[str] = mapped_column(String, nullable=False, default="absence")
+    recipient: Mapped[str] = mapped_column(String, nullable=False)
+    recipient_kind: Mapped[str] = mapped_column(String, nullable=False)  # "guardian" or "advisor"
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    student_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    student_name: Mapped[str] = mapped_column(String, nullable=False)
+    section_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+
+    status: Mapped[str] = mapped_column(String, nullable=False, default="pending")  # pending, sending, sent, failed, cancelled
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    run_after: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    claimed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
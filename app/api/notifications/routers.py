@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.api.notifications.models import Notification
+from app.core.sharding import shards
+from app.utils.security import get_current_user
+
+router = APIRouter(tags=["Notifications"], prefix="/notifications")
+
+
+@router.get("/outbox")
+async def outbox_status(
+    user = Depends(get_current_user),
+):
+    if not user or user.role.name != "admin":
+        raise HTTPException(status_code=403, detail="Access Denied: Only admins can view the notification outbox.")
+
+    # 🔹 Every shard keeps its own outbox: count on each and add up
+    async def count(shard, db: AsyncSession):
+        return (await db.execute(select(Notification.status, func.count()).group_by(Notification.status))).all()
+
+    totals = {}
+    for rows in (await shards.fan_out(count)).values():
+        for status, total in rows:
+            totals[status] = totals.get(status, 0) + total
+    return totals
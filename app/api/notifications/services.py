@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+
+from sqlalchemy import func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.api.attendance.models import Student
+from app.api.auth.models import User
+from app.api.notifications.models import Notification
+from app.core.database import async_master_session
+from app.core.settings import settings
+
+'''
+=====================================================
+# Description:
+    - Absence notifications are written to the `notification_outbox` table in
+      the same transaction as the attendance they describe (no SMTP in the
+      marking path)
+    - With department shards the outbox rows live on the shard that holds
+      the attendance; app/api/notifications/dispatcher.py polls every
+      shard and sends them later, one email per recipient per day, over
+      pooled SMTP connections
+=====================================================
+'''
+
+
+async def enqueue_absence_notifications(db: AsyncSession, section_id, day, absent_ids):
+    """
+    Add outbox rows for the guardians of absent students and the section's advisors.
+    Does not commit: the caller's commit makes them visible together with the attendance.
+    """
+    if not settings.notifications_enabled or not absent_ids:
+        return 0
+
+    run_after = datetime.now(timezone.utc) + timedelta(seconds=settings.notification_batch_window_seconds)
+    absentees = (await db.execute(
+        select(Student.id, Student.name, Student.guardian_email).where(Student.id.in_(absent_ids))
+    )).all()
+
+    rows = []
+    if settings.notify_guardians:
+        rows += [
+            Notification(recipient=student.guardian_email.lower(), recipient_kind="guardian", day=day,
+                         student_id=student.id, student_name=student.name, section_id=section_id,
+                         run_after=run_after)
+            for student in absentees if student.guardian_email
+        ]
+    if settings.notify_advisors:
+        # Users live in the directory database, whichever shard `db` is on
+        async with async_master_session() as directory:
+            advisors = (await directory.execute(
+                select(func.lower(User.email)).where(User.section_id == section_id, User.email.isnot(None))
+            )).scalars().all()
+        rows += [
+            Notification(recipient=advisor, recipient_kind="advisor", day=day,
+                         student_id=student.id, student_name=student.name, section_id=section_id,
+                         run_after=run_after)
+            for advisor in set(advisors) for student in absentees
+        ]
+
+    db.add_all(rows)
+    return len(rows)
+
+
+async def cancel_absence_notifications(db: AsyncSession, day, student_ids):
+    """
+    Drop not-yet-sent absence notifications for students corrected to present.
+    Does not commit.
+    """
+    if not student_ids:
+        return 0
+    result = await db.execute(
+        update(Notification)
+        .where(Notification.day == day, Notification.student_id.in_(student_ids), Notification.status == "pending")
+        .values(status="cancelled")
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def build_message(recipient, recipient_kind, day, student_names) -> EmailMessage:
+    """
+    One digest email for everything a recipient needs to know about a day.
+    """
+    names = sorted(set(student_names))
+    message = EmailMessage()
+    message["From"] = settings.mail_from
+    message["To"] = recipient
+
+    if recipient_kind == "advisor":
+        message["Subject"] = f"{settings.app_name}: {len(names)} absent on {day:%d %b %Y}"
+        lines = [f"The following students were marked absent on {day:%d %b %Y}:", ""]
+        lines += [f"  - {name}" for name in names]
+    else:
+        message["Subject"] = f"{settings.app_name}: absence on {day:%d %b %Y}"
+        lines = [f"{', '.join(names)} {'was' if len(names) == 1 else 'were'} marked absent on {day:%d %b %Y}.",
+                 "", "Please contact the class advisor if this is unexpected."]
+
+    message.set_content("\n".join(lines + ["", f"-- {settings.app_name}", settings.app_url]))
+    return message
@@ -0,0 +1,50 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy.future import select
+
+from app.api.attendance.models import Department
+from app.api.reports.services import ReportService
+from app.core.database import async_master_session
+from app.core.settings import settings
+from app.core.sharding import shards
+from logs.logging import logger
+
+
+async def run_at_risk_job():
+    """
+    Recompute the at-risk report for every department and warm the cache,
+    on all shards concurrently.
+    """
+    async with async_master_session() as db:
+        department_ids = (await db.execute(select(Department.id))).scalars().all()
+
+    def owned(shard):
+        return [department_id for department_id in department_ids if shards.for_department(department_id) == shard]
+
+    results = await shards.fan_out(lambda shard, db: ReportService(db).refresh_all_departments(owned(shard)))
+    summary = {"departments": sum(result["departments"] for result in results.values()),
+               "flagged": sum(result["flagged"] for result in results.values())}
+    logger.info(f"[*] At-risk job finished: {summary['flagged']} students flagged "
+                f"across {summary['departments']} departments")
+    return summary
+
+
+def _seconds_until(hour):
+    now = datetime.now()
+    next_run = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+
+async def at_risk_scheduler():
+    """
+    Run the at-risk job once a night at `settings.at_risk_job_hour`.
+    """
+    while True:
+        await asyncio.sleep(_seconds_until(settings.at_risk_job_hour))
+        try:
+            await run_at_risk_job()
+        except Exception as e:
+            logger.exception(f"At-risk job failed: {e}")
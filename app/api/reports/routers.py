@@ -0,0 +1,31 @@
+from typing import Literal, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.api.reports.schemas import AtRiskReport
+from app.api.reports.services import ReportService
+from app.core.sharding import shards
+from app.utils.security import get_current_user
+
+router = APIRouter(tags=["Reports"], prefix="/reports")
+
+
+@router.get("/at_risk/", response_model=AtRiskReport)
+async def at_risk_students(
+    scope: Literal["section", "batch", "department"],
+    scope_id: UUID,
+    min_streak: Optional[int] = Query(None, ge=1),
+    window: Optional[int] = Query(None, ge=1),
+    trend_drop: Optional[float] = Query(None, ge=0, le=1),
+    user = Depends(get_current_user),
+):
+    if not user or user.role.name not in ("admin", "faculty"):
+        raise HTTPException(status_code=403, detail="Access Denied: Only admins and faculty can view reports.")
+
+    # Faculty can only look at their own section
+    if user.role.name == "faculty" and (scope != "section" or scope_id != user.section_id):
+        raise HTTPException(status_code=403, detail="Access Denied: Faculty can only view their own section.")
+
+    async with shards.session(await shards.for_scope(scope, scope_id)) as db:
+        return await ReportService(db).at_risk_students(scope, scope_id, min_streak, window, trend_drop)
@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class AtRiskStudent(BaseModel):
+    student_id: UUID
+    name: str
+    section_id: UUID
+    current_streak: int
+    longest_streak: int
+    attendance_rate: Optional[float] = None
+    recent_rate: Optional[float] = None
+    previous_rate: Optional[float] = None
+    reasons: List[str]
+
+
+class AtRiskReport(BaseModel):
+    scope: str
+    scope_id: UUID
+    generated_at: datetime
+    days: int
+    total_students: int
+    min_streak: int
+    window: int
+    trend_drop: float
+    students: List[AtRiskStudent]
@@ -0,0 +1,210 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.api.attendance.models import (Attendance, Batch, Department, Section,
+                                       Student, Year)
+from app.core.cache import cache
+from app.core.settings import settings
+
+'''
+=====================================================
+# Description:
+    - Presence matrix: one row per student, one column per marked day
+      ( 1 = present, 0 = absent, -1 = not marked )
+    - Streaks and trends are computed on the whole matrix with NumPy,
+      never per student in Python
+=====================================================
+'''
+
+PRESENT = 1
+ABSENT = 0
+UNMARKED = -1
+
+SCOPES = ("section", "batch", "department")
+
+
+def absence_streaks(matrix):
+    """
+    Return (current, longest) consecutive-absence streaks for every row.
+    Unmarked days neither extend nor break a streak.
+    """
+    n, days = matrix.shape
+    if days == 0:
+        empty = np.zeros(n, dtype=np.int64)
+        return empty, empty
+
+    absent = matrix == ABSENT
+    # Every "present" starts a new segment; absences are counted per segment
+    segment = np.cumsum(matrix == PRESENT, axis=1)
+    keys = (np.arange(n)[:, None] * (days + 1) + segment)[absent]
+    counts = np.bincount(keys, minlength=n * (days + 1)).reshape(n, days + 1)
+
+    longest = counts.max(axis=1)
+    current = counts[np.arange(n), segment[:, -1]]
+    return current, longest
+
+
+def attendance_trend(matrix, window):
+    """
+    Return (overall, recent, previous) attendance rates for every row.
+    `recent` covers the last `window` days, `previous` the `window` days before it.
+    """
+    n, days = matrix.shape
+    present = (matrix == PRESENT).astype(np.int64)
+    marked = (matrix != UNMARKED).astype(np.int64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        overall = np.where(marked.sum(axis=1) > 0, present.sum(axis=1) / marked.sum(axis=1), np.nan)
+
+        nan = np.full(n, np.nan)
+        if window <= 0 or days < window:
+            return overall, nan, nan
+
+        # 🔹 Rolling sums via cumulative sums: window i covers days [i, i + window)
+        zeros = np.zeros((n, 1), dtype=np.int64)
+        present_cs = np.concatenate([zeros, np.cumsum(present, axis=1)], axis=1)
+        marked_cs = np.concatenate([zeros, np.cumsum(marked, axis=1)], axis=1)
+        rolling_present = present_cs[:, window:] - present_cs[:, :-window]
+        rolling_marked = marked_cs[:, window:] - marked_cs[:, :-window]
+        rolling_rate = np.where(rolling_marked > 0, rolling_present / rolling_marked, np.nan)
+
+    recent = rolling_rate[:, -1]
+    previous = rolling_rate[:, -1 - window] if days >= 2 * window else nan
+    return overall, recent, previous
+
+
+def _scope_filter(scope, scope_id):
+    if scope == "section":
+        return Section.id == scope_id
+    if scope == "batch":
+        return Batch.id == scope_id
+    if scope == "department":
+        return Batch.department_id == scope_id
+    raise HTTPException(status_code=400, detail=f"Invalid scope. Allowed: {SCOPES}")
+
+
+def _rate(value):
+    return None if np.isnan(value) else round(float(value), 4)
+
+
+class ReportService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def _hierarchy_query(self, query, scope, scope_id):
+        return (
+            query.join(Section, Student.section_id == Section.id)
+            .join(Year, Section.year_id == Year.id)
+            .join(Batch, Year.batch_id == Batch.id)
+            .where(_scope_filter(scope, scope_id))
+        )
+
+    async def load_presence_matrix(self, scope, scope_id, since):
+        """
+        Load the student x day presence matrix for a scope with two queries.
+        """
+        roster_query = self._hierarchy_query(
+            select(Student.id, Student.name, Student.section_id),
+            scope, scope_id,
+        ).order_by(Student.section_id, Student.name)
+        roster = (await self.db.execute(roster_query)).all()
+
+        attendance_query = self._hierarchy_query(
+            select(Attendance.student_id, Attendance.date, Attendance.status)
+            .join(Student, Attendance.student_id == Student.id),
+            scope, scope_id,
+        ).where(Attendance.date >= since)
+        records = (await self.db.execute(attendance_query)).all()
+
+        index = {row.id: i for i, row in enumerate(roster)}
+        count = len(records)
+        rows = np.fromiter((index[r.student_id] for r in records), dtype=np.int64, count=count)
+        ordinals = np.fromiter((r.date.toordinal() for r in records), dtype=np.int64, count=count)
+        values = np.fromiter(
+            (PRESENT if (r.status or "").lower() == "present" else ABSENT for r in records),
+            dtype=np.int8, count=count,
+        )
+
+        days, columns = np.unique(ordinals, return_inverse=True)
+        matrix = np.full((len(roster), len(days)), UNMARKED, dtype=np.int8)
+        matrix[rows, columns] = values
+        return roster, days, matrix
+
+    async def at_risk_students(self, scope, scope_id, min_streak=None, window=None, trend_drop=None, refresh=False):
+        """
+        Find students with a long absence streak or a falling attendance trend.
+        Results stay cached until mark_attendance touches the scope.
+        """
+        min_streak = min_streak or settings.at_risk_min_streak
+        window = window or settings.at_risk_window_days
+        trend_drop = settings.at_risk_trend_drop if trend_drop is None else trend_drop
+
+        # 🔹 Writes to any section invalidate its section, batch and department tags
+        key = f"at_risk:{scope}:{scope_id}:{min_streak}:{window}:{trend_drop}"
+        tags = [f"{scope}:{scope_id}"]
+        if not refresh:
+            cached = await cache.get(key)
+            if cached is not None:
+                return cached
+        versions = await cache.tag_versions(tags)
+
+        since = datetime.utcnow().date() - timedelta(days=settings.at_risk_lookback_days)
+        roster, days, matrix = await self.load_presence_matrix(scope, scope_id, since)
+
+        current, longest = absence_streaks(matrix)
+        overall, recent, previous = attendance_trend(matrix, window)
+        streak_flag = current >= min_streak
+        with np.errstate(invalid="ignore"):
+            trend_flag = (previous - recent) >= trend_drop
+
+        students = []
+        for i in np.flatnonzero(streak_flag | trend_flag):
+            reasons = []
+            if streak_flag[i]:
+                reasons.append("absence_streak")
+            if trend_flag[i]:
+                reasons.append("falling_trend")
+            student = roster[i]
+            students.append({
+                "student_id": student.id,
+                "name": student.name,
+                "section_id": student.section_id,
+                "current_streak": int(current[i]),
+                "longest_streak": int(longest[i]),
+                "attendance_rate": _rate(overall[i]),
+                "recent_rate": _rate(recent[i]),
+                "previous_rate": _rate(previous[i]),
+                "reasons": reasons,
+            })
+
+        report = {
+            "scope": scope,
+            "scope_id": scope_id,
+            "generated_at": datetime.utcnow(),
+            "days": len(days),
+            "total_students": len(roster),
+            "min_streak": min_streak,
+            "window": window,
+            "trend_drop": trend_drop,
+            "students": students,
+        }
+
+        await cache.set(key, report, tags, versions=versions)
+        return report
+
+    async def refresh_all_departments(self, department_ids=None):
+        """
+        Recompute (and re-cache) the default at-risk report for every department
+        (or the given ones).
+        """
+        if department_ids is None:
+            department_ids = (await self.db.execute(select(Department.id))).scalars().all()
+        flagged = 0
+        for department_id in department_ids:
+            report = await self.at_risk_students("department", department_id, refresh=True)
+            flagged += len(report["students"])
+        return {"departments": len(department_ids), "flagged": flagged}
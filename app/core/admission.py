@@ -0,0 +1,198 @@
+import asyncio
+from collections import deque
+from typing import Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.settings import settings
+from logs.logging import logger
+
+'''
+=====================================================
+# Description:
+    - Admission control in front of the routes, so overload turns into a fast
+      503 + Retry-After instead of a queue on DB pool checkout
+    - Each request is classified into a route class with its own concurrency
+      limit; all classes share `admission_total_slots` (sized to the DB pool)
+    - Lower priority classes cannot take the last `admission_reserved_slots`,
+      and freed slots go to waiting marking requests first
+    - Waiting is bounded (queue length per class and wait timeout)
+=====================================================
+'''
+
+
+class RouteClass:
+    def __init__(self, name: str, priority: int, limit: int, queue_size: int, wait_seconds: float):
+        self.name = name
+        self.priority = priority        # 0 is served first
+        self.limit = limit
+        self.queue_size = queue_size
+        self.wait_seconds = wait_seconds
+        self.active = 0
+        self.waiters: deque = deque()
+        self.rejected = 0
+
+
+# 🔹 (path prefix, route class); first match wins, None means not admission-controlled
+ROUTE_CLASSES = [
+    ("/dashboard/stream", None),
+    ("/dashboard/ws", None),
+    ("/templates/static", None),
+    ("/mark_attendance/", "marking"),
+    ("/attendance/sheet", "marking"),
+    ("/sync_attendance/", "marking"),
+    ("/correct_attendance/", "marking"),
+    ("/checkin/", "marking"),
+    ("/upload_students/", "bulk"),
+    ("/jobs/upload_students/", "bulk"),
+    ("/jobs/export_attendance/", "bulk"),
+    ("/archive/attendance/run", "bulk"),
+    ("/download_attendance/", "reporting"),
+    ("/exports/", "reporting"),
+    ("/reports/", "reporting"),
+    ("/archive/", "reporting"),
+    ("/changes", "reporting"),
+    ("/dashboard/today", "reporting"),
+    ("/jobs/", "reporting"),
+]
+
+
+def classify(path: str) -> Optional[str]:
+    for prefix, route_class in ROUTE_CLASSES:
+        if path.startswith(prefix):
+            return route_class
+    return "default" if path != "/" else None
+
+
+class AdmissionController:
+    def __init__(self, total_slots: int, reserved_slots: int, classes: list):
+        self.total_slots = total_slots
+        self.reserved_slots = reserved_slots
+        self.classes = {route_class.name: route_class for route_class in classes}
+        self._by_priority = sorted(classes, key=lambda route_class: route_class.priority)
+        self.active = 0
+
+    def _has_room(self, route_class: RouteClass) -> bool:
+        if route_class.active >= route_class.limit:
+            return False
+        # Only the top priority class may use the reserved slots
+        reserved = 0 if route_class.priority == self._by_priority[0].priority else self.reserved_slots
+        return self.active < self.total_slots - reserved
+
+    def _admit(self, route_class: RouteClass):
+        self.active += 1
+        route_class.active += 1
+
+    def _queued_ahead(self, route_class: RouteClass) -> bool:
+        # Waiters of the same class, or of a higher priority class that is only short of shared slots
+        return any(
+            other.waiters and (other is route_class or other.active < other.limit)
+            for other in self._by_priority if other.priority <= route_class.priority
+        )
+
+    async def acquire(self, name: str) -> bool:
+        route_class = self.classes[name]
+        if self._has_room(route_class) and not self._queued_ahead(route_class):
+            self._admit(route_class)
+            return True
+        if len(route_class.waiters) >= route_class.queue_size:
+            route_class.rejected += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        route_class.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=route_class.wait_seconds)
+            return True
+        except asyncio.TimeoutError:
+            if waiter.done():
+                # Admitted just as the timeout fired
+                return True
+            waiter.cancel()
+            route_class.rejected += 1
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(name)
+            waiter.cancel()
+            raise
+        finally:
+            try:
+                route_class.waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def release(self, name: str):
+        route_class = self.classes[name]
+        self.active -= 1
+        route_class.active -= 1
+        self._wake()
+
+    def _wake(self):
+        # 🔹 Hand freed slots to waiters in priority order, FIFO within a class
+        for route_class in self._by_priority:
+            while route_class.waiters and self._has_room(route_class):
+                waiter = route_class.waiters.popleft()
+                if waiter.done():
+                    continue
+                self._admit(route_class)
+                waiter.set_result(True)
+
+    def stats(self):
+        return {
+            "active": self.active,
+            "total_slots": self.total_slots,
+            "classes": {
+                name: {"active": c.active, "limit": c.limit, "waiting": len(c.waiters), "rejected": c.rejected}
+                for name, c in self.classes.items()
+            },
+        }
+
+
+def create_admission_controller() -> AdmissionController:
+    queue_size, wait = settings.admission_queue_size, settings.admission_wait_seconds
+    return AdmissionController(
+        total_slots=settings.admission_total_slots,
+        reserved_slots=settings.admission_reserved_slots,
+        classes=[
+            RouteClass("marking", 0, settings.admission_marking_limit, queue_size, wait),
+            RouteClass("default", 1, settings.admission_default_limit, queue_size, wait),
+            RouteClass("reporting", 2, settings.admission_reporting_limit, queue_size, wait),
+            RouteClass("bulk", 3, settings.admission_bulk_limit, queue_size, wait),
+        ],
+    )
+
+
+admission = create_admission_controller()
+
+
+class AdmissionMiddleware:
+    def __init__(self, app: ASGIApp, controller: AdmissionController = admission):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not settings.admission_enabled:
+            return await self.app(scope, receive, send)
+
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        name = classify(path)
+        if name is None:
+            return await self.app(scope, receive, send)
+
+        if not await self.controller.acquire(name):
+            logger.warning(f"Admission rejected {scope['method']} {path} ({name})")
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry shortly."},
+                status_code=503,
+                headers={"Retry-After": str(settings.admission_retry_after_seconds)},
+            )
+            return await response(scope, receive, send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name)
@@ -0,0 +1,337 @@
+import asyncio
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+import orjson
+import redis.asyncio as aioredis
+
+from app.core.settings import settings
+from logs.logging import logger
+
+'''
+=====================================================
+# Description:
+    - Two-tier cache shared by every uvicorn worker
+        * Local tier: per-process LRU, no I/O on a hit
+        * Shared tier: Redis (or an in-memory stand-in for "memory://")
+    - Tag-based invalidation: every tag has a version counter in the shared
+      tier. Entries remember the versions they were built from, and an
+      invalidation bumps the versions and is broadcast to all workers so
+      their local tiers drop the affected entries
+    - `broadcast`/`subscribe`: other per-worker state (live dashboards)
+      rides the same pub/sub listener; handlers register before `start`
+=====================================================
+'''
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+
+class LocalLRU:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()   # key -> (expires_at, tag versions, value)
+        self._tag_keys: dict = defaultdict(set)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] < time.monotonic():
+            self.delete(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key, value, versions: dict, ttl: Optional[int]):
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._entries[key] = (expires_at, versions, value)
+        self._entries.move_to_end(key)
+        for tag in versions:
+            self._tag_keys[tag].add(key)
+        while len(self._entries) > self.max_entries:
+            oldest, (_, oldest_versions, _) = self._entries.popitem(last=False)
+            self._forget(oldest, oldest_versions)
+
+    def delete(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._forget(key, entry[1])
+
+    def drop_tags(self, tags: Iterable[str]):
+        for tag in tags:
+            for key in self._tag_keys.pop(tag, set()):
+                self._entries.pop(key, None)
+
+    def _forget(self, key, versions: dict):
+        for tag in versions:
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    self._tag_keys.pop(tag, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._tag_keys.clear()
+
+
+class MemoryPubSub:
+    def __init__(self, server: "MemoryRedis"):
+        self._server = server
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._channels: set = set()
+
+    async def subscribe(self, *channels):
+        self._channels.update(channels)
+        self._server._subscribers.add(self)
+
+    async def listen(self):
+        while True:
+            yield await self._queue.get()
+
+    async def aclose(self):
+        self._server._subscribers.discard(self)
+
+
+class MemoryRedis:
+    """
+    In-process stand-in for the subset of redis.asyncio the cache uses.
+    Handy for development, single-worker deployments and tests.
+    """
+
+    def __init__(self):
+        self._data: dict = {}
+        self._subscribers: set = set()
+
+    def _alive(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] < time.monotonic():
+            self._data.pop(key, None)
+            return None
+        return entry[0]
+
+    async def get(self, key):
+        return self._alive(key)
+
+    async def mget(self, keys):
+        return [self._alive(key) for key in keys]
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and self._alive(key) is not None:
+            return None
+        if isinstance(value, str):
+            value = value.encode()
+        self._data[key] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    async def delete(self, *keys):
+        return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    async def incr(self, key):
+        value = int(self._alive(key) or 0) + 1
+        self._data[key] = (str(value).encode(), None)
+        return value
+
+    async def publish(self, channel, message):
+        if isinstance(message, str):
+            message = message.encode()
+        for subscriber in list(self._subscribers):
+            if channel in subscriber._channels:
+                subscriber._queue.put_nowait({"type": "message", "channel": channel, "data": message})
+        return len(self._subscribers)
+
+    def pubsub(self):
+        return MemoryPubSub(self)
+
+    async def aclose(self):
+        self._data.clear()
+
+
+class TieredCache:
+    def __init__(self, backend, local_max_entries: int, default_ttl: int, prefix: str = "gct"):
+        self.backend = backend
+        self.local = LocalLRU(local_max_entries)
+        self.default_ttl = default_ttl
+        self.prefix = prefix
+        self._known_versions: dict = {}   # tag -> highest version seen by this worker
+        self._loading: dict = {}          # key -> future of an in-flight load
+        self._handlers: dict = {}         # broadcast channel -> callback(message)
+        self._listener: Optional[asyncio.Task] = None
+
+    def _key(self, key):
+        return f"{self.prefix}:{key}"
+
+    def _tag_key(self, tag):
+        return f"{self.prefix}:tag:{tag}"
+
+    def _fresh(self, versions: dict):
+        return all(version >= self._known_versions.get(tag, 0) for tag, version in versions.items())
+
+    async def tag_versions(self, tags: Iterable[str]) -> dict:
+        tags = list(tags)
+        if not tags:
+            return {}
+        raw = await self.backend.mget([self._tag_key(tag) for tag in tags])
+        versions = {tag: int(value or 0) for tag, value in zip(tags, raw)}
+        for tag, version in versions.items():
+            if version > self._known_versions.get(tag, 0):
+                self._known_versions[tag] = version
+        return versions
+
+    async def get(self, key, default=None):
+        entry = self.local.get(key)
+        if entry is not None:
+            if self._fresh(entry[1]):
+                return entry[2]
+            self.local.delete(key)
+
+        raw = await self.backend.get(self._key(key))
+        if raw is None:
+            return default
+        payload = orjson.loads(raw)
+        versions = payload["t"]
+        if versions and await self.tag_versions(versions) != versions:
+            return default
+
+        ttl = payload.get("x")
+        self.local.set(key, payload["v"], versions, ttl - time.time() if ttl else None)
+        return payload["v"]
+
+    async def set(self, key, value, tags: Iterable[str] = (), ttl: Optional[int] = None, versions: Optional[dict] = None):
+        """
+        Store a value. Pass the `versions` captured before the value was built so an
+        invalidation that lands in between leaves the entry stale instead of wrong.
+        """
+        ttl = ttl or self.default_ttl
+        if versions is None:
+            versions = await self.tag_versions(tags)
+        payload = {"v": value, "t": versions, "x": time.time() + ttl}
+        await self.backend.set(self._key(key), orjson.dumps(payload), ex=ttl)
+        if self._fresh(versions):
+            self.local.set(key, value, versions, ttl)
+
+    async def get_or_load(self, key, loader: Callable[[], Awaitable[Any]], tags: Iterable[str] = (), ttl: Optional[int] = None):
+        value = await self.get(key)
+        if value is not None:
+            return value
+
+        # 🔹 Single flight: concurrent misses in this worker share one load
+        pending = self._loading.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            versions = await self.tag_versions(tags)
+            value = await loader()
+            if value is not None:
+                # Round-trip through JSON so callers see the same shape on hits and misses
+                value = orjson.loads(orjson.dumps(value))
+                await self.set(key, value, tags, ttl, versions)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            self._loading.pop(key, None)
+
+    async def delete(self, key):
+        self.local.delete(key)
+        await self.backend.delete(self._key(key))
+
+    # 🔹 Shared tier only: raw bytes with no local copy and no tags (locks, replay records)
+    async def get_shared(self, key):
+        return await self.backend.get(self._key(key))
+
+    async def set_shared(self, key, value: bytes, ttl: int, only_if_missing: bool = False) -> bool:
+        """
+        Returns False when `only_if_missing` is set and the key already exists.
+        """
+        return bool(await self.backend.set(self._key(key), value, ex=ttl, nx=only_if_missing))
+
+    async def delete_shared(self, key):
+        await self.backend.delete(self._key(key))
+
+    async def invalidate(self, *tags: str):
+        """
+        Invalidate every entry carrying any of the tags, in every worker.
+        """
+        tags = [tag for tag in tags if tag]
+        if not tags:
+            return
+        bumped = {tag: await self.backend.incr(self._tag_key(tag)) for tag in tags}
+        self._apply(bumped)
+        await self.backend.publish(INVALIDATION_CHANNEL, orjson.dumps(bumped))
+
+    def subscribe(self, channel: str, handler: Callable[[Any], None]):
+        """
+        Call `handler(message)` for every broadcast on `channel`, from any worker.
+        """
+        self._handlers[channel] = handler
+
+    async def broadcast(self, channel: str, message):
+        await self.backend.publish(channel, orjson.dumps(message))
+
+    def _apply(self, bumped: dict):
+        for tag, version in bumped.items():
+            if version > self._known_versions.get(tag, 0):
+                self._known_versions[tag] = version
+        self.local.drop_tags(bumped)
+
+    async def _listen(self):
+        while True:
+            pubsub = self.backend.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL, *self._handlers)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    channel = message["channel"]
+                    channel = channel.decode() if isinstance(channel, bytes) else channel
+                    if channel == INVALIDATION_CHANNEL:
+                        self._apply({tag: int(version) for tag, version in orjson.loads(message["data"]).items()})
+                        continue
+                    try:
+                        self._handlers[channel](orjson.loads(message["data"]))
+                    except Exception as e:
+                        logger.exception(f"Broadcast handler for {channel} failed: {e}")
+            except asyncio.CancelledError:
+                await pubsub.aclose()
+                raise
+            except Exception as e:
+                # Missed invalidations are unsafe for the local tier: drop it and resubscribe
+                logger.warning(f"Cache invalidation listener error, resubscribing: {e}")
+                self.local.clear()
+                await pubsub.aclose()
+                await asyncio.sleep(1)
+
+    async def start(self):
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self.backend.aclose()
+
+
+def create_cache(url: str) -> TieredCache:
+    backend = MemoryRedis() if url.startswith("memory://") else aioredis.from_url(url)
+    return TieredCache(backend, settings.cache_local_max_entries, settings.cache_default_ttl_seconds)
+
+
+cache = create_cache(settings.cache_url)
@@ -0,0 +1,102 @@
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.settings import settings
+from app.core.static import accepted_encodings
+
+'''
+=====================================================
+# Description:
+    - gzip for dynamic responses (JSON, CSV, HTML) at or above
+      `compression_minimum_size` bytes
+    - Streamed bodies are compressed chunk by chunk as they are produced: the
+      first chunks are held back only until the threshold is reached, so a
+      large CSV download never sits in memory twice
+    - Left alone: responses that already carry Content-Encoding (precompressed
+      static files, cached pages), event streams, and binary media types
+=====================================================
+'''
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml", "image/svg+xml")
+NEVER_COMPRESS = ("text/event-stream",)
+
+
+def _compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "").lower()
+    if content_type.startswith(NEVER_COMPRESS):
+        return False
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = None, level: int = None):
+        self.app = app
+        self.minimum_size = settings.compression_minimum_size if minimum_size is None else minimum_size
+        self.level = settings.compression_level if level is None else level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (scope["type"] != "http" or not settings.compression_enabled
+                or "gzip" not in accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))):
+            return await self.app(scope, receive, send)
+
+        start: Message = {}
+        held = []               # body chunks kept until we know whether to compress
+        held_size = 0
+        state = {"mode": None}  # None (undecided), "plain" or "gzip"
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)  # wbits=31: gzip container
+
+        async def send_plain():
+            state["mode"] = "plain"
+            await send(start)
+            for chunk in held:
+                await send(chunk)
+
+        async def send_compressed(more_body):
+            state["mode"] = "gzip"
+            headers = MutableHeaders(raw=start["headers"])
+            headers["content-encoding"] = "gzip"
+            headers.add_vary_header("Accept-Encoding")
+            body = b"".join(compressor.compress(chunk.get("body", b"")) for chunk in held)
+            if more_body:
+                del headers["content-length"]
+            else:
+                body += compressor.flush()
+                headers["content-length"] = str(len(body))
+            await send(start)
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        async def compressing_send(message: Message):
+            nonlocal held_size
+            if message["type"] == "http.response.start":
+                start.update(message)
+                headers = Headers(raw=message["headers"])
+                if message["status"] < 200 or message["status"] in (204, 304) or not _compressible(headers):
+                    state["mode"] = "plain"
+                    await send(message)
+                return
+            if message["type"] != "http.response.body":
+                return await send(message)
+
+            more_body = message.get("more_body", False)
+            if state["mode"] == "plain":
+                return await send(message)
+            if state["mode"] == "gzip":
+                body = compressor.compress(message.get("body", b""))
+                if not more_body:
+                    body += compressor.flush()
+                if body or not more_body:
+                    await send({"type": "http.response.body", "body": body, "more_body": more_body})
+                return
+
+            held.append(message)
+            held_size += len(message.get("body", b""))
+            if held_size >= self.minimum_size:
+                await send_compressed(more_body)
+            elif not more_body:
+                await send_plain()
+
+        await self.app(scope, receive, compressing_send)
@@ -1,27 +1,54 @@
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
 from typing import AsyncGenerator, Optional
 import uuid
 
-from sqlalchemy import UUID, DateTime, func
+from sqlalchemy import UUID, DateTime, Index, event, literal_column, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
                                     create_async_engine)
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import as_declarative, declarative_base
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, Session, mapped_column, with_loader_criteria
+from sqlalchemy.sql.functions import FunctionElement
 
 from app.core.settings import settings
+from app.core.sqlite import SQLiteSession, apply_pragmas
+
+# 🔹 DATABASE_URL overrides the Postgres URL, e.g. sqlite+aiosqlite:///./gct_attendance.db
+DATABASE_URL = settings.database_url or settings.postgresql_database_url
+IS_SQLITE = make_url(DATABASE_URL).get_backend_name() == "sqlite"
+
+
+POOL_ARGUMENTS = ("pool_size", "max_overflow", "pool_timeout", "pool_pre_ping")
 
 
 def create_engine(url, **kwargs):
     """Create an asynchronous SQLAlchemy engine."""
+    if make_url(url).get_backend_name() == "sqlite":
+        # SQLite uses NullPool: a connection per checkout, no pool to size
+        kwargs = {key: value for key, value in kwargs.items() if key not in POOL_ARGUMENTS}
+        engine = create_async_engine(url, echo=False, connect_args={"timeout": settings.sqlite_busy_timeout_ms / 1000}, **kwargs)
+        apply_pragmas(engine)
+        return engine
     return create_async_engine(url, echo=False, **kwargs)
 
 
-# ✅ Add `expire_on_commit=False` to prevent session expiration
-master_db_engine = create_engine(settings.postgresql_database_url)
+def create_sessionmaker(engine):
+    # SQLite sessions queue up for the single writer instead of failing with "database is locked"
+    session_class = SQLiteSession if engine.dialect.name == "sqlite" else AsyncSession
+    return async_sessionmaker(
+        bind=engine, class_=session_class, autocommit=False, autoflush=False, expire_on_commit=False
+    )
+
+
+# 🔹 pool_size + max_overflow should match admission_total_slots
+master_db_engine = create_engine(DATABASE_URL, pool_size=settings.db_pool_size, max_overflow=settings.db_max_overflow)
 
 # ✅ Add `expire_on_commit=False`
-async_master_session = async_sessionmaker(
-    bind=master_db_engine, autocommit=False, autoflush=False, expire_on_commit=False
-)
+async_master_session = create_sessionmaker(master_db_engine)
 
 # ✅ Provide correct session management
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
@@ -40,6 +67,47 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
 
 Base = declarative_base()
 
+# 🔹 The authenticated user behind the current request or job (set in app/utils/security.py)
+current_actor: ContextVar[Optional[uuid.UUID]] = ContextVar("current_actor", default=None)
+
+
+def _actor():
+    return current_actor.get()
+
+
+class ist_now(FunctionElement):
+    """Current Asia/Kolkata wall-clock time, on every supported backend."""
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+
+@compiles(ist_now)
+def _ist_now_postgresql(element, compiler, **kw):
+    return "timezone('Asia/Kolkata', now())"
+
+
+@compiles(ist_now, "sqlite")
+def _ist_now_sqlite(element, compiler, **kw):
+    return "strftime('%Y-%m-%d %H:%M:%f', 'now', '+330 minutes')"
+
+
+def ist_clock() -> datetime:
+    """What ist_now() evaluates to, computed in Python (naive, like the stored values)."""
+    return (datetime.now(timezone.utc) + timedelta(minutes=330)).replace(tzinfo=None)
+
+
+def upsert(model, session: AsyncSession):
+    """INSERT ... ON CONFLICT for the session's backend (Postgres and SQLite share the API)."""
+    return (sqlite_insert if session.bind.dialect.name == "sqlite" else pg_insert)(model)
+
+
+def inserted_flag(model, session: AsyncSession):
+    """RETURNING expression that is true when an upsert inserted (not updated) the row."""
+    if session.bind.dialect.name == "sqlite":
+        # created_at and updated_at share one `now` only in the inserting statement
+        return (model.created_at == model.updated_at).label("inserted")
+    return literal_column("xmax = 0").label("inserted")
+
 
 @as_declarative()
 class Base:
@@ -49,10 +117,51 @@ class Base:
     =====================================================
     '''
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.timezone('Asia/Kolkata', func.now()))
-    updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.timezone('Asia/Kolkata', func.now()), onupdate=func.timezone('Asia/Kolkata', func.now()))
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=ist_now())
+    updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=ist_now(), onupdate=ist_now(), index=True)  # Change feed cursor
     deleted_at: Mapped[Optional[DateTime]] = mapped_column(DateTime(timezone=True), nullable=True)
 
-    created_by: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)  # Track the creator
-    updated_by: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)  # Track the updater
-    deleted_by: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)  # Soft delete column
\ No newline at end of file
+    created_by: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True, default=_actor)  # Track the creator
+    updated_by: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True, default=_actor, onupdate=_actor)  # Track the updater
+    deleted_by: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)  # Soft delete column
+
+
+'''
+=====================================================
+# Soft delete
+    - Rows are never hard-deleted: `soft_delete` stamps deleted_at/deleted_by
+    - Every ORM query hides soft-deleted rows; opt out per statement with
+      .execution_options(include_deleted=True)
+    - Hot-path indexes are partial (`live_index`) so they only hold live rows
+=====================================================
+'''
+
+LIVE_ROWS = text("deleted_at IS NULL")
+
+
+def live_index(name, *columns, **kwargs):
+    """Partial index over live (not soft-deleted) rows only."""
+    return Index(name, *columns, postgresql_where=LIVE_ROWS, **kwargs)
+
+
+def trigram_index(name, column):
+    """Partial GIN trigram index (pg_trgm) for LIKE/ILIKE and similarity searches."""
+    return live_index(name, column, postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"})
+
+
+def soft_delete(instance, deleted_by=None):
+    # Same IST-shifted database clock as created_at/updated_at (evaluated at flush)
+    instance.deleted_at = ist_now()
+    instance.deleted_by = deleted_by or current_actor.get()
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _hide_soft_deleted(execute_state):
+    if (
+        not execute_state.is_column_load
+        and not execute_state.is_relationship_load
+        and not execute_state.execution_options.get("include_deleted", False)
+    ):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(Base, lambda cls: cls.deleted_at.is_(None), include_aliases=True)
+        )
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from logs.logging import logger
+
+'''
+=====================================================
+# Description:
+    - Content-addressed file cache on local disk with an LRU size budget
+        * an entry is `<key><suffix>` files (e.g. ".csv" and ".csv.gz"),
+          written atomically (temp file + rename) so concurrent workers
+          never see a partial file
+        * a hit refreshes the entry's mtime; once the directory is over
+          `max_bytes`, whole entries are deleted oldest-mtime first
+        * entries used within the last `EVICTION_GRACE` seconds are never
+          evicted: a path returned by get()/put() stays on disk long enough
+          for the caller (e.g. a FileResponse in this or another worker) to
+          open it, even if that briefly overshoots the budget
+    - Keys must change whenever the content would: callers hash everything
+      the content depends on into the key, so entries are never updated,
+      only superseded and eventually evicted
+=====================================================
+'''
+
+EVICTION_GRACE = 30   # seconds
+
+
+class DiskCache:
+    def __init__(self, directory, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def path(self, key, suffix) -> Path:
+        return self.directory / f"{key}{suffix}"
+
+    def get(self, key, suffix) -> Optional[Path]:
+        """
+        Path of a cached file, or None; marks the whole entry as recently used.
+        """
+        path = self.path(key, suffix)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        for sibling in self.directory.glob(f"{key}.*"):
+            try:
+                os.utime(sibling)
+            except FileNotFoundError:
+                pass
+        return path
+
+    def put(self, key, files: dict):
+        """
+        Store `files` (suffix -> bytes) as one entry, then enforce the budget.
+        Blocking: call through asyncio.to_thread.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for suffix, data in files.items():
+            descriptor, temp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(data)
+            os.replace(temp, self.path(key, suffix))
+        self.evict()
+
+    def evict(self):
+        entries = {}   # key -> [last used, size, paths]
+        for path in self.directory.iterdir():
+            if path.name.startswith(".tmp-"):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entry = entries.setdefault(path.name.split(".", 1)[0], [0.0, 0, []])
+            entry[0] = max(entry[0], stat.st_mtime)
+            entry[1] += stat.st_size
+            entry[2].append(path)
+
+        total = sum(size for _, size, _ in entries.values())
+        in_use = time.time() - EVICTION_GRACE
+        for key, (last_used, size, paths) in sorted(entries.items(), key=lambda item: item[1][0]):
+            if total <= self.max_bytes or last_used > in_use:
+                break
+            for path in paths:
+                path.unlink(missing_ok=True)
+            total -= size
+            logger.info(f"Evicted cached file {key} ({size} bytes)")
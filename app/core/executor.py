@@ -0,0 +1,116 @@
+import asyncio
+import multiprocessing
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from app.core.settings import settings
+from logs.logging import logger
+
+'''
+=====================================================
+# Description:
+    - Process pool for CPU-bound work (spreadsheet parsing, pivots, CSV and
+      workbook building), so a large file no longer blocks the event loop
+      and every other request in the worker
+        * functions must be module-level and importable without the app
+          (see app/api/attendance/spreadsheets.py; app/__init__.py stays
+          empty so importing them loads nothing else); pass plain column
+          lists, never ORM objects or sessions
+        * spawned workers: nothing from the parent (connections, loops,
+          threads) is inherited
+        * `cpu_executor_workers=0` runs tasks on a thread instead
+    - Cancelling the awaiting task drops a queued task from the pool; a task
+      already running finishes in its process and the result is discarded
+    - `stats()`: queue depth and per-task counts and timings
+=====================================================
+'''
+
+
+def _timed(fn, args):
+    # Runs in the pool process: report the time spent there, apart from the queue wait
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+class TaskStats:
+    def __init__(self):
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.run_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.max_run_seconds = 0.0
+
+    def as_dict(self):
+        done = self.completed or 1
+        return {
+            "completed": self.completed, "failed": self.failed, "cancelled": self.cancelled,
+            "avg_run_ms": round(self.run_seconds * 1000 / done, 2),
+            "avg_wait_ms": round(self.wait_seconds * 1000 / done, 2),
+            "max_run_ms": round(self.max_run_seconds * 1000, 2),
+        }
+
+
+class CPUExecutor:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._pool = None
+        self.pending = 0                      # submitted and not finished (queued + running)
+        self.tasks = defaultdict(TaskStats)   # function name -> stats
+
+    def start(self):
+        if self._pool is None and self.workers > 0:
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            logger.info(f"[*] CPU executor started with {self.workers} processes")
+
+    async def run(self, fn, *args):
+        """
+        Run `fn(*args)` in the pool and return its result.
+        """
+        stats = self.tasks[fn.__name__]
+        submitted = time.perf_counter()
+        self.pending += 1
+        try:
+            if self.workers <= 0:
+                result, run_seconds = await asyncio.to_thread(_timed, fn, args)
+            else:
+                self.start()
+                future = self._pool.submit(_timed, fn, args)
+                try:
+                    result, run_seconds = await asyncio.wrap_future(future)
+                except asyncio.CancelledError:
+                    future.cancel()
+                    raise
+        except asyncio.CancelledError:
+            # Either path: a thread cannot be stopped either, its result is discarded
+            stats.cancelled += 1
+            raise
+        except Exception:
+            stats.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+
+        stats.completed += 1
+        stats.run_seconds += run_seconds
+        stats.wait_seconds += max(time.perf_counter() - submitted - run_seconds, 0.0)
+        stats.max_run_seconds = max(stats.max_run_seconds, run_seconds)
+        return result
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "queued": max(self.pending - max(self.workers, 1), 0),
+            "tasks": {name: task.as_dict() for name, task in self.tasks.items()},
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+cpu_executor = CPUExecutor(settings.cpu_executor_workers)
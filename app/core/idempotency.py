@@ -0,0 +1,167 @@
+import asyncio
+import base64
+import hashlib
+import re
+import time
+from typing import Optional
+
+import orjson
+from jose import JWTError
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.cache import cache
+from app.core.settings import settings
+from app.utils.security import decode_token
+from logs.logging import logger
+
+'''
+=====================================================
+# Description:
+    - `Idempotency-Key` support for write requests (POST/PUT/PATCH/DELETE)
+    - The first response for (user, key) is stored in the shared cache tier
+      for `idempotency_ttl_seconds` and replayed for retries with the header
+      `Idempotent-Replayed: true`
+    - A retry that arrives while the first request is still running waits
+      for it (lock in the shared tier, so this also holds across workers)
+    - Reusing a key for a different request body/path is rejected with 422;
+      multipart bodies are compared without their boundary, which clients
+      pick anew on every retry
+    - 5xx responses are not stored, so the client can retry them
+=====================================================
+'''
+
+HEADER = b"idempotency-key"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+POLL_INTERVAL = 0.05
+BOUNDARY = re.compile(r'boundary=("[^"]+"|[^;\s]+)', re.IGNORECASE)
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _fingerprint(scope: Scope, body: bytes) -> str:
+    content_type = _header(scope, b"content-type") or ""
+    if content_type.lower().startswith("multipart/"):
+        match = BOUNDARY.search(content_type)
+        if match:
+            body = body.replace(match.group(1).strip('"').encode("latin-1"), b"")
+    return hashlib.sha256(scope["method"].encode() + b" " + scope["path"].encode() + b"\n" + body).hexdigest()
+
+
+def _user_id(scope: Scope) -> Optional[str]:
+    authorization = _header(scope, b"authorization") or ""
+    if not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        return decode_token(authorization[7:]).get("id")
+    except JWTError:
+        return None
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._inflight: dict = {}   # storage key -> asyncio.Event for requests running in this worker
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS:
+            return await self.app(scope, receive, send)
+        key = _header(scope, HEADER)
+        user_id = _user_id(scope) if key else None
+        if not key or not user_id:
+            return await self.app(scope, receive, send)
+        if len(key) > 255:
+            return await _send_json(send, 400, {"detail": "Idempotency-Key is too long."})
+
+        # 🔹 Buffer the body: it is part of the fingerprint and must be replayed to the app
+        body, more_body = [], True
+        while more_body:
+            message = await receive()
+            body.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = b"".join(body)
+        fingerprint = _fingerprint(scope, body)
+
+        storage_key = f"idem:{user_id}:{hashlib.sha256(key.encode()).hexdigest()}"
+        lock_key = f"{storage_key}:lock"
+
+        deadline = time.monotonic() + settings.idempotency_wait_seconds
+        while True:
+            stored = await cache.get_shared(storage_key)
+            if stored is not None:
+                return await self._replay(orjson.loads(stored), fingerprint, send)
+            if await cache.set_shared(lock_key, b"1", settings.idempotency_lock_seconds, only_if_missing=True):
+                break
+            # 🔹 Same key already in flight: wait for its response instead of running twice
+            if time.monotonic() > deadline:
+                return await _send_json(send, 409, {"detail": "A request with this Idempotency-Key is still being processed."})
+            event = self._inflight.get(storage_key)
+            if event is not None:
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=max(deadline - time.monotonic(), 0))
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(POLL_INTERVAL)
+
+        event = self._inflight[storage_key] = asyncio.Event()
+        try:
+            await self._execute(scope, body, receive, send, storage_key, fingerprint)
+        finally:
+            await cache.delete_shared(lock_key)
+            self._inflight.pop(storage_key, None)
+            event.set()
+
+    async def _execute(self, scope: Scope, body: bytes, receive: Receive, send: Send, storage_key: str, fingerprint: str):
+        sent = False
+
+        async def replay_body() -> Message:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        response = {"status": 500, "headers": [], "body": []}
+
+        async def capture(message: Message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [[k.decode("latin-1"), v.decode("latin-1")] for k, v in message.get("headers", [])]
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+            await send(message)
+
+        await self.app(scope, replay_body, capture)
+
+        if response["status"] >= 500:
+            return
+        payload = {
+            "f": fingerprint,
+            "s": response["status"],
+            "h": response["headers"],
+            "b": base64.b64encode(b"".join(response["body"])).decode(),
+        }
+        try:
+            await cache.set_shared(storage_key, orjson.dumps(payload), settings.idempotency_ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Could not store idempotent response: {e}")
+
+    async def _replay(self, stored: dict, fingerprint: str, send: Send):
+        if stored["f"] != fingerprint:
+            return await _send_json(send, 422, {"detail": "Idempotency-Key was already used for a different request."})
+        headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in stored["h"]]
+        headers.append((b"idempotent-replayed", b"true"))
+        await send({"type": "http.response.start", "status": stored["s"], "headers": headers})
+        await send({"type": "http.response.body", "body": base64.b64decode(stored["b"])})
+
+
+async def _send_json(send: Send, status_code: int, content: dict):
+    response = JSONResponse(content, status_code=status_code)
+    await send({"type": "http.response.start", "status": status_code, "headers": response.raw_headers})
+    await send({"type": "http.response.body", "body": response.body})
@@ -0,0 +1,64 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, List
+
+from app.core.settings import settings
+
+'''
+=====================================================
+# Description:
+    - DataLoader-style coalescing of by-id lookups across concurrent requests
+        * `load(key)` parks the caller on a future; keys requested within
+          `loader_wait_ms` (or until `loader_max_batch` keys) go out as one
+          `fetch(keys)` call, e.g. a single `WHERE id IN (...)`
+        * the same key requested twice in a batch is fetched once
+    - `fetch` opens its own session: a batch serves several requests, so it
+      cannot borrow any one request's session
+    - Results are not cached past the batch; a missing key resolves to None
+=====================================================
+'''
+
+
+class BatchLoader:
+    def __init__(self, fetch: Callable[[List[Any]], Awaitable[Dict[Any, Any]]],
+                 wait_ms: float = None, max_batch: int = None):
+        self.fetch = fetch
+        self.wait = (settings.loader_wait_ms if wait_ms is None else wait_ms) / 1000
+        self.max_batch = settings.loader_max_batch if max_batch is None else max_batch
+        self._pending: dict = {}   # key -> future for the batch being collected
+        self._timer = None
+
+    async def load(self, key):
+        future = self._pending.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[key] = future
+            if len(self._pending) >= self.max_batch:
+                self._dispatch()
+            elif self._timer is None:
+                self._timer = asyncio.get_running_loop().call_later(self.wait, self._dispatch)
+        # Shielded: one caller giving up must not cancel the lookup for the others
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: Iterable) -> list:
+        return await asyncio.gather(*(self.load(key) for key in keys))
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            asyncio.create_task(self._run(batch))
+
+    async def _run(self, batch: dict):
+        try:
+            results = await self.fetch(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception()  # mark retrieved when every waiter has gone
+            return
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(results.get(key))
@@ -0,0 +1,124 @@
+import asyncio
+import time
+import uuid
+from datetime import date
+
+from sqlalchemy import Date, String, bindparam, func, insert
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.future import select
+
+from app.api.attendance.models import Attendance, Student
+from app.api.auth.models import User
+from app.core.database import current_actor
+from app.core.settings import settings
+from logs.logging import logger
+
+'''
+=====================================================
+# Description:
+    - The statements every request or marking runs, built once at import
+      with named bind parameters instead of per call
+        * fixed SQL text (no expanding IN lists), so SQLAlchemy compiles each
+          once per process and asyncpg prepares each once per connection
+    - `warm_pool` opens the pool's connections at startup and runs every hot
+      statement on each one (read-only, rolled back), so the first request
+      of the morning finds connected, prepared connections
+    - benchmarks/first_request.py measures the difference
+=====================================================
+'''
+
+# 🔹 get_current_user: the token's user with role and section (joined eager loads)
+USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+
+# 🔹 Section roster (cached in app/api/attendance/lookups.py)
+SECTION_ROSTER = select(Student.id, Student.name, Student.register_number, Student.section_id).where(
+    Student.section_id == bindparam("section_id")
+)
+
+# 🔹 Has the section been marked for the day? One indexed probe instead of loading the records
+SECTION_MARKED_ON = (
+    select(Attendance.id)
+    .join(Student, Attendance.student_id == Student.id)
+    .where(Student.section_id == bindparam("section_id"), Attendance.date == bindparam("day"))
+    .limit(1)
+)
+
+# 🔹 A whole section's attendance in one statement: the rows arrive as parallel
+#    arrays, so the SQL is the same whatever the roster size (Postgres only)
+ATTENDANCE_INSERT = insert(Attendance).from_select(
+    ["id", "student_id", "status", "date", "created_by", "updated_by"],
+    select(
+        func.unnest(bindparam("ids", type_=ARRAY(Attendance.id.type))),
+        func.unnest(bindparam("student_ids", type_=ARRAY(Attendance.student_id.type))),
+        func.unnest(bindparam("statuses", type_=ARRAY(String))),
+        bindparam("day", type_=Date),
+        bindparam("created_by", type_=Attendance.created_by.type),
+        bindparam("updated_by", type_=Attendance.updated_by.type),
+    ),
+)
+
+
+async def insert_attendance(db: AsyncSession, day, statuses: dict):
+    """
+    Insert one attendance row per student (`statuses` is student_id -> status);
+    returns {row id: student_id}.
+    """
+    actor = current_actor.get()
+    ids = [uuid.uuid4() for _ in statuses]
+    if db.bind.dialect.name == "postgresql":
+        await db.execute(ATTENDANCE_INSERT, {
+            "ids": ids, "student_ids": list(statuses), "statuses": list(statuses.values()),
+            "day": day, "created_by": actor, "updated_by": actor,
+        })
+    else:
+        await db.execute(insert(Attendance), [
+            {"id": row_id, "student_id": student_id, "status": status, "date": day,
+             "created_by": actor, "updated_by": actor}
+            for row_id, (student_id, status) in zip(ids, statuses.items())
+        ])
+    return dict(zip(ids, statuses))
+
+
+def _warmup_statements(dialect_name):
+    # Parameters that match nothing: only the prepare matters
+    nobody = uuid.UUID(int=0)
+    statements = [
+        ("user_by_id", USER_BY_ID, {"user_id": nobody}),
+        ("section_roster", SECTION_ROSTER, {"section_id": nobody}),
+        ("section_marked_on", SECTION_MARKED_ON, {"section_id": nobody, "day": date.today()}),
+    ]
+    if dialect_name == "postgresql":
+        statements.append(("attendance_insert", ATTENDANCE_INSERT, {
+            "ids": [], "student_ids": [], "statuses": [], "day": None, "created_by": None, "updated_by": None,
+        }))
+    return statements
+
+
+async def warm_pool(engine: AsyncEngine, connections: int = None):
+    """
+    Open `connections` pooled connections at once and prepare every hot statement on each.
+    """
+    if engine.dialect.name == "sqlite":
+        # NullPool: nothing stays open; compiling once is all there is to warm
+        connections = 1
+    connections = connections or settings.db_warmup_connections
+    started = time.perf_counter()
+    statements = _warmup_statements(engine.dialect.name)
+
+    async def prepare(conn):
+        # Through an ORM session so the SQL matches the request path exactly (eager loads, soft-delete filter)
+        async with AsyncSession(bind=conn) as session:
+            for _, statement, params in statements:
+                await session.execute(statement, params)
+            await session.rollback()
+
+    # Hold them all at once, otherwise the pool hands the same connection back each time
+    opened = await asyncio.gather(*(engine.connect() for _ in range(connections)))
+    try:
+        await asyncio.gather(*(prepare(conn) for conn in opened))
+    finally:
+        for conn in opened:
+            await conn.close()
+    logger.info(f"[*] Warmed {connections} connections with {len(statements)} statements "
+                f"in {(time.perf_counter() - started) * 1000:.0f} ms")
@@ -0,0 +1,98 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.schema import CreateIndex
+
+from app.core.database import Base
+from logs.logging import logger
+
+'''
+=====================================================
+# Description:
+    - Brings an existing database up to the current models at startup
+      (there are no migrations; `create_all` only creates missing tables)
+        * columns added to existing tables (ADDED_COLUMNS) are created
+          when missing, as nullable columns
+        * indexes: missing ones are created, and ones whose definition
+          changed (partial WHERE deleted_at IS NULL, INCLUDE columns, GIN)
+          are dropped and rebuilt
+        * unique constraints from before soft delete are dropped: the
+          partial unique indexes replace them, so names of deleted rows
+          can be reused
+    - Idempotent: a database that is already current costs one catalog query
+    - Rebuilding an index on a large table locks writes to it while it runs;
+      the first start after an upgrade can take a while
+=====================================================
+'''
+
+# 🔹 Full unique constraints and plain indexes from the original schema, now replaced by live_index
+LEGACY_CONSTRAINTS = {
+    "departments": ["departments_name_key"],
+    "batches": ["batches_name_key"],
+    "users": ["users_username_key"],
+}
+LEGACY_INDEXES = ["ix_departments_name", "ix_batches_name", "ix_students_name"]
+
+# 🔹 Columns added to tables that already existed; all nullable, so adding them needs no backfill
+ADDED_COLUMNS = {
+    "students": ["register_number", "guardian_email"],
+    "users": ["email"],
+}
+
+
+def _outdated(index, definition: str) -> bool:
+    options = index.dialect_options["postgresql"]
+    return (
+        (options["where"] is not None) != (" WHERE " in definition)
+        or bool(options["include"]) != (" INCLUDE " in definition)
+        or (options["using"] == "gin") != (" USING gin " in definition)
+    )
+
+
+async def upgrade_columns(conn: AsyncConnection):
+    for table_name, columns in ADDED_COLUMNS.items():
+        table = Base.metadata.tables[table_name]
+        if conn.dialect.name == "postgresql":
+            for column in columns:
+                column_type = table.c[column].type.compile(dialect=conn.dialect)
+                await conn.execute(text(f"ALTER TABLE IF EXISTS {table_name} ADD COLUMN IF NOT EXISTS {column} {column_type}"))
+            continue
+
+        # SQLite has no ADD COLUMN IF NOT EXISTS
+        existing = {row[1] for row in (await conn.execute(text(f"PRAGMA table_info({table_name})"))).all()}
+        for column in columns:
+            if existing and column not in existing:
+                column_type = table.c[column].type.compile(dialect=conn.dialect)
+                await conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column} {column_type}"))
+                logger.info(f"[*] Added column {table_name}.{column}")
+
+
+async def upgrade_indexes(conn: AsyncConnection):
+    if conn.dialect.name != "postgresql":
+        return
+
+    for table, constraints in LEGACY_CONSTRAINTS.items():
+        for constraint in constraints:
+            await conn.execute(text(f"ALTER TABLE IF EXISTS {table} DROP CONSTRAINT IF EXISTS {constraint}"))
+    for index in LEGACY_INDEXES:
+        await conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+
+    existing = dict((await conn.execute(text(
+        "SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema()"
+    ))).all())
+    for table in Base.metadata.sorted_tables:
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            definition = existing.get(index.name)
+            if definition is not None and not _outdated(index, definition):
+                continue
+            if definition is not None:
+                await conn.execute(text(f"DROP INDEX {index.name}"))
+            await conn.execute(CreateIndex(index))
+            logger.info(f"[*] {'Rebuilt' if definition else 'Created'} index {index.name}")
+
+
+async def upgrade_schema(conn: AsyncConnection):
+    """
+    Run after `Base.metadata.create_all` on every database (default and shards).
+    """
+    await upgrade_columns(conn)
+    await upgrade_indexes(conn)
@@ -10,10 +10,127 @@ class Settings(BaseSettings):
     algorithm: str
     access_token_expire_minutes: int
 
-    postgresql_database_url: str
+    postgresql_database_url: str = ""
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    # Connections opened and prepared by the lifespan hook before traffic (0 disables)
+    db_warmup_connections: int = 5
+    # Embedded mode: set to e.g. sqlite+aiosqlite:///./gct_attendance.db to run without Postgres
+    database_url: str = ""
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kb: int = 65536
+    sqlite_mmap_size_mb: int = 256
+    # Department sharding (JSON in env): DATABASE_SHARDS='{"north": "postgresql+asyncpg://..."}',
+    # DEPARTMENT_SHARDS='{"<department uuid>": "north"}'; unmapped departments use DATABASE_URL
+    database_shards: dict[str, str] = {}
+    department_shards: dict[str, str] = {}
+    shard_pool_size: int = 5
+    shard_max_overflow: int = 10
 
     environment: str
 
+    # Cache ("memory://" for the in-process stand-in, "redis://host:6379/0" for Redis)
+    cache_url: str = "memory://"
+    cache_local_max_entries: int = 4096
+    cache_default_ttl_seconds: int = 300
+
+    # At-risk detection
+    at_risk_min_streak: int = 3
+    at_risk_window_days: int = 10
+    at_risk_trend_drop: float = 0.2
+    at_risk_lookback_days: int = 120
+    at_risk_job_hour: int = 1
+
+    # QR self check-in
+    checkin_code_interval_seconds: int = 10
+    checkin_valid_window: int = 1
+    checkin_flush_interval_ms: int = 250
+
+    # Background jobs (set job_workers_in_process=0 when running `python -m app.api.jobs.worker`)
+    job_workers_in_process: int = 2
+    job_poll_interval_seconds: float = 1.0
+    job_lease_seconds: int = 120
+    job_max_attempts: int = 3
+    job_retry_backoff_seconds: int = 30
+
+    # Process pool for CPU-bound spreadsheet work (0 runs it on a thread instead)
+    cpu_executor_workers: int = 2
+
+    # Coalesced by-id lookups (GET /students/{id}, GET /auth/users/{id})
+    loader_wait_ms: float = 2.0
+    loader_max_batch: int = 500
+
+    # Attendance partitioning and archival
+    attendance_partition_months_ahead: int = 3
+    attendance_archive_after_months: int = 6
+    attendance_archive_dir: str = "archive"
+    attendance_archive_drop_detached: bool = True
+
+    # Student search (pg_trgm word_similarity threshold for typo-tolerant matches)
+    student_search_limit: int = 20
+    student_search_threshold: float = 0.4
+    student_search_fuzzy_ratio: float = 0.75   # difflib cut-off in SQLite mode
+
+    # Idempotency-Key replay for write requests
+    idempotency_ttl_seconds: int = 86400
+    idempotency_lock_seconds: int = 300
+    idempotency_wait_seconds: float = 30.0
+
+    # Admission control (total slots should match the DB pool: pool_size + max_overflow)
+    admission_enabled: bool = True
+    admission_total_slots: int = 15
+    admission_reserved_slots: int = 4   # only marking may use these
+    admission_marking_limit: int = 15
+    admission_default_limit: int = 10
+    admission_reporting_limit: int = 3
+    admission_bulk_limit: int = 2
+    admission_queue_size: int = 50
+    admission_wait_seconds: float = 3.0
+    admission_retry_after_seconds: int = 5
+
+    # Absence notifications (outbox + dispatcher). In development point SMTP at a
+    # local stand-in: `python -m aiosmtpd -n -l localhost:1025` or MailHog
+    notifications_enabled: bool = True
+    notifications_dispatch_in_process: bool = True
+    notify_guardians: bool = True
+    notify_advisors: bool = True
+    notification_batch_window_seconds: int = 60
+    notification_batch_size: int = 200
+    notification_poll_interval_seconds: float = 5.0
+    notification_max_attempts: int = 5
+    notification_retry_backoff_seconds: int = 60
+    notification_lease_seconds: int = 300
+    smtp_host: str = "localhost"
+    smtp_port: int = 1025
+    smtp_username: str = ""
+    smtp_password: str = ""
+    smtp_use_tls: bool = False
+    smtp_start_tls: bool = False
+    smtp_timeout_seconds: float = 10.0
+    smtp_pool_size: int = 2
+    mail_from: str = "attendance@gct.ac.in"
+
+    # Audit log writer
+    audit_flush_interval_ms: int = 1000
+    audit_max_pending: int = 100000
+
+    # Change feed
+    changes_page_size: int = 500
+    changes_safety_lag_seconds: int = 5   # SQLite mode; Postgres holds back to the oldest open transaction
+
+    # Static assets and response compression
+    static_dir: str = "templates/static"
+    static_build_dir: str = "build/static"
+    static_max_age_seconds: int = 31536000
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024
+    compression_level: int = 6
+    stream_chunk_size: int = 65536
+
+    # On-disk cache for exports of closed date ranges
+    export_cache_dir: str = "cache/exports"
+    export_cache_max_bytes: int = 512 * 1024 * 1024
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,207 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator
+from uuid import UUID
+
+from fastapi import Depends
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.api.archive.services import ensure_partitions
+from app.api.attendance.lookups import get_section_hierarchy
+from app.api.attendance.models import Batch, Department, Section, Year
+from app.core.database import (Base, async_master_session, create_engine,
+                               create_sessionmaker, master_db_engine, upsert)
+from app.core.schema import upgrade_schema
+from app.core.settings import settings
+from app.utils.security import get_current_user
+from logs.logging import logger
+
+'''
+=====================================================
+# Description:
+    - Department-sharded routing for multi-college deployments
+        * DATABASE_SHARDS='{"north": "postgresql+asyncpg://..."}' adds engines,
+          each with its own pool
+        * DEPARTMENT_SHARDS='{"<department uuid>": "north"}' is the shard map;
+          unmapped departments stay on the "default" shard (DATABASE_URL)
+    - The default database is also the directory: users, roles, jobs and the
+      org hierarchy always live there. A sharded department's hierarchy rows
+      are copied to its shard (same ids) so per-shard joins keep working;
+      its students and attendance live only on the shard
+    - Section -> department comes from the cached hierarchy lookup, so
+      routing a request costs no query once warm
+    - Cross-shard admin work fans out with asyncio.gather, one session per
+      shard, and the caller merges the results
+    - With no shards configured every call resolves to the default session
+=====================================================
+'''
+
+DEFAULT_SHARD = "default"
+
+
+class ShardRouter:
+    def __init__(self, urls: dict, department_shards: dict):
+        self.engines = {DEFAULT_SHARD: master_db_engine}
+        self.sessionmakers = {DEFAULT_SHARD: async_master_session}
+        for name, url in urls.items():
+            engine = create_engine(url, pool_size=settings.shard_pool_size,
+                                   max_overflow=settings.shard_max_overflow, pool_pre_ping=True)
+            self.engines[name] = engine
+            self.sessionmakers[name] = create_sessionmaker(engine)
+
+        self.department_shards = {}
+        for department_id, name in department_shards.items():
+            if name not in self.engines:
+                raise ValueError(f"Department {department_id} is mapped to unknown shard '{name}'")
+            self.department_shards[UUID(str(department_id))] = name
+
+    @property
+    def names(self):
+        return list(self.engines)
+
+    @property
+    def enabled(self) -> bool:
+        return len(self.engines) > 1
+
+    def for_department(self, department_id) -> str:
+        if department_id is None:
+            return DEFAULT_SHARD
+        return self.department_shards.get(UUID(str(department_id)), DEFAULT_SHARD)
+
+    async def for_section(self, section_id) -> str:
+        """
+        Shard that holds a section's students and attendance.
+        """
+        if not self.enabled or not section_id:
+            return DEFAULT_SHARD
+        async with async_master_session() as directory:
+            hierarchy = await get_section_hierarchy(directory, section_id)
+        return self.for_department(hierarchy["department_id"]) if hierarchy else DEFAULT_SHARD
+
+    async def for_scope(self, scope, scope_id) -> str:
+        """
+        Shard for a report scope ("section", "batch" or "department").
+        """
+        if not self.enabled:
+            return DEFAULT_SHARD
+        if scope == "section":
+            return await self.for_section(scope_id)
+        if scope == "batch":
+            async with async_master_session() as directory:
+                scope_id = (await directory.execute(
+                    select(Batch.department_id).where(Batch.id == scope_id)
+                )).scalar()
+        return self.for_department(scope_id)
+
+    def session(self, shard=DEFAULT_SHARD) -> AsyncSession:
+        return self.sessionmakers[shard]()
+
+    @asynccontextmanager
+    async def section_session(self, section_id):
+        async with self.session(await self.for_section(section_id)) as session:
+            yield session
+
+    async def fan_out(self, fn, shards=None) -> dict:
+        """
+        Run `await fn(shard, session)` on every shard (or the given ones)
+        concurrently; returns shard name -> result.
+        """
+        shards = list(shards or self.names)
+
+        async def run(shard):
+            async with self.session(shard) as session:
+                return await fn(shard, session)
+
+        results = await asyncio.gather(*(run(shard) for shard in shards))
+        return dict(zip(shards, results))
+
+    async def replicate(self, department_id, *rows):
+        """
+        Copy directory rows (hierarchy) to the department's shard, keeping their ids;
+        copies already there are overwritten (renames, soft deletes).
+        """
+        shard = self.for_department(department_id)
+        if shard == DEFAULT_SHARD or not rows:
+            return
+        async with self.session(shard) as session:
+            for row in rows:
+                values = {column.key: getattr(row, column.key) for column in row.__table__.columns}
+                statement = upsert(type(row), session).values(**values)
+                await session.execute(statement.on_conflict_do_update(
+                    index_elements=["id"], set_={key: value for key, value in values.items() if key != "id"}))
+            await session.commit()
+
+    async def sync_department(self, department_id):
+        """
+        Copy a department with its batches, years and sections to its shard
+        (idempotent; soft-deleted rows are copied too, as tombstones).
+        """
+        if self.for_department(department_id) == DEFAULT_SHARD:
+            return
+        department_id = UUID(str(department_id))
+        async with async_master_session() as directory:
+            department = (await directory.execute(
+                select(Department).where(Department.id == department_id)
+                .execution_options(include_deleted=True)
+            )).scalars().first()
+            if department is None:
+                return
+            batches = (await directory.execute(
+                select(Batch).where(Batch.department_id == department_id)
+                .execution_options(include_deleted=True)
+            )).scalars().all()
+            years = (await directory.execute(
+                select(Year).where(Year.batch_id.in_([batch.id for batch in batches]))
+                .execution_options(include_deleted=True)
+            )).scalars().all()
+            sections = (await directory.execute(
+                select(Section).where(Section.year_id.in_([year.id for year in years]))
+                .execution_options(include_deleted=True)
+            )).scalars().all()
+        await self.replicate(department_id, department, *batches, *years, *sections)
+
+    async def sync_hierarchy(self):
+        """
+        Bring every mapped department's hierarchy up to date on its shard
+        (picks up departments added to the shard map since the last start).
+        """
+        for department_id in self.department_shards:
+            await self.sync_department(department_id)
+
+    async def create_all(self):
+        """
+        Create the schema on every non-default shard (the lifespan hook handles the default).
+        """
+        for name, engine in self.engines.items():
+            if name == DEFAULT_SHARD:
+                continue
+            async with engine.begin() as conn:
+                if conn.dialect.name == "postgresql":
+                    await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                await conn.run_sync(Base.metadata.create_all)
+                await upgrade_schema(conn)
+                await ensure_partitions(conn)
+            logger.info(f"[*] Shard '{name}' connected ✅")
+
+    async def dispose(self):
+        for name, engine in self.engines.items():
+            if name != DEFAULT_SHARD:
+                await engine.dispose()
+
+
+shards = ShardRouter(settings.database_shards, settings.department_shards)
+
+
+async def get_shard_session(user = Depends(get_current_user)) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency: a session on the shard that holds the current user's section
+    (the default shard for users without one).
+    """
+    async with shards.session(await shards.for_section(user.section_id)) as session:
+        try:
+            yield session
+        except Exception as e:
+            await session.rollback()
+            raise e
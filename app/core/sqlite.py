@@ -0,0 +1,131 @@
+import asyncio
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.settings import settings
+
+'''
+=====================================================
+# Description:
+    - Embedded mode: DATABASE_URL=sqlite+aiosqlite:///./gct_attendance.db
+    - Every connection gets WAL + tuned pragmas, so readers never block
+      the writer and the writer never blocks readers
+    - SQLite allows one writer at a time; instead of letting concurrent
+      transactions collide on "database is locked", `SQLiteSession` takes a
+      place in a process-wide FIFO write queue at its first write and keeps
+      it until commit/rollback/close
+=====================================================
+'''
+
+
+def sqlite_pragmas():
+    return {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",          # durable at checkpoints; safe with WAL
+        "foreign_keys": "ON",
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+        "cache_size": -settings.sqlite_cache_size_kb,
+        "temp_store": "MEMORY",
+        "mmap_size": settings.sqlite_mmap_size_mb * 1024 * 1024,
+    }
+
+
+def apply_pragmas(engine: AsyncEngine):
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in sqlite_pragmas().items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+class WriteQueue:
+    """
+    FIFO single-writer lock, re-entrant for the task that holds it
+    (a job handler reporting progress through a second session, for example).
+    """
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._owner = None
+        self._depth = 0
+        self.waiting = 0
+
+    def owned(self) -> bool:
+        return self._owner is not None and self._owner is asyncio.current_task()
+
+    async def acquire(self):
+        if self.owned():
+            self._depth += 1
+            return
+        self.waiting += 1
+        try:
+            await self._lock.acquire()
+        finally:
+            self.waiting -= 1
+        self._owner = asyncio.current_task()
+        self._depth = 1
+
+    def release(self):
+        # Not checked against the current task: AsyncSession closes itself in a separate task
+        self._depth -= 1
+        if self._depth == 0:
+            self._owner = None
+            self._lock.release()
+
+
+write_queue = WriteQueue()
+
+
+def _is_write(statement) -> bool:
+    # DML, and SELECT ... FOR UPDATE (claim queries must not race each other)
+    return getattr(statement, "is_dml", False) or getattr(statement, "_for_update_arg", None) is not None
+
+
+class SQLiteSession(AsyncSession):
+    _holds_write = False
+
+    def _has_changes(self) -> bool:
+        session = self.sync_session
+        return bool(session.new or session.dirty or session.deleted)
+
+    async def _begin_write(self):
+        if not self._holds_write:
+            await write_queue.acquire()
+            self._holds_write = True
+
+    def _end_write(self):
+        if self._holds_write:
+            self._holds_write = False
+            write_queue.release()
+
+    async def execute(self, statement, *args, **kwargs):
+        if _is_write(statement):
+            await self._begin_write()
+        return await super().execute(statement, *args, **kwargs)
+
+    async def flush(self, objects=None):
+        if self._has_changes():
+            await self._begin_write()
+        return await super().flush(objects)
+
+    async def commit(self):
+        if self._has_changes():
+            await self._begin_write()
+        try:
+            return await super().commit()
+        finally:
+            self._end_write()
+
+    async def rollback(self):
+        try:
+            return await super().rollback()
+        finally:
+            self._end_write()
+
+    async def close(self):
+        try:
+            return await super().close()
+        finally:
+            self._end_write()
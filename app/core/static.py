@@ -0,0 +1,198 @@
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+from fastapi.templating import Jinja2Templates
+from starlette.datastructures import Headers
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+from app.core.settings import settings
+
+'''
+=====================================================
+# Description:
+    - Build step (run once per deploy):
+        python -m app.core.static
+      copies templates/static to STATIC_BUILD_DIR under content-hashed names
+      (app.3f9c2b1e.css) with .gz/.br siblings and a manifest.json
+    - `PrecompressedStaticFiles` serves the hashed files with a one-year
+      immutable Cache-Control and picks the .br/.gz sibling the client accepts,
+      so nothing is compressed per request
+    - Templates link assets with {{ static_url('app.css') }}
+    - `RenderedPage` renders a template without per-request context once and
+      answers with a per-encoding ETag (304 on If-None-Match)
+=====================================================
+'''
+
+STATIC_URL = "/templates/static"
+MANIFEST = "manifest.json"
+COMPRESSIBLE = {".css", ".js", ".mjs", ".json", ".svg", ".html", ".txt", ".map", ".xml", ".csv", ".ico"}
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _hashed_name(path, data):
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:8]}{ext}"
+
+
+def build_static(source=None, target=None):
+    """
+    Write hashed and precompressed copies of every static asset; returns the manifest.
+    """
+    source = source or settings.static_dir
+    target = target or settings.static_build_dir
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    if os.path.isdir(target):
+        shutil.rmtree(target)
+    manifest = {}
+    for root, _, files in os.walk(source):
+        for filename in files:
+            path = os.path.relpath(os.path.join(root, filename), source).replace(os.sep, "/")
+            with open(os.path.join(root, filename), "rb") as f:
+                data = f.read()
+            hashed = _hashed_name(path, data)
+            manifest[path] = hashed
+
+            out = os.path.join(target, hashed)
+            os.makedirs(os.path.dirname(out), exist_ok=True)
+            with open(out, "wb") as f:
+                f.write(data)
+            if os.path.splitext(filename)[1].lower() not in COMPRESSIBLE:
+                continue
+            variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                variants.append((".br", brotli.compress(data, quality=11)))
+            for suffix, compressed in variants:
+                # Only keep variants that actually save bytes
+                if len(compressed) < len(data):
+                    with open(out + suffix, "wb") as f:
+                        f.write(compressed)
+
+    os.makedirs(target, exist_ok=True)
+    with open(os.path.join(target, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest():
+    path = os.path.join(settings.static_build_dir, MANIFEST)
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+# 🔹 None until `python -m app.core.static` has been run; assets are then served unhashed
+manifest = load_manifest()
+
+
+def static_directory():
+    return settings.static_build_dir if manifest is not None else settings.static_dir
+
+
+def static_url(path: str) -> str:
+    return f"{settings.base_path}{STATIC_URL}/{(manifest or {}).get(path, path)}"
+
+
+def accepted_encodings(accept_encoding: str) -> set:
+    """
+    Codings from an Accept-Encoding header, minus any refused with q=0.
+    """
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        quality = params.strip().removeprefix("q=")
+        try:
+            if quality and float(quality) == 0:
+                continue
+        except ValueError:
+            pass
+        if coding.strip():
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._immutable = set((manifest or {}).values())
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        request_headers = Headers(scope=scope)
+        request_path = self.get_path(scope).replace(os.sep, "/")
+        media_type = mimetypes.guess_type(request_path)[0] or "text/plain"
+        compressible = os.path.splitext(request_path)[1].lower() in COMPRESSIBLE
+
+        headers = {}
+        if compressible:
+            headers["vary"] = "Accept-Encoding"
+            accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+            for coding, suffix in ENCODINGS:
+                if coding in accepted and os.path.isfile(full_path + suffix):
+                    full_path = full_path + suffix
+                    stat_result = os.stat(full_path)
+                    headers["content-encoding"] = coding
+                    break
+        if request_path in self._immutable:
+            headers["cache-control"] = f"public, max-age={settings.static_max_age_seconds}, immutable"
+        else:
+            headers["cache-control"] = "no-cache"
+
+        response = FileResponse(full_path, status_code=status_code, headers=headers,
+                                media_type=media_type, stat_result=stat_result)
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+class RenderedPage:
+    """
+    A template rendered once, with precomputed gzip body and ETag.
+    """
+
+    def __init__(self, templates: Jinja2Templates, name: str, **context):
+        self.templates = templates
+        self.name = name
+        self.context = context
+        self._body = None
+
+    def _render(self):
+        body = self.templates.get_template(self.name).render(**self.context).encode()
+        self._body = body
+        self._gzip = gzip.compress(body, compresslevel=9, mtime=0)
+        digest = hashlib.sha256(body).hexdigest()[:16]
+        # 🔹 Strong ETags are per representation: the gzip body gets its own tag
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gz"'
+
+    def response(self, request: Request) -> Response:
+        if self._body is None:
+            self._render()
+        if "gzip" in accepted_encodings(request.headers.get("accept-encoding", "")):
+            body, etag, encoding = self._gzip, self.gzip_etag, {"content-encoding": "gzip"}
+        else:
+            body, etag, encoding = self._body, self.etag, {}
+        headers = {"etag": etag, "cache-control": "no-cache", "vary": "Accept-Encoding"}
+        if_none_match = request.headers.get("if-none-match", "")
+        if etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="text/html", headers={**headers, **encoding})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hash and precompress static assets for deployment.")
+    parser.add_argument("--source", default=settings.static_dir)
+    parser.add_argument("--target", default=settings.static_build_dir)
+    args = parser.parse_args()
+    built = build_static(args.source, args.target)
+    print(f"Built {len(built)} static assets into {args.target}")
@@ -1,8 +1,8 @@
 from datetime import datetime, timedelta, timezone
 import os
+import uuid
 from typing import Optional
 from jose import jwt
-from sqlalchemy import select
 from app.core.settings import settings
 import hashlib
 import hmac
@@ -10,16 +10,18 @@ import base64
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives import padding
 from cryptography.hazmat.backends import default_backend
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer, OAuth2PasswordBearer
 from jose import JWTError
-from app.api.auth.models import User
-from app.core.database import get_session
+from app.core.database import current_actor, get_session
+from app.core.prepared import USER_BY_ID
 from sqlalchemy.ext.asyncio import AsyncSession
 
 SECRET_KEY = settings.secret_key
 ALGORITHM = settings.algorithm
 TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
+# 🔹 Browsers keep the token here for the server-rendered pages (set on login)
+ACCESS_TOKEN_COOKIE = "access_token"
 
 
 '''
@@ -52,12 +54,9 @@ def decode_token(token: str):
     return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
 
 
-async def get_current_user(
-        credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer()),
-        db: AsyncSession = Depends(get_session)
-):
+async def get_user_from_token(token: str, db: AsyncSession):
     try:
-        payload = decode_token(credentials.credentials)
+        payload = decode_token(token)
         user_id: str = payload.get("id")
         if user_id is None:
             raise HTTPException(
@@ -65,17 +64,44 @@ async def get_current_user(
                 detail="Invalid authentication credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        result = await db.execute(select(User).where(User.id == user_id))
+        result = await db.execute(USER_BY_ID, {"user_id": uuid.UUID(str(user_id))})
         user = result.scalars().first()
         if user is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found",
             )
+        # 🔹 Fills created_by/updated_by/deleted_by and the audit log actor for this request
+        current_actor.set(user.id)
         return user
-    except JWTError:
+    except (JWTError, ValueError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
-        )
\ No newline at end of file
+        )
+
+
+async def get_current_user(
+        credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer()),
+        db: AsyncSession = Depends(get_session)
+):
+    return await get_user_from_token(credentials.credentials, db)
+
+
+async def get_page_user(
+        request: Request,
+        credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
+        db: AsyncSession = Depends(get_session)
+):
+    """
+    Like get_current_user, but also accepts the login cookie (plain page loads and form posts).
+    """
+    token = credentials.credentials if credentials else request.cookies.get(ACCESS_TOKEN_COOKIE)
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return await get_user_from_token(token, db)
@@ -0,0 +1,50 @@
+import csv
+import io
+
+from fastapi.responses import StreamingResponse
+
+from app.core.settings import settings
+
+'''
+=====================================================
+# Description:
+    - Streamed downloads: rows are encoded and sent in chunks instead of
+      building the whole file first, and CompressionMiddleware gzips each
+      chunk as it goes out
+=====================================================
+'''
+
+
+def _attachment(filename):
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+
+def _csv_chunks(header, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= settings.stream_chunk_size:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def csv_response(filename, header, rows):
+    """
+    Stream `rows` (any iterable of sequences) as a CSV attachment.
+    """
+    return StreamingResponse(_csv_chunks(header, rows), media_type="text/csv", headers=_attachment(filename))
+
+
+def bytes_response(data: bytes, filename, media_type):
+    """
+    Stream an in-memory file in chunks (compressed on the fly for text types).
+    """
+    view = memoryview(data)
+    chunks = (bytes(view[i:i + settings.stream_chunk_size]) for i in range(0, len(view), settings.stream_chunk_size))
+    return StreamingResponse(chunks, media_type=media_type, headers={
+        **_attachment(filename), "Content-Length": str(len(data)),
+    })
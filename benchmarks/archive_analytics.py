@@ -0,0 +1,131 @@
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import app.api.auth.models  # noqa: F401  (register mappers)
+from app.api.archive import analytics, columnar
+from app.api.archive.columnar import add_months
+from app.api.archive.services import ARCHIVE_SCHEMA, ArchiveService
+from app.core.settings import settings
+
+'''
+=====================================================
+# Description:
+    - Columnar archive analytics vs the equivalent SQL aggregate
+        * python -m benchmarks.archive_analytics --rows 5000000
+        * python -m benchmarks.archive_analytics --sql --start 2022-01-01 --end 2025-12-31
+    - Without --sql a synthetic archive is written to a temp dir and only
+      the Parquet path is timed
+    - With --sql the live range is first exported to a temp archive (same
+      export as partition archival), so both paths aggregate the same rows
+=====================================================
+'''
+
+
+def synthetic_hierarchy(departments=8, batches=4, years=4, sections=3):
+    hierarchy = {}
+    for d in range(departments):
+        for b in range(batches):
+            for y in range(years):
+                for s in range(sections):
+                    hierarchy[str(uuid.uuid4())] = [f"Dept {d}", f"Batch {b}", f"Year {y + 1}", f"Section {s}"]
+    return hierarchy
+
+
+def write_synthetic_archive(directory, hierarchy, rows, start: date, months: int):
+    section_ids = list(hierarchy)
+    per_month = rows // months
+    month = start
+    for _ in range(months):
+        days = (add_months(month, 1) - month).days
+        table = pa.table({
+            "id": [str(i) for i in range(per_month)],
+            "student_id": [str(i % 20000) for i in range(per_month)],
+            "section_id": [random.choice(section_ids) for _ in range(per_month)],
+            "date": [month + timedelta(days=random.randrange(days)) for _ in range(per_month)],
+            "status": [random.choice(("present", "present", "present", "absent")) for _ in range(per_month)],
+            "deleted": [False] * per_month,
+        }, schema=ARCHIVE_SCHEMA)
+        pq.write_table(table, columnar.month_file(directory, month), compression="zstd")
+        month = add_months(month, 1)
+
+
+def time_it(label, fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    print(f"{label:<28} best {min(timings) * 1000:9.1f} ms   mean {sum(timings) / repeat * 1000:9.1f} ms")
+    return result
+
+
+async def bench_sql(start, end, group_by, repeat):
+    from app.core.database import async_master_session
+
+    archive_dir = settings.attendance_archive_dir
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.attendance_archive_dir = tmp
+        try:
+            async with async_master_session() as db:
+                # 🔹 Snapshot the live range into Parquet, so both sides see the same rows
+                month, rows = date(start.year, start.month, 1), 0
+                while month <= end:
+                    rows += await ArchiveService(db).export_month(month)
+                    month = add_months(month, 1)
+                print(f"exported {rows:,} live rows to {tmp}")
+
+                hierarchy = await analytics.get_hierarchy_snapshot(db)
+                _, groups = time_it(f"parquet ({group_by})", lambda: columnar.summarize_archive(
+                    tmp, start, end, hierarchy, group_by), repeat)
+                timings = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    sql_groups = await analytics.sql_attendance_summary(db, start, end, group_by)
+                    timings.append(time.perf_counter() - started)
+                print(f"{'sql (' + group_by + ')':<28} best {min(timings) * 1000:9.1f} ms   "
+                      f"mean {sum(timings) / repeat * 1000:9.1f} ms")
+                print(f"groups: parquet={len(groups)} sql={len(sql_groups)} match={sorted(groups, key=str) == sorted(sql_groups, key=str)}")
+        finally:
+            settings.attendance_archive_dir = archive_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark archived attendance analytics.")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--months", type=int, default=36)
+    parser.add_argument("--start", type=date.fromisoformat, default=date(2022, 1, 1))
+    parser.add_argument("--end", type=date.fromisoformat)
+    parser.add_argument("--group-by", default="department", choices=columnar.GROUP_LEVELS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sql", action="store_true", help="also run the SQL aggregate on the live table")
+    args = parser.parse_args()
+
+    if args.sql:
+        end = args.end or add_months(args.start, args.months) - timedelta(days=1)
+        asyncio.run(bench_sql(args.start, end, args.group_by, args.repeat))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, "attendance"))
+        hierarchy = synthetic_hierarchy()
+        write_synthetic_archive(tmp, hierarchy, args.rows, args.start, args.months)
+        end = add_months(args.start, args.months) - timedelta(days=1)
+        print(f"{args.rows:,} rows over {args.months} months, {len(hierarchy)} sections")
+
+        time_it("load (mmap + filter)", lambda: columnar.load_archive(tmp, args.start, end), args.repeat)
+        for level in columnar.GROUP_LEVELS:
+            time_it(f"parquet ({level})", lambda: columnar.summarize_archive(
+                tmp, args.start, end, hierarchy, level), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import date
+
+from sqlalchemy.future import select
+
+from app.api.attendance.models import Section
+from app.api.auth.models import User
+from app.core.database import DATABASE_URL, Base, create_engine, create_sessionmaker
+from app.core.prepared import (SECTION_MARKED_ON, SECTION_ROSTER, USER_BY_ID,
+                               warm_pool)
+from app.core.settings import settings
+
+'''
+=====================================================
+# Description:
+    - First-request latency on a fresh engine, without and with the startup
+      warm-up (connect the pool + prepare the hot statements)
+        * python -m benchmarks.first_request
+        * python -m benchmarks.first_request --url postgresql+asyncpg://... --faculty 5
+    - A "request" is what marking attendance runs before the insert: the
+      token's user, the section roster and the already-marked probe;
+      `--faculty` of them arrive at once, like the first period of the day
+    - Uses the first user and section in the database (run the app once
+      first); every trial starts from a new engine, so nothing is shared
+=====================================================
+'''
+
+
+async def sample_ids(url):
+    engine = create_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with create_sessionmaker(engine)() as db:
+        user_id = (await db.execute(select(User.id).limit(1))).scalar() or uuid.uuid4()
+        section_id = (await db.execute(select(Section.id).limit(1))).scalar() or uuid.uuid4()
+    await engine.dispose()
+    return user_id, section_id
+
+
+async def first_requests(url, faculty, warm, user_id, section_id):
+    engine = create_engine(url, pool_size=settings.db_pool_size, max_overflow=settings.db_max_overflow)
+    sessionmaker = create_sessionmaker(engine)
+    if warm:
+        await warm_pool(engine, max(faculty, settings.db_warmup_connections))
+
+    async def request():
+        async with sessionmaker() as db:
+            await db.execute(USER_BY_ID, {"user_id": user_id})
+            (await db.execute(SECTION_ROSTER, {"section_id": section_id})).all()
+            (await db.execute(SECTION_MARKED_ON, {"section_id": section_id, "day": date.today()})).first()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(request() for _ in range(faculty)))
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    return elapsed
+
+
+async def bench(url, faculty, trials):
+    user_id, section_id = await sample_ids(url)
+    print(f"{url.split('://')[0]}: {faculty} concurrent first requests, {trials} trials (fresh engine each)")
+    for label, warm in (("cold (no warm-up)", False), ("warm (startup warm-up)", True)):
+        timings = [await first_requests(url, faculty, warm, user_id, section_id) for _ in range(trials)]
+        print(f"  {label:<24} median {statistics.median(timings) * 1000:8.1f} ms   "
+              f"best {min(timings) * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark first-request latency with and without pool warm-up.")
+    parser.add_argument("--url", default=DATABASE_URL)
+    parser.add_argument("--faculty", type=int, default=5)
+    parser.add_argument("--trials", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(bench(args.url, args.faculty, args.trials))
+
+
+if __name__ == "__main__":
+    main()
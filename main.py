@@ -7,13 +7,29 @@ import uvicorn
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from jose import JWTError
+from sqlalchemy import text
 from sqlalchemy.exc import (DataError, IntegrityError, InterfaceError,
                             OperationalError, ProgrammingError,
                             SQLAlchemyError)
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from app.core.database import Base, master_db_engine
+from app.api.reports.jobs import at_risk_scheduler
+from app.api.checkin.services import checkin_buffer
+from app.core.admission import AdmissionMiddleware
+from app.core.cache import cache
+from app.core.compression import CompressionMiddleware
+from app.core.executor import cpu_executor
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.prepared import warm_pool
+from app.core.schema import upgrade_schema
+from app.core.sharding import shards
+from app.core.static import PrecompressedStaticFiles, RenderedPage, static_directory, static_url
+from app.api.jobs.worker import JobWorker
+from app.api.notifications.dispatcher import NotificationDispatcher
+from app.api.audit.services import audit_writer
+from app.api.archive.jobs import partition_scheduler
+from app.api.archive.services import ensure_partitions
 from logs.logging import logger
 
 from app.core.settings import settings
@@ -62,6 +78,13 @@ app.add_exception_handler(Exception, global_exception_handler)
 app.add_exception_handler(JWTError, jwt_error_handler)
 app.add_exception_handler(JSONDecodeError, json_decode_error_handler)
 
+# 🔹 Per-route-class concurrency limits; innermost so idempotent replays never take a slot
+app.add_middleware(AdmissionMiddleware)
+# 🔹 Replay stored responses for retried writes (added before CORS so CORS wraps replays too)
+app.add_middleware(IdempotencyMiddleware)
+# 🔹 gzip dynamic responses above the size threshold, streamed bodies included
+app.add_middleware(CompressionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Allows all origins
@@ -71,18 +94,69 @@ app.add_middleware(
 )
 
 templates = Jinja2Templates(directory="templates")
-app.mount("/templates/static", StaticFiles(directory="./templates/static"), name="static")
+templates.env.globals["static_url"] = static_url
+# 🔹 Hashed, precompressed assets from `python -m app.core.static` when built
+app.mount("/templates/static", PrecompressedStaticFiles(directory=static_directory()), name="static")
+
+# 🔹 The home page has no per-request data: render it once, revalidate by ETag
+home_page = RenderedPage(templates, "home.html")
 
 @app.get("/")
 async def read_root(request: Request):
-    return templates.TemplateResponse("home.html", {"request": request})
+    return home_page.response(request)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     async with master_db_engine.begin() as conn:
+        # 🔹 Trigram indexes for student search need pg_trgm
+        if conn.dialect.name == "postgresql":
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(Base.metadata.create_all)
-        logger.info('[*] Postgresql Database connected ✅')
+        # 🔹 Existing databases: indexes added or changed since they were created
+        await upgrade_schema(conn)
+        await ensure_partitions(conn)
+        logger.info(f'[*] {conn.dialect.name.capitalize()} Database connected ✅')
+    # 🔹 Department shards: schema, then the hierarchy rows their joins need
+    await shards.create_all()
+    await shards.sync_hierarchy()
+    # 🔹 Connect the pools and prepare the hot statements before the first request
+    if settings.db_warmup_connections:
+        for engine in shards.engines.values():
+            await warm_pool(engine)
+
+    # 🔹 Listen for cache invalidations from other workers
+    await cache.start()
+
+    # 🔹 Nightly at-risk detection job
+    at_risk_task = asyncio.create_task(at_risk_scheduler())
+    # 🔹 Nightly attendance partition creation and archival
+    partition_task = asyncio.create_task(partition_scheduler())
+    # 🔹 Write-behind buffer for QR check-ins
+    checkin_buffer.start()
+    # 🔹 Process pool for spreadsheet parsing and export pivots (spawned now, not on the first upload)
+    cpu_executor.start()
+    # 🔹 In-process worker pool for background imports/exports
+    job_worker = JobWorker() if settings.job_workers_in_process > 0 else None
+    if job_worker:
+        job_worker.start()
+    # 🔹 Background writer for the audit log
+    audit_writer.start()
+    # 🔹 Outbox dispatcher for absence notifications
+    dispatcher = NotificationDispatcher() if settings.notifications_dispatch_in_process else None
+    if dispatcher:
+        dispatcher.start()
     yield
+    if dispatcher:
+        await dispatcher.stop()
+    if job_worker:
+        await job_worker.stop()
+    at_risk_task.cancel()
+    partition_task.cancel()
+    await checkin_buffer.stop()
+    await audit_writer.stop()
+    await cache.close()
+    await shards.dispose()
+    cpu_executor.shutdown()
 
 app.router.lifespan_context = lifespan
 
@@ -90,8 +164,28 @@ app.router.lifespan_context = lifespan
 
 from app.api.attendance.routers import router as attendance_router
 from app.api.auth.routers import router as auth_router
+from app.api.reports.routers import router as reports_router
+from app.api.dashboard.routers import router as dashboard_router
+from app.api.checkin.routers import router as checkin_router
+from app.api.jobs.routers import router as jobs_router
+from app.api.changes.routers import router as changes_router
+from app.api.archive.routers import router as archive_router
+from app.api.notifications.routers import router as notifications_router
+from app.api.audit.routers import router as audit_router
+from app.api.metrics.routers import router as metrics_router
+from app.api.exports.routers import router as exports_router
 app.include_router(attendance_router)
 app.include_router(auth_router)
+app.include_router(reports_router)
+app.include_router(dashboard_router)
+app.include_router(checkin_router)
+app.include_router(jobs_router)
+app.include_router(changes_router)
+app.include_router(archive_router)
+app.include_router(notifications_router)
+app.include_router(audit_router)
+app.include_router(metrics_router)
+app.include_router(exports_router)
 
 
 if __name__ == "__main__":